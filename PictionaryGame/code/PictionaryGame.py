@@ -1,134 +1,1254 @@
 from PyQt6.QtWidgets import (QApplication, QWidget, QMainWindow, QFileDialog,
                              QDockWidget, QPushButton, QVBoxLayout, QLabel,
-                             QMessageBox, QComboBox, QStackedWidget, QHBoxLayout, QLineEdit)
-from PyQt6.QtGui import QIcon, QPainter, QPen, QAction, QPixmap, QFont, QColor
-from PyQt6.QtCore import Qt, QPoint, QRect, pyqtSignal, QTimer
-import sys
-import csv
+                             QComboBox, QStackedWidget, QHBoxLayout, QLineEdit,
+                             QListWidget)
+from PyQt6.QtGui import (QIcon, QPainter, QPen, QAction, QColor, QPolygonF, QImage,
+                         QRegion, QKeySequence)
+from PyQt6.QtCore import Qt, QEvent, QObject, QPoint, QPointF, QRectF, QSize, pyqtSignal, QTimer
+import glob
+import itertools
+import math
+import os
 import random
+import sys
+import time
+
+from engine import GameEngine
+from export import QUALITY_PRESETS, THUMBNAIL_SIZE, Exporter, TurnGallery, supported_formats
+from history import UndoHistory
+from matching import CLOSE, CORRECT, WRONG, GuessMatcher
+import network
+from layers import LayerStack, device_rect, flatten, new_image
+from perf import GUESS, INPUT_LATENCY, MOVES, PAINT, TURN, metrics
+from recording import GameLog, GameRecorder, StrokeReplay, apply_to_canvas, strokes_at
+from strokes import Fill, StrokeStore, simplify
+from tiles import TILE, TileCache, TileIndex, begin_tile_paint, render_tile, tile_rect
+from timers import Countdown, DeadlineScheduler
+from wordbank import load_words
+from wordpack import load_pack
+
+
+# Every widget style in one sheet, parsed once for the whole application.
+# Widgets opt in through their object name; rules for a specific widget come
+# after the rules for its container so they win, as a widget's own sheet did.
+STYLESHEET = """
+QMainWindow {
+    background-color: #F0F2F5;
+}
+
+QMenuBar {
+    background-color: #2C3E50;
+    color: white;
+    padding: 5px;
+}
+QMenuBar::item {
+    padding: 5px 10px;
+    margin: 0px;
+}
+QMenuBar::item:selected {
+    background-color: #34495E;
+}
+QMenuBar QMenu {
+    background-color: white;
+    border: 1px solid #BDC3C7;
+    padding: 5px;
+}
+QMenuBar QMenu::item {
+    padding: 5px 30px 5px 20px;
+    color: #2C3E50;
+}
+QMenuBar QMenu::item:selected {
+    background-color: #3498DB;
+    color: white;
+}
+
+#startScreen, #startScreen QWidget {
+    background-color: #F0F2F5;
+}
+#startScreen QLabel {
+    color: #1A1A1A;
+}
+#startContainer, #startContainer QWidget {
+    background-color: white;
+    border-radius: 15px;
+    padding: 20px;
+}
+QLabel#startTitle {
+    font-size: 48px;
+    font-weight: bold;
+    color: #2C3E50;
+    margin: 20px;
+    font-family: 'Arial';
+}
+QLabel#startSubtitle {
+    font-size: 24px;
+    color: #7F8C8D;
+    margin-bottom: 30px;
+}
+QLabel#difficultyLabel {
+    font-size: 18px;
+    font-weight: bold;
+    color: #2C3E50;
+    margin-top: 20px;
+}
+QComboBox#difficultyCombo {
+    font-size: 16px;
+    padding: 8px;
+    border: 2px solid #BDC3C7;
+    border-radius: 6px;
+    background-color: white;
+    min-width: 200px;
+    margin: 10px;
+}
+QComboBox#difficultyCombo:hover {
+    border-color: #3498DB;
+}
+QComboBox#difficultyCombo::drop-down {
+    border: none;
+    padding-right: 20px;
+}
+QPushButton#startButton {
+    font-size: 20px;
+    font-weight: bold;
+    padding: 15px 30px;
+    background-color: #2ECC71;
+    color: white;
+    border: none;
+    border-radius: 8px;
+    min-width: 200px;
+    margin-top: 30px;
+}
+QPushButton#startButton:hover {
+    background-color: #27AE60;
+}
+QPushButton#startButton:pressed {
+    background-color: #229954;
+}
+
+#gameWidget, #gameWidget QWidget {
+    background-color: #F0F2F5;
+}
+QWidget#canvas {
+    background-color: white;
+    border: 2px solid #CCCCCC;
+    border-radius: 8px;
+}
+
+QDockWidget#dockInfo {
+    border: none;
+    background-color: white;
+}
+QDockWidget#dockInfo::title {
+    background-color: #2C3E50;
+    color: white;
+    padding: 8px;
+    text-align: center;
+}
+#playerInfo, #playerInfo QWidget {
+    background-color: white;
+    border-radius: 10px;
+    padding: 10px;
+}
+#playerInfo QLabel {
+    color: #2C3E50;
+    font-size: 16px;
+    padding: 5px;
+}
+QLabel#wordLabel {
+    font-size: 24px;
+    font-weight: bold;
+    color: #2C3E50;
+    background-color: white;
+    padding: 15px;
+    border-radius: 8px;
+    margin: 10px;
+}
+QLabel#turnHeading {
+    font-size: 26px;
+    font-weight: bold;
+    color: #385d8c;
+}
+QLabel#scoresHeading {
+    font-size: 20px;
+    font-weight: bold;
+    color: #385d8c;
+    margin-top: 20px;
+}
+QLabel#playerScore {
+    font-size: 18px;
+    font-weight: bold;
+    color: #2C3E50;
+}
+
+QLabel#turnTimer, QLabel#guessTimer {
+    font-weight: bold;
+    color: #2C3E50;
+    padding: 10px;
+    background-color: #ECF0F1;
+    border-radius: 8px;
+}
+QLabel#turnTimer {
+    font-size: 18px;
+    margin: 10px;
+}
+QLabel#guessTimer {
+    font-size: 20px;
+    margin-bottom: 10px;
+}
+QLabel#turnTimer[urgent="true"], QLabel#guessTimer[urgent="true"] {
+    color: white;
+    background-color: #E74C3C;
+}
+
+QLabel#wordTitle {
+    font-size: 24px;
+    font-weight: bold;
+    color: #2C3E50;
+    margin-bottom: 10px;
+}
+QLabel#wordDisplay {
+    font-size: 36px;
+    font-weight: bold;
+    color: #27AE60;
+    padding: 20px;
+    background-color: #F0F2F5;
+    border-radius: 10px;
+    margin: 20px;
+}
+QPushButton#startDrawingButton {
+    font-size: 24px;
+    font-weight: bold;
+    padding: 15px 30px;
+    background-color: #2ECC71;
+    color: white;
+    border: none;
+    border-radius: 8px;
+    margin: 20px;
+}
+QPushButton#startDrawingButton:hover, QPushButton#submitButton:hover {
+    background-color: #27AE60;
+}
+QLabel#guessLabel {
+    font-size: 18px;
+    color: #2C3E50;
+    margin-top: 10px;
+}
+QLineEdit#guessInput {
+    font-size: 18px;
+    padding: 10px;
+    border-radius: 8px;
+    border: 1px solid #BDC3C7;
+}
+QPushButton#submitButton {
+    font-size: 20px;
+    font-weight: bold;
+    padding: 10px 20px;
+    background-color: #2ECC71;
+    color: white;
+    border: none;
+    border-radius: 8px;
+    margin-top: 10px;
+}
+QLabel#guessFeedback {
+    font-size: 16px;
+    font-weight: bold;
+    color: white;
+    padding: 8px;
+    border-radius: 8px;
+    background-color: #34495E;
+}
+QLabel#guessFeedback[result="correct"] {
+    background-color: #27AE60;
+}
+QLabel#guessFeedback[result="close"] {
+    background-color: #E67E22;
+}
+QLabel#guessFeedback[result="wrong"] {
+    background-color: #E74C3C;
+}
+QListWidget#guessLog {
+    font-size: 14px;
+    color: #2C3E50;
+    border: 1px solid #BDC3C7;
+    border-radius: 8px;
+}
+QLabel#perfHud {
+    font-family: monospace;
+    font-size: 12px;
+    color: white;
+    padding: 6px;
+    background-color: rgba(44, 62, 80, 200);
+}
+"""
+
+
+def set_urgent(label, urgent):
+    # Timer labels turn red through the [urgent="true"] rule. Changing a
+    # dynamic property needs a re-polish, so only do it when the value changes.
+    if label.property("urgent") != urgent:
+        label.setProperty("urgent", urgent)
+        label.style().unpolish(label)
+        label.style().polish(label)
+
+
+_icons = {}
+
+
+def load_icon(name):
+    # Icons under icons/ are read from disk the first time they are asked for
+    icon = _icons.get(name)
+    if icon is None:
+        icon = _icons[name] = QIcon(f"./icons/{name}.png")
+    return icon
 
 
 class DrawingCanvas(QWidget):
+    stroke_started = pyqtSignal(object, float, object)  # rgba colour, width, first point
+    points_flushed = pyqtSignal(list)
+    stroke_finished = pyqtSignal()
+    filled = pyqtSignal(object, float, float, int)  # rgba colour, x, y, tolerance
+
+    # Extra pixels around a segment so antialiased edges are repainted as well
+    AA_MARGIN = 2
+    # Move events arriving within one frame are drawn as a single polyline
+    FRAME_MS = 16
+    # Input points closer than this to the previous one are dropped outright
+    MIN_POINT_DISTANCE = 1.0
+    # Points within this distance of the simplified polyline are dropped
+    SIMPLIFY_TOLERANCE = 0.75
+    # A stroke's uncommitted tail is committed anyway once it is this long, so
+    # other players never fall far behind on a long straight line
+    MAX_TAIL = 48
+    # Logical size the canvas starts at, and the smallest it can be squeezed to
+    DEFAULT_SIZE = QSize(1000, 700)
+    MINIMUM_SIZE = QSize(400, 300)
+    # The backing store grows in steps of this many logical pixels, so dragging
+    # a window edge doesn't reallocate it on every resize event
+    CHUNK = 256
+    # Fill bucket tolerances offered, as the largest per-channel difference
+    # from the clicked colour that still gets filled
+    FILL_TOLERANCES = (0, 16, 32, 64, 128)
+    # Spacing of the optional background grid, and the remote pen marker
+    GRID = 25
+    POINTER_RADIUS = 6
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.image = QPixmap(1000, 700)
-        self.image.fill(QColor("#FFFFFF"))
-        self.setMinimumSize(1000, 700)
+        # Vector record of the drawing in logical pixels; the ink layer,
+        # self.image, is a raster cache of it at the screen's device pixel
+        # ratio. The background and the overlay are separate layers, so
+        # neither a grid nor a pen marker ever touches the ink.
+        self.strokes = StrokeStore()
+        self.history = UndoHistory()
+        self.capacity = self.chunked(self.DEFAULT_SIZE)
+        self.layers = LayerStack(("background", "ink", "overlay"), self.capacity,
+                                 self.devicePixelRatioF())
+        # The ink layer is always composited; the overlay only while in use
+        self.layers["ink"].empty = False
+        self.grid = False
+        self.paint_background()
+        # Logical rect of the remote drawer's pen marker on the overlay
+        self.pointer = None
+        self.setMinimumSize(self.MINIMUM_SIZE)
+        self.resize(self.DEFAULT_SIZE)
+        # Pen is rebuilt only when the brush colour or size changes
+        self.pen = self.make_pen(QColor("#2C3E50"), 3)
+        self.drawing = False
+        # Guests in a networked game only watch the host's strokes
+        self.interactive = True
+        # With the fill bucket selected, a click fills instead of drawing
+        self.filling = False
+        self.fill_tolerance = 32
+        # (x, y, pressure) points received since the last flush, the last point
+        # already drawn and the last raw input point
+        self.pendingPoints = []
+        self.lastDrawnPoint = None
+        self.lastInputPoint = None
+        # Points after lastDrawnPoint that later input may still simplify
+        # away, drawn on the overlay until then, and the area they cover there
+        self.tailPoints = []
+        self.tailRect = None
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(self.FRAME_MS)
+        self.flushTimer.timeout.connect(self.flush_stroke)
+        # With metrics on: when the oldest point not yet drawn was queued, and
+        # when the oldest point drawn but not yet on screen was
+        self.inputSince = None
+        self.paintDue = None
+        # Pixels actually repainted vs. what full-frame repaints would have cost
+        self.repaintedPixels = 0
+        self.fullFramePixels = 0
         # Add a subtle border to the canvas
-        self.setStyleSheet("""
-            QWidget {
-                background-color: white;
-                border: 2px solid #CCCCCC;
-                border-radius: 8px;
-            }
-        """)
+        self.setObjectName("canvas")
+
+    def sizeHint(self):
+        return self.DEFAULT_SIZE
+
+    @classmethod
+    def chunked(cls, size):
+        # Round a logical size up to whole chunks
+        return QSize(-(-size.width() // cls.CHUNK) * cls.CHUNK,
+                     -(-size.height() // cls.CHUNK) * cls.CHUNK)
+
+    @property
+    def image(self):
+        # The ink layer. It is a transparent QImage rather than a QPixmap, so
+        # fills work on the ink alone, straight on its pixels.
+        return self.layers["ink"].image
+
+    @image.setter
+    def image(self, image):
+        ink = self.layers["ink"]
+        ink.image = image
+        ink.mark_dirty()
+
+    def resize_layers(self, ratio):
+        # The background and overlay are cheap to redraw, so they are rebuilt
+        # at the new capacity instead of copied
+        self.layers.resize(self.capacity, ratio)
+        for name in ("background", "overlay"):
+            self.layers[name].image = new_image(self.capacity, ratio)
+        self.layers["overlay"].empty = True
+        self.pointer = None
+        self.tailRect = None
+        self.paint_background()
+
+    def paint_background(self):
+        background = self.layers["background"]
+        background.image.fill(QColor("#FFFFFF"))
+        if self.grid:
+            painter = background.begin_paint()
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+            painter.setPen(QPen(QColor("#D6EAF8"), 0))
+            bounds = background.bounds()
+            for x in range(self.GRID, bounds.width(), self.GRID):
+                painter.drawLine(x, 0, x, bounds.height())
+            for y in range(self.GRID, bounds.height(), self.GRID):
+                painter.drawLine(0, y, bounds.width(), y)
+            painter.end()
+        background.empty = False
+        background.mark_dirty()
+
+    def set_grid(self, enabled):
+        self.grid = enabled
+        self.paint_background()
+        self.update()
+
+    def layer_changed(self, name, rect=None):
+        # Something was drawn on a layer: composite that area again and
+        # repaint it. rect is logical; None means the whole layer.
+        self.layers[name].mark_dirty(rect)
+        if rect is None:
+            self.update()
+        else:
+            self.update(rect)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.ensure_backing()
+
+    def event(self, event):
+        # Moving to a screen with another scale factor re-rasterises crisply
+        if event.type() == QEvent.Type.DevicePixelRatioChange:
+            self.ensure_backing()
+        return super().event(event)
+
+    def ensure_backing(self):
+        ratio = self.devicePixelRatioF()
+        if ratio != self.image.devicePixelRatio():
+            self.capacity = self.chunked(self.capacity.expandedTo(self.size()))
+            self.resize_layers(ratio)
+            self.rebuild()
+            return
+        if self.capacity.width() >= self.width() and self.capacity.height() >= self.height():
+            return  # Shrinking keeps the larger store and what's drawn on it
+        old = self.capacity
+        self.capacity = self.chunked(old.expandedTo(self.size()))
+        self.resize_layers(ratio)
+        if any(isinstance(stroke, Fill) for stroke in self.strokes):
+            # A fill may spread into the new area, and everything after it
+            # may cover the fill
+            self.rebuild()
+            return
+        image = new_image(self.capacity, ratio)
+        painter = QPainter(image)
+        painter.drawImage(0, 0, self.image)
+        # Only the newly added area has to be rasterised from the strokes
+        exposed = QRegion(0, 0, self.capacity.width(), self.capacity.height()).subtracted(
+            QRegion(0, 0, old.width(), old.height()))
+        painter.setClipRegion(exposed)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for stroke in self.strokes:
+            x0, y0, x1, y1 = stroke.bounds()
+            margin = stroke.width + self.AA_MARGIN
+            if x1 + margin > old.width() or y1 + margin > old.height():
+                self.draw_stroke(painter, stroke)
+        painter.end()
+        self.image = image
+        self.history.clear_checkpoints()
 
     def paintEvent(self, event):
+        # Composite what the layers changed, then only blit the part of the
+        # composite Qt asked for, pixel for pixel
+        if metrics.enabled:
+            start = time.perf_counter()
+        self.layers.flush()
+        rect = event.rect()
+        composite = self.layers.composite
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)  # Smooth drawing
-        painter.drawPixmap(0, 0, self.image)
+        painter.drawImage(QRectF(rect), composite, device_rect(rect, composite.devicePixelRatio()))
+        painter.end()
+        self.repaintedPixels += rect.width() * rect.height()
+        self.fullFramePixels += self.width() * self.height()
+        if metrics.enabled:
+            metrics.record_since(PAINT, start)
+            if self.paintDue is not None:
+                metrics.record_since(INPUT_LATENCY, self.paintDue)
+                self.paintDue = None
+
+    @classmethod
+    def polyline_rect(cls, polygon, width):
+        # Bounding box of a polyline grown by the pen width and antialias margin
+        margin = int(width) // 2 + 1 + cls.AA_MARGIN
+        return polygon.boundingRect().toAlignedRect().adjusted(-margin, -margin, margin, margin)
+
+    def repaint_ratio(self):
+        if self.fullFramePixels == 0:
+            return 0.0
+        return self.repaintedPixels / self.fullFramePixels
+
+    def reset_repaint_stats(self):
+        self.repaintedPixels = 0
+        self.fullFramePixels = 0
+
+    @staticmethod
+    def make_pen(color, width):
+        return QPen(color, width, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap,
+                    Qt.PenJoinStyle.RoundJoin)
+
+    def set_pen(self, color, width):
+        self.flush_stroke(True)
+        self.pen = self.make_pen(color, width)
+
+    @staticmethod
+    def pressure_width(width, pressure):
+        # Half pressure draws at the nominal brush size
+        return max(1.0, width * 2 * pressure)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.interactive:
+            if self.filling:
+                self.fill_at(event.position())
+            else:
+                self.begin_stroke(event.position())
+
+    def mouseMoveEvent(self, event):
+        if metrics.enabled:
+            metrics.mark(MOVES)
+        if self.drawing:
+            self.extend_stroke(event.position())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.drawing:
+            self.end_stroke()
+
+    def tabletEvent(self, event):
+        # Accepting the event stops Qt from synthesising mouse events as well
+        event.accept()
+        if not self.interactive:
+            return
+        pressure = event.pressure()
+        if event.type() == QEvent.Type.TabletPress and self.filling:
+            self.fill_at(event.position())
+        elif event.type() == QEvent.Type.TabletPress:
+            self.begin_stroke(event.position(), pressure)
+        elif event.type() == QEvent.Type.TabletMove and self.drawing:
+            self.extend_stroke(event.position(), pressure)
+        elif event.type() == QEvent.Type.TabletRelease and self.drawing:
+            self.extend_stroke(event.position(), pressure)
+            self.end_stroke()
+
+    def begin_stroke(self, pos, pressure=None):
+        if not QRectF(self.rect()).contains(QPointF(pos)):
+            return
+        self.drawing = True
+        point = (pos.x(), pos.y(), pressure)
+        self.strokes.begin_stroke(self.pen.color().rgba(), self.pen.width(), *point)
+        self.lastDrawnPoint = point
+        self.lastInputPoint = point
+        self.pendingPoints.clear()
+        self.stroke_started.emit(self.pen.color().rgba(), self.pen.widthF(), point)
+
+    def extend_stroke(self, pos, pressure=None):
+        if not QRectF(self.rect()).contains(QPointF(pos)):
+            return
+        x, y = pos.x(), pos.y()
+        last = self.lastInputPoint
+        dx, dy = x - last[0], y - last[1]
+        if dx * dx + dy * dy < self.MIN_POINT_DISTANCE * self.MIN_POINT_DISTANCE:
+            return
+        self.lastInputPoint = (x, y, pressure)
+        self.pendingPoints.append(self.lastInputPoint)
+        if metrics.enabled and self.inputSince is None:
+            self.inputSince = time.perf_counter()
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+
+    def flush_stroke(self, final=False):
+        # Simplify the uncommitted tail together with everything queued since
+        # the last frame. Points up to the last corner found are final: store
+        # and draw them with one painter session. Points after it are only
+        # drawn on the overlay, since later input can still make them
+        # redundant; `final` commits them too.
+        self.flushTimer.stop()
+        if not self.pendingPoints and not (final and self.tailPoints):
+            return
+        run = [self.lastDrawnPoint] + self.tailPoints + self.pendingPoints
+        self.pendingPoints.clear()
+        # Pressure maps to width as in pressure_width(); a change of dp moves
+        # each edge of the line by width * dp pixels
+        pressure_scale = self.pen.widthF() if run[0][2] is not None else 0.0
+        keep = simplify(run, self.SIMPLIFY_TOLERANCE, pressure_scale)
+        # With no corner yet every point lies within tolerance of the line to
+        # the newest one, so a tail that is too long can end there
+        cut = len(run) - 1 if final or len(run) > self.MAX_TAIL else keep[-2]
+        points = [run[i] for i in keep if i <= cut]
+        self.tailPoints = run[cut + 1:]
+        self.clear_tail()
+        if len(points) > 1:
+            for x, y, pressure in points[1:]:
+                self.strokes.add_point(x, y, pressure)
+            painter = self.begin_paint()
+            dirty = self.draw_points(painter, self.pen, points)
+            painter.end()
+            self.layer_changed("ink", dirty)
+            self.lastDrawnPoint = points[-1]
+            self.points_flushed.emit(points[1:])
+        if self.tailPoints:
+            painter = self.layers["overlay"].begin_paint()
+            self.tailRect = self.draw_points(painter, self.pen, [self.lastDrawnPoint] + self.tailPoints)
+            painter.end()
+            self.layer_changed("overlay", self.tailRect)
+        if self.paintDue is None:
+            self.paintDue = self.inputSince
+        self.inputSince = None
+
+    def clear_tail(self):
+        if self.tailRect is not None:
+            self.layers["overlay"].erase(self.tailRect)
+            self.layer_changed("overlay", self.tailRect)
+            self.tailRect = None
+
+    def end_stroke(self):
+        self.flush_stroke(True)
+        self.drawing = False
+        self.lastDrawnPoint = None
+        self.lastInputPoint = None
+        stroke = self.strokes.end_stroke()
+        if stroke is not None:
+            self.stroke_added()
+        self.stroke_finished.emit()
+        return stroke
+
+    def stroke_added(self):
+        count = len(self.strokes)
+        self.history.stroke_added(count)
+        if self.history.wants_checkpoint(count):
+            self.history.add_checkpoint(count, self.image.copy(), self.image_bytes())
+
+    def fill_at(self, pos):
+        if not QRectF(self.rect()).contains(QPointF(pos)):
+            return
+        color = self.pen.color().rgba()
+        self.apply_fill(color, pos.x(), pos.y(), self.fill_tolerance)
+        self.filled.emit(color, pos.x(), pos.y(), self.fill_tolerance)
+
+    def apply_fill(self, color, x, y, tolerance):
+        # Local clicks and fills from another player or a replay
+        fill = self.strokes.add_fill(color, x, y, tolerance)
+        painter = self.begin_paint()
+        dirty = self.draw_fill(painter, fill)
+        painter.end()
+        if dirty is not None:
+            # Device pixels back to logical ones, rounded outwards
+            ratio = self.image.devicePixelRatio()
+            self.layer_changed("ink", QRectF(dirty.x() / ratio, dirty.y() / ratio, dirty.width() / ratio,
+                                             dirty.height() / ratio).toAlignedRect())
+        self.stroke_added()
+
+    def apply_remote_begin(self, color, width, point):
+        # Strokes streamed from another player arrive already decimated
+        self.pen = self.make_pen(QColor.fromRgba(color), width)
+        self.drawing = True
+        self.strokes.begin_stroke(color, width, *point)
+        self.lastDrawnPoint = point
+        self.pendingPoints.clear()
+        self.show_pointer(point[0], point[1])
+
+    def apply_remote_points(self, points):
+        if self.drawing and points:
+            self.pendingPoints.extend(points)
+            self.flush_stroke(True)
+            self.show_pointer(points[-1][0], points[-1][1])
+
+    def apply_remote_end(self):
+        if self.drawing:
+            self.end_stroke()
+        self.hide_pointer()
+
+    def show_pointer(self, x, y):
+        # Marks where the other player's pen is, on the overlay
+        self.hide_pointer()
+        radius = self.POINTER_RADIUS
+        painter = self.layers["overlay"].begin_paint()
+        painter.setPen(QPen(QColor("#3498DB"), 2))
+        painter.drawEllipse(QPointF(x, y), radius, radius)
+        painter.end()
+        self.pointer = QRectF(x - radius, y - radius, 2 * radius, 2 * radius).toAlignedRect().adjusted(
+            -2, -2, 2, 2)
+        self.layer_changed("overlay", self.pointer)
+
+    def hide_pointer(self):
+        if self.pointer is not None:
+            self.layers["overlay"].erase(self.pointer)
+            self.layer_changed("overlay", self.pointer)
+            self.pointer = None
+
+    def image_bytes(self):
+        return self.image.sizeInBytes()
+
+    def settle_stroke(self):
+        # Undo, redo and clear work on whole strokes, so a stroke still being
+        # drawn is finished first
+        if self.drawing:
+            self.end_stroke()
+
+    def undo(self):
+        self.settle_stroke()
+        if not self.strokes.strokes:
+            return
+        self.history.push_redo(self.strokes.strokes.pop())
+        count = len(self.strokes)
+        start, snapshot = self.history.nearest(count)
+        if snapshot is None:
+            self.image.fill(Qt.GlobalColor.transparent)
+        else:
+            self.image = snapshot.copy()
+        # Replay only the strokes drawn since the restored checkpoint
+        painter = self.begin_paint()
+        for stroke in self.strokes.strokes[start:count]:
+            self.draw_stroke(painter, stroke)
+        painter.end()
+        self.layer_changed("ink")
+
+    def redo(self):
+        self.settle_stroke()
+        stroke = self.history.pop_redo()
+        if stroke is None:
+            return
+        self.strokes.strokes.append(stroke)
+        painter = self.begin_paint()
+        self.draw_stroke(painter, stroke)
+        painter.end()
+        self.layer_changed("ink")
+
+    def begin_paint(self):
+        painter = QPainter(self.image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        return painter
+
+    # Drawing only touches the painter, so these also work on a QImage
+    # outside the GUI thread
+    @classmethod
+    def draw_points(cls, painter, pen, points):
+        # Draw (x, y, pressure) points and return the dirty rect they cover.
+        # Mouse input is one polyline; tablet input varies width per segment.
+        polygon = QPolygonF([QPointF(x, y) for x, y, _ in points])
+        if points[0][2] is None:
+            painter.setPen(pen)
+            painter.drawPolyline(polygon)
+            return cls.polyline_rect(polygon, pen.width())
+        pen = QPen(pen)
+        width = pen.widthF()
+        for i in range(1, len(points)):
+            pen.setWidthF(cls.pressure_width(width, points[i][2]))
+            painter.setPen(pen)
+            painter.drawLine(polygon[i - 1], polygon[i])
+        return cls.polyline_rect(polygon, cls.pressure_width(width, 1.0))
+
+    @staticmethod
+    def draw_fill(painter, fill):
+        # A fill works on what has been painted so far, so the painter must be
+        # on a 32-bit QImage; the seed goes through the painter's transform,
+        # scale and device pixel ratio included. Returns the filled QRect in
+        # device pixels. fill loads numpy, which is slow to import, so the
+        # first fill imports it rather than startup.
+        from fill import flood_fill
+        image = painter.device()
+        if not isinstance(image, QImage):
+            return None
+        seed = painter.deviceTransform().map(QPointF(fill.x, fill.y))
+        return flood_fill(image, math.floor(seed.x()), math.floor(seed.y()), fill.color,
+                          fill.tolerance)
+
+    @classmethod
+    def draw_stroke(cls, painter, stroke):
+        if isinstance(stroke, Fill):
+            cls.draw_fill(painter, stroke)
+            return
+        pen = cls.make_pen(QColor.fromRgba(stroke.color), stroke.width)
+        if stroke.pressures is None:
+            points = [(x, y, None) for x, y in stroke.xy()]
+        else:
+            points = [(x, y, p) for (x, y), p in zip(stroke.xy(), stroke.pressures)]
+        cls.draw_points(painter, pen, points)
+
+    def render_strokes(self, scale=1.0, size=None, background=QColor("#FFFFFF")):
+        # Rasterise the stroke store onto a fresh image at any resolution;
+        # size is in logical pixels and defaults to the visible canvas. Ink is
+        # always drawn on transparent, as on the ink layer, so fills cover the
+        # same area; with no background that is what is returned.
+        size = size or self.size()
+        image = QImage(round(size.width() * scale), round(size.height() * scale),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(scale, scale)
+        for stroke in self.strokes:
+            self.draw_stroke(painter, stroke)
+        painter.end()
+        return image if background is None else flatten(image, background)
+
+    def rebuild(self):
+        ratio = self.devicePixelRatioF()
+        image = self.render_strokes(ratio, self.capacity, background=None)
+        image.setDevicePixelRatio(ratio)
+        self.image = image
+        self.history.clear_checkpoints()
+        self.update()
+
+    def snapshot(self):
+        # The visible drawing on white at full device resolution, for saving;
+        # the grid and overlay are not part of the drawing
+        return flatten(self.image, QColor("#FFFFFF"), self.size())
+
+    def clear(self):
+        self.settle_stroke()
+        self.strokes.clear()
+        self.history.clear()
+        self.image.fill(Qt.GlobalColor.transparent)
+        self.layer_changed("ink")
+
+
+class PerfHud(QLabel):
+    # Live timings drawn over the canvas. It only refreshes while shown, and
+    # the numbers come from perf.metrics, which must be enabled to fill up.
+    REFRESH_MS = 500
+    ROWS = ((INPUT_LATENCY, "input->pixel"), (PAINT, "paint"), (TURN, "turn"), (GUESS, "guess"))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("perfHud")
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        stats = metrics.summary()
+        lines = []
+        for name, label in self.ROWS:
+            values = stats.get(name)
+            if values and values["count"]:
+                lines.append(f"{label:<13}p50 {values['p50']:6.2f}  p99 {values['p99']:6.2f} ms")
+            else:
+                lines.append(f"{label:<13}-")
+        lines.append(f"{'moves/s':<13}{stats[MOVES]['per_second']:.0f}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(8, 8)
+
+
+class BigBoardCanvas(QWidget):
+    # Party-mode board with no edges: drag with the right or middle button to
+    # pan, wheel to zoom. Nothing is allocated for the board as a whole; ink is
+    # rasterised into tiles that are drawn only where they are visible.
+    FRAME_MS = DrawingCanvas.FRAME_MS
+    MIN_POINT_DISTANCE = DrawingCanvas.MIN_POINT_DISTANCE
+    SIMPLIFY_TOLERANCE = DrawingCanvas.SIMPLIFY_TOLERANCE
+    MAX_TAIL = DrawingCanvas.MAX_TAIL
+    # Fixed zoom steps, so tiles rendered at a zoom can be reused
+    ZOOM_LEVELS = (0.125, 0.25, 0.5, 1.0, 2.0, 4.0)
+    CACHE_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(DrawingCanvas.MINIMUM_SIZE)
+        self.resize(DrawingCanvas.DEFAULT_SIZE)
+        self.strokes = StrokeStore()
+        # Two screen pixels of antialiasing, at the furthest zoom out
+        self.index = TileIndex(margin=DrawingCanvas.AA_MARGIN / self.ZOOM_LEVELS[0])
+        self.cache = TileCache(self.CACHE_BYTES)
+        self.redo_stack = []
+        self.pen = DrawingCanvas.make_pen(QColor("#2C3E50"), 3)
+        self.zoom_index = self.ZOOM_LEVELS.index(1.0)
+        # Scroll position in device pixels at the current scale, kept whole
+        # so tiles land on exact pixels
+        self.origin = QPoint(0, 0)
+        self.drawing = False
+        self.panning = None
+        self.pendingPoints = []
+        self.lastDrawnPoint = None
+        self.lastInputPoint = None
+        # Uncommitted end of the stroke, as on DrawingCanvas; it is drawn over
+        # the tiles rather than into them
+        self.tailPoints = []
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(self.FRAME_MS)
+        self.flushTimer.timeout.connect(self.flush_stroke)
+        self.tilesPainted = 0
+        self.tilesRendered = 0
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setObjectName("canvas")
+
+    def sizeHint(self):
+        return DrawingCanvas.DEFAULT_SIZE
+
+    @property
+    def zoom(self):
+        return self.ZOOM_LEVELS[self.zoom_index]
+
+    def scale(self):
+        # Device pixels per world unit
+        return self.zoom * self.devicePixelRatioF()
+
+    def to_world(self, pos):
+        ratio = self.devicePixelRatioF()
+        scale = self.scale()
+        return ((pos.x() * ratio + self.origin.x()) / scale,
+                (pos.y() * ratio + self.origin.y()) / scale)
+
+    def to_screen_rect(self, x0, y0, x1, y1, margin=0):
+        # World box to the widget rect covering it
+        ratio = self.devicePixelRatioF()
+        scale = self.scale()
+        return QRectF((x0 * scale - self.origin.x()) / ratio, (y0 * scale - self.origin.y()) / ratio,
+                      (x1 - x0) * scale / ratio, (y1 - y0) * scale / ratio
+                      ).toAlignedRect().adjusted(-margin, -margin, margin, margin)
+
+    def set_pen(self, color, width):
+        self.flush_stroke(True)
+        self.pen = DrawingCanvas.make_pen(color, width)
+
+    def paintEvent(self, event):
+        rect = event.rect()
+        ratio = self.devicePixelRatioF()
+        scale = self.scale()
+        painter = QPainter(self)
+        painter.fillRect(rect, QColor("#FFFFFF"))
+        # Tiles under the repainted rect only; empty ones stay background
+        left = self.origin.x() + rect.left() * ratio
+        top = self.origin.y() + rect.top() * ratio
+        right = self.origin.x() + (rect.right() + 1) * ratio - 1
+        bottom = self.origin.y() + (rect.bottom() + 1) * ratio - 1
+        for ty in range(int(top // TILE), int(bottom // TILE) + 1):
+            for tx in range(int(left // TILE), int(right // TILE) + 1):
+                box = tile_rect(scale, tx, ty)
+                if not self.index.has_ink(*box):
+                    continue
+                key = (scale, tx, ty)
+                image = self.cache.get(key)
+                if image is None:
+                    image = render_tile(self.index.query(*box), scale, tx, ty, DrawingCanvas.draw_stroke)
+                    self.cache.put(key, image)
+                    self.tilesRendered += 1
+                painter.drawImage(QRectF((tx * TILE - self.origin.x()) / ratio,
+                                         (ty * TILE - self.origin.y()) / ratio,
+                                         TILE / ratio, TILE / ratio), image)
+                self.tilesPainted += 1
+        if self.tailPoints:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.translate(-self.origin.x() / ratio, -self.origin.y() / ratio)
+            painter.scale(scale / ratio, scale / ratio)
+            DrawingCanvas.draw_points(painter, self.pen, [self.lastDrawnPoint] + self.tailPoints)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.begin_stroke(event.position())
+        elif event.button() in (Qt.MouseButton.RightButton, Qt.MouseButton.MiddleButton):
+            self.panning = event.position()
+
+    def mouseMoveEvent(self, event):
+        if self.drawing:
+            self.extend_stroke(event.position())
+        elif self.panning is not None:
+            delta = event.position() - self.panning
+            self.panning = event.position()
+            self.pan(delta.x(), delta.y())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.drawing:
+            self.end_stroke()
+        elif event.button() in (Qt.MouseButton.RightButton, Qt.MouseButton.MiddleButton):
+            self.panning = None
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Undo):
+            self.undo()
+        elif event.matches(QKeySequence.StandardKey.Redo):
+            self.redo()
+        else:
+            super().keyPressEvent(event)
+
+    def wheelEvent(self, event):
+        step = 1 if event.angleDelta().y() > 0 else -1
+        self.zoom_to(self.zoom_index + step, event.position())
+
+    def pan(self, dx, dy):
+        # Drag by (dx, dy) logical pixels
+        ratio = self.devicePixelRatioF()
+        self.origin -= QPoint(round(dx * ratio), round(dy * ratio))
+        self.update()
+
+    def zoom_to(self, zoom_index, anchor):
+        # Change zoom keeping the world point under `anchor` where it is
+        zoom_index = max(0, min(len(self.ZOOM_LEVELS) - 1, zoom_index))
+        if zoom_index == self.zoom_index:
+            return
+        self.flush_stroke(True)
+        x, y = self.to_world(anchor)
+        self.zoom_index = zoom_index
+        ratio = self.devicePixelRatioF()
+        scale = self.scale()
+        self.origin = QPoint(round(x * scale - anchor.x() * ratio), round(y * scale - anchor.y() * ratio))
+        self.update()
+
+    def begin_stroke(self, pos):
+        self.drawing = True
+        point = self.to_world(pos) + (None,)
+        self.strokes.begin_stroke(self.pen.color().rgba(), self.pen.widthF(), *point)
+        self.lastDrawnPoint = point
+        self.lastInputPoint = point
+        self.pendingPoints.clear()
+
+    def extend_stroke(self, pos):
+        x, y = self.to_world(pos)
+        last = self.lastInputPoint
+        dx, dy = x - last[0], y - last[1]
+        # The minimum distance is in screen pixels, whatever the zoom
+        limit = self.MIN_POINT_DISTANCE / self.zoom
+        if dx * dx + dy * dy < limit * limit:
+            return
+        self.lastInputPoint = (x, y, None)
+        self.pendingPoints.append(self.lastInputPoint)
+        if not self.flushTimer.isActive():
+            self.flushTimer.start()
+
+    def flush_stroke(self, final=False):
+        # Add the points that are final, as on DrawingCanvas, to the stroke and
+        # the tile index, and draw them straight into any cached tiles they
+        # cross
+        self.flushTimer.stop()
+        if not self.pendingPoints and not (final and self.tailPoints):
+            return
+        run = [self.lastDrawnPoint] + self.tailPoints + self.pendingPoints
+        self.pendingPoints.clear()
+        keep = simplify(run, self.SIMPLIFY_TOLERANCE / self.zoom)
+        cut = len(run) - 1 if final or len(run) > self.MAX_TAIL else keep[-2]
+        points = [run[i] for i in keep if i <= cut]
+        self.tailPoints = run[cut + 1:]
+        # The old tail is redrawn by the same update, as tile ink or new tail
+        xs = [x for x, _, _ in run]
+        ys = [y for _, y, _ in run]
+        self.update(self.to_screen_rect(*self.index.padded(min(xs), min(ys), max(xs), max(ys),
+                                                           self.pen.widthF()), margin=1))
+        if len(points) < 2:
+            return
+        stroke = self.strokes.current
+        for x, y, pressure in points[1:]:
+            self.strokes.add_point(x, y, pressure)
+        xs = [x for x, _, _ in points]
+        ys = [y for _, y, _ in points]
+        box = (min(xs), min(ys), max(xs), max(ys))
+        self.index.add(stroke, *box)
+        padded = self.index.padded(*box, stroke.width)
+        for (scale, tx, ty), image in self.cache.overlapping(*padded):
+            painter = begin_tile_paint(image, scale, tx, ty)
+            DrawingCanvas.draw_points(painter, self.pen, points)
+            painter.end()
+        self.lastDrawnPoint = points[-1]
+
+    def end_stroke(self):
+        self.flush_stroke(True)
+        self.drawing = False
+        self.lastDrawnPoint = None
+        self.lastInputPoint = None
+        stroke = self.strokes.end_stroke()
+        if stroke is not None:
+            self.redo_stack.clear()
+        return stroke
+
+    def settle_stroke(self):
+        # Ends the stroke being drawn, as DrawingCanvas does before undo
+        if self.drawing:
+            self.end_stroke()
+
+    def undo(self):
+        self.settle_stroke()
+        if not self.strokes.strokes:
+            return
+        stroke = self.strokes.strokes.pop()
+        self.redo_stack.append(stroke)
+        self.index.remove(stroke)
+        # Tiles it crossed are redrawn from the remaining strokes when next seen
+        box = self.index.padded(*stroke.bounds(), stroke.width)
+        self.cache.invalidate(*box)
+        self.update(self.to_screen_rect(*box, margin=1))
+
+    def redo(self):
+        self.settle_stroke()
+        if not self.redo_stack:
+            return
+        stroke = self.redo_stack.pop()
+        self.strokes.strokes.append(stroke)
+        box = stroke.bounds()
+        self.index.add(stroke, *box)
+        padded = self.index.padded(*box, stroke.width)
+        self.cache.invalidate(*padded)
+        self.update(self.to_screen_rect(*padded, margin=1))
 
     def clear(self):
-        self.image.fill(QColor("#FFFFFF"))
+        self.settle_stroke()
+        self.strokes.clear()
+        self.index.clear()
+        self.cache.clear()
+        self.redo_stack.clear()
         self.update()
 
 
+class NetworkLink(QObject):
+    # Runs a network.GameClient (and, for the host, the relay server) on an
+    # asyncio loop in a background thread. Received payloads are delivered to
+    # the GUI thread through a queued signal. asyncio is only imported once a
+    # networked game is set up, which keeps it out of a local game's startup.
+    message_received = pyqtSignal(bytes)
+    disconnected = pyqtSignal(str)  # why, for the status bar
+
+    def __init__(self, host, port, serve=False):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.serve = serve
+        self.client = network.GameClient()
+        self.outbox = []
+        self.connected = False
+        import asyncio
+        import threading
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        import asyncio
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._main())
+
+    async def _main(self):
+        server = None
+        reason = "Disconnected from the game"
+        try:
+            if self.serve:
+                server = network.RelayServer('0.0.0.0', self.port)
+                await server.start()
+            await self.client.connect(self.host, self.port)
+            self.connected = True
+            for payload in self.outbox:
+                self.client.send(payload)
+            self.outbox.clear()
+            async for payload in self.client.messages():
+                self.message_received.emit(payload)
+        except (OSError, network.ProtocolError) as error:
+            reason = f"Network error: {error}"
+        finally:
+            self.connected = False
+            if server is not None:
+                await server.close()
+            self.disconnected.emit(reason)
+
+    def _send(self, payload):
+        if self.connected:
+            self.client.send(payload)
+        else:
+            self.outbox.append(payload)
+
+    def send(self, payload):
+        self.loop.call_soon_threadsafe(self._send, payload)
+
+
+class QtDeadlineScheduler(DeadlineScheduler):
+    # DeadlineScheduler driven by one precise single-shot QTimer, shared by
+    # every countdown in the application
+    def __init__(self, clock):
+        self.wakeup = QTimer()
+        self.wakeup.setSingleShot(True)
+        self.wakeup.setTimerType(Qt.TimerType.PreciseTimer)
+        super().__init__(clock, self.arm_wakeup)
+        self.wakeup.timeout.connect(self.run_due)
+
+    def arm_wakeup(self, when):
+        if when is None:
+            self.wakeup.stop()
+        else:
+            self.wakeup.start(max(0, math.ceil((when - self.clock()) * 1000)))
+
+
 class StartScreen(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.layout = QVBoxLayout()
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #F0F2F5;
-            }
-            QLabel {
-                color: #1A1A1A;
-            }
-        """)
+        self.setObjectName("startScreen")
 
         # Create a container for centered content
         container = QWidget()
         container_layout = QVBoxLayout()
-        container.setStyleSheet("""
-            QWidget {
-                background-color: white;
-                border-radius: 15px;
-                padding: 20px;
-            }
-        """)
+        container.setObjectName("startContainer")
 
         # Title with enhanced styling
         title = QLabel("Pictionary")
-        title.setStyleSheet("""
-            font-size: 48px;
-            font-weight: bold;
-            color: #2C3E50;
-            margin: 20px;
-            font-family: 'Arial';
-        """)
+        title.setObjectName("startTitle")
         title.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Subtitle
         subtitle = QLabel("Draw and Guess!")
-        subtitle.setStyleSheet("""
-            font-size: 24px;
-            color: #7F8C8D;
-            margin-bottom: 30px;
-        """)
+        subtitle.setObjectName("startSubtitle")
         subtitle.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Difficulty Selection with styled combo box
         difficulty_label = QLabel("Select Difficulty:")
-        difficulty_label.setStyleSheet("""
-            font-size: 18px;
-            font-weight: bold;
-            color: #2C3E50;
-            margin-top: 20px;
-        """)
+        difficulty_label.setObjectName("difficultyLabel")
 
         self.difficulty_combo = QComboBox()
         self.difficulty_combo.addItems(["Easy", "Hard"])
-        self.difficulty_combo.setStyleSheet("""
-            QComboBox {
-                font-size: 16px;
-                padding: 8px;
-                border: 2px solid #BDC3C7;
-                border-radius: 6px;
-                background-color: white;
-                min-width: 200px;
-                margin: 10px;
-            }
-            QComboBox:hover {
-                border-color: #3498DB;
-            }
-            QComboBox::drop-down {
-                border: none;
-                padding-right: 20px;
-            }
-        """)
+        self.difficulty_combo.setObjectName("difficultyCombo")
 
         # Start Button with enhanced styling
         self.start_button = QPushButton("Start Game")
-        self.start_button.setStyleSheet("""
-            QPushButton {
-                font-size: 20px;
-                font-weight: bold;
-                padding: 15px 30px;
-                background-color: #2ECC71;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                min-width: 200px;
-                margin-top: 30px;
-            }
-            QPushButton:hover {
-                background-color: #27AE60;
-                transform: translateY(-2px);
-            }
-            QPushButton:pressed {
-                background-color: #229954;
-            }
-        """)
+        self.start_button.setObjectName("startButton")
 
         # Add widgets to container layout
         container_layout.addWidget(title)
@@ -149,204 +1269,128 @@ class StartScreen(QWidget):
 
 
 class PictionaryGame(QMainWindow):
-    def __init__(self):
+    def __init__(self, link=None, guest=False, record_path=None, perf_log=None, perf_hud=False,
+                 bot=False):
         super().__init__()
+        # Networked play: the host runs the game and draws, guests watch and guess
+        self.link = link
+        self.guest = guest
+        # Everything sent or received is also appended to the game recording
+        self.recorder = GameRecorder(record_path) if record_path else None
+        # Styles are parsed once per application, not per widget or per turn
+        app = QApplication.instance()
+        if app.styleSheet() != STYLESHEET:
+            app.setStyleSheet(STYLESHEET)
         self.setGeometry(100, 100, 1200, 800)
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #F0F2F5;
-            }
-        """)
 
         # Create stacked widget
         self.stacked_widget = QStackedWidget()
         self.setCentralWidget(self.stacked_widget)
 
-        # Create and add screens
+        # Only the start screen is built before the first frame; the game
+        # screen, canvas, dock and menus wait for build_game_screen()
         self.start_screen = StartScreen()
         self.start_screen.start_button.clicked.connect(self.start_game)
+        self.stacked_widget.addWidget(self.start_screen)
+        self.game_widget = None
+        self.canvas = None
+
+        # Turns, scores, words and timing live in the headless engine
+        self.engine = GameEngine()
+        # One deadline scheduler drives every countdown display
+        self.scheduler = QtDeadlineScheduler(self.engine.clock)
+        self.countdown = None
+        # Built on the first turn and reset for every turn after that
+        self.guessing_window = None
+        self.brushSize = 3
+        self.brushColor = QColor("#2C3E50")
+        # Drawings are encoded on worker threads; the gallery is set while
+        # auto-save is on
+        self.exporter = Exporter(self)
+        self.exporter.finished.connect(lambda path: self.statusBar().showMessage(f"Saved {path}"))
+        self.exporter.failed.connect(
+            lambda path, error: self.statusBar().showMessage(f"Could not save {path}: {error}"))
+        self.gallery = None
+        self.replay_window = None
+        # Party-mode board, opened from the Tools menu
+        self.big_board = None
+        # Timings are collected while the HUD is up, or all session long when
+        # they are to be written to perf_log on exit
+        self.perf_log = perf_log
+        self.show_perf_hud = perf_hud
+        # The bot guesser, while Tools > Bot Guesser is on
+        self.start_bot = bot
+        self.bot = None
+        metrics.enabled = perf_log is not None
+
+        # Set window properties; the icon is read once the first frame is up
+        self.setWindowTitle("Pictionary Game")
+        QTimer.singleShot(0, lambda: self.setWindowIcon(load_icon("paint-brush")))
 
+        if self.link is not None:
+            # Guests go straight to the game screen, and the host's guests may
+            # send guesses before the host has started
+            self.build_game_screen()
+            self.setup_network()
+
+    def build_game_screen(self):
+        if self.game_widget is not None:
+            return
         self.game_widget = QWidget()
         self.game_layout = QVBoxLayout(self.game_widget)
-        self.game_widget.setStyleSheet("""
-            QWidget {
-                background-color: #F0F2F5;
-            }
-        """)
+        self.game_widget.setObjectName("gameWidget")
 
         # Create drawing canvas
         self.canvas = DrawingCanvas()
+        self.canvas.stroke_finished.connect(self.show_repaint_stats)
+        self.canvas.set_pen(self.brushColor, self.brushSize)
         self.game_layout.addWidget(self.canvas)
-
-        # Add screens to stacked widget
-        self.stacked_widget.addWidget(self.start_screen)
         self.stacked_widget.addWidget(self.game_widget)
-
-        self.wordList = []
-        self.currentWord = ""
-        self.drawing = False
-        self.brushSize = 3
-        self.brushColor = QColor("#2C3E50")
-        self.lastPoint = QPoint()
-        self.player1_score = 0
-        self.player2_score = 0
-        self.current_player = 1  # Start with player 1
-
-        # Define score labels in the __init__ method to maintain references
-        self.player1_label = QLabel(f"Player 1: {self.player1_score}")
-        self.player2_label = QLabel(f"Player 2: {self.player2_score}")
-        self.player1_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2C3E50;")
-        self.player2_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2C3E50;")
+        self.perf_hud = PerfHud(self.canvas)
 
         # Modern styled word display label
         self.word_label = QLabel()
-        self.word_label.setStyleSheet("""
-            QLabel {
-                font-size: 24px;
-                font-weight: bold;
-                color: #2C3E50;
-                background-color: white;
-                padding: 15px;
-                border-radius: 8px;
-                margin: 10px;
-            }
-        """)
-
-        # Create menu bar and dock widget
-        self.create_menus()
-        self.create_dock_widget()
+        self.word_label.setObjectName("wordLabel")
 
         self.timer_label = QLabel("Waiting for turn...")
-        self.timer_label.setStyleSheet("""
-                    QLabel {
-                        font-size: 18px;
-                        font-weight: bold;
-                        color: #2C3E50;
-                        padding: 10px;
-                        background-color: #ECF0F1;
-                        border-radius: 8px;
-                        margin: 10px;
-                    }
-                """)
+        self.timer_label.setObjectName("turnTimer")
         self.timer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        # Set window properties
-        self.setWindowTitle("Pictionary Game")
-        self.setWindowIcon(QIcon("./icons/paint-brush.png"))
-
-    def create_dock_widget(self):
-        self.dockInfo = QDockWidget()
-        self.dockInfo.setStyleSheet("""
-            QDockWidget {
-                border: none;
-                background-color: white;
-            }
-            QDockWidget::title {
-                background-color: #2C3E50;
-                color: white;
-                padding: 8px;
-                text-align: center;
-            }
-        """)
-        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.dockInfo)
-
-        playerInfo = QWidget()
-        self.vbdock = QVBoxLayout()
-        playerInfo.setLayout(self.vbdock)
-        playerInfo.setMinimumWidth(250)
-        playerInfo.setStyleSheet("""
-            QWidget {
-                background-color: white;
-                border-radius: 10px;
-                padding: 10px;
-            }
-            QLabel {
-                color: #2C3E50;
-                font-size: 16px;
-                padding: 5px;
-            }
-        """)
-
-        # Enhanced player info layout
-        turn_label = QLabel("Current Turn")
-        turn_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #2C3E50;")
-
-        scores_label = QLabel("Scores")
-        scores_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #2C3E50;")
-
-        self.vbdock.addWidget(turn_label)
-        self.vbdock.addWidget(self.player1_label)
-        self.vbdock.addWidget(self.player2_label)
-        self.vbdock.addWidget(self.timer_label)
-
-        self.dockInfo.setWidget(playerInfo)
+        # Create menu bar and dock widget
+        self.create_menus()
+        self.create_dock_widget()
+        self.perfHudAct.setChecked(self.show_perf_hud)
+        self.botAct.setChecked(self.start_bot)
 
-    def create_menus(self):
-        menu_bar = self.menuBar()
-        file_menu = menu_bar.addMenu("File")
-        quit_action = QAction("Quit", self)
-        quit_action.triggered.connect(self.close)
-        file_menu.addAction(quit_action)
+        if not self.guest and (self.link is not None or self.recorder is not None):
+            self.stream_strokes()
 
     def handle_correct_guess(self):
-        self.game_timer.stop()
+        if metrics.enabled:
+            start = time.perf_counter()
+        self.stop_countdown()
         self.timer_label.setText("Turn completed!")
+        self.send_network(network.encode_text(network.GUESS_CORRECT, self.engine.current_word))
+        self.save_turn_drawing(self.engine.current_word)
 
-        # Update the score based on the current player
-        if self.current_player == 1:
-            self.player1_score += 1
-            self.player1_label.setText(f"Player 1: {self.player1_score}")
-        else:
-            self.player2_score += 1
-            self.player2_label.setText(f"Player 2: {self.player2_score}")
-
-        # Print the current scores for debugging
-        print(f"Player 1 score: {self.player1_score}, Player 2 score: {self.player2_score}")
-
-        # Switch turns between players
-        self.current_player = 2 if self.current_player == 1 else 1
+        # Score the current player, switch turns and pick the next word
+        self.engine.correct_guess()
+        self.update_score_labels()
 
-        # Update word for drawing, display in the word label, and clear the canvas
-        self.currentWord = self.getWord()
-        self.word_label.setText(f"Draw this word: \n {self.currentWord}")
+        # Display the new word in the word label and clear the canvas
+        self.word_label.setText(f"Draw this word: \n {self.engine.current_word}")
         self.canvas.clear()
 
-        # Close the guessing window and open it again for the new turn
-        self.guessing_window.close()
+        # Reset the guessing window for the new turn
         self.show_guessing_window()
 
         self.canvas.clear()
+        if metrics.enabled:
+            metrics.record_since(TURN, start)
 
 
     def create_menus(self):
         mainMenu = self.menuBar()
-        mainMenu.setStyleSheet("""
-            QMenuBar {
-                background-color: #2C3E50;
-                color: white;
-                padding: 5px;
-            }
-            QMenuBar::item {
-                padding: 5px 10px;
-                margin: 0px;
-            }
-            QMenuBar::item:selected {
-                background-color: #34495E;
-            }
-            QMenu {
-                background-color: white;
-                border: 1px solid #BDC3C7;
-                padding: 5px;
-            }
-            QMenu::item {
-                padding: 5px 30px 5px 20px;
-                color: #2C3E50;
-            }
-            QMenu::item:selected {
-                background-color: #3498DB;
-                color: white;
-            }
-        """)
 
         # File Menu
         fileMenu = mainMenu.addMenu("File")
@@ -358,12 +1402,85 @@ class PictionaryGame(QMainWindow):
         clearAct.setShortcut('Ctrl+C')
         clearAct.triggered.connect(self.clear)
 
+        undoAct = QAction('Undo Stroke', self)
+        undoAct.setShortcut('Ctrl+Z')
+        undoAct.triggered.connect(self.undo)
+
+        redoAct = QAction('Redo Stroke', self)
+        redoAct.setShortcut('Ctrl+Y')
+        redoAct.triggered.connect(self.redo)
+
+        autoSaveAct = QAction('Auto-save Every Turn', self)
+        autoSaveAct.setCheckable(True)
+        autoSaveAct.toggled.connect(self.setAutoSave)
+
+        replayAct = QAction('Open Replay...', self)
+        replayAct.triggered.connect(self.openReplay)
+
         fileMenu.addAction(saveAct)
+        fileMenu.addAction(autoSaveAct)
+        fileMenu.addAction(replayAct)
         fileMenu.addAction(clearAct)
+        fileMenu.addAction(undoAct)
+        fileMenu.addAction(redoAct)
+        # Only the host draws in a networked game
+        for act in (clearAct, undoAct, redoAct):
+            act.setEnabled(not self.guest)
+
+        # Export quality: JPEG/WebP quality and PNG compression level
+        qualityMenu = fileMenu.addMenu("Export Quality")
+        for preset in QUALITY_PRESETS:
+            qualityAct = QAction(preset, self)
+            qualityAct.setCheckable(True)
+            qualityAct.setChecked(preset == self.exporter.preset)
+            qualityAct.triggered.connect(lambda checked, p=preset: self.setExportPreset(p))
+            qualityMenu.addAction(qualityAct)
+        self.qualityActions = qualityMenu.actions()
 
         # Tool Menu with enhanced colors
         toolMenu = mainMenu.addMenu("Tools")
 
+        bigBoardAct = QAction('Big Board', self)
+        bigBoardAct.triggered.connect(self.openBigBoard)
+        toolMenu.addAction(bigBoardAct)
+
+        self.perfHudAct = QAction('Performance HUD', self)
+        self.perfHudAct.setShortcut('F3')
+        self.perfHudAct.setCheckable(True)
+        self.perfHudAct.toggled.connect(self.setPerfHud)
+        toolMenu.addAction(self.perfHudAct)
+
+        self.botAct = QAction('Bot Guesser', self)
+        self.botAct.setCheckable(True)
+        self.botAct.toggled.connect(self.setBotGuesser)
+        toolMenu.addAction(self.botAct)
+
+        perfDumpAct = QAction('Save Performance Data...', self)
+        perfDumpAct.triggered.connect(self.savePerfData)
+        toolMenu.addAction(perfDumpAct)
+
+        # Drawn on the canvas's background layer, under the ink
+        gridAct = QAction('Background Grid', self)
+        gridAct.setCheckable(True)
+        gridAct.toggled.connect(self.canvas.set_grid)
+        toolMenu.addAction(gridAct)
+
+        # Fill bucket, with how close a colour must be to the clicked one
+        fillAct = QAction('Fill Bucket', self)
+        fillAct.setShortcut('Ctrl+B')
+        fillAct.setCheckable(True)
+        fillAct.toggled.connect(self.setFillMode)
+        toolMenu.addAction(fillAct)
+
+        toleranceMenu = toolMenu.addMenu("Fill Tolerance")
+        for tolerance in DrawingCanvas.FILL_TOLERANCES:
+            toleranceAct = QAction(f'Tolerance {tolerance}', self)
+            toleranceAct.setCheckable(True)
+            toleranceAct.setChecked(tolerance == self.canvas.fill_tolerance)
+            toleranceAct.triggered.connect(lambda checked, t=tolerance: self.setFillTolerance(t))
+            toleranceMenu.addAction(toleranceAct)
+        self.toleranceActions = toleranceMenu.actions()
+
         # Brush Size Menu
         brushMenu = toolMenu.addMenu("Brush Size")
         sizes = [2, 3, 4, 5, 6, 7, 8, 9, 10]
@@ -390,48 +1507,26 @@ class PictionaryGame(QMainWindow):
 
     def create_dock_widget(self):
         self.dockInfo = QDockWidget()
-        self.dockInfo.setStyleSheet("""
-            QDockWidget {
-                border: none;
-                background-color: white;
-            }
-            QDockWidget::title {
-                background-color: #2C3E50;
-                color: white;
-                padding: 8px;
-                text-align: center;
-            }
-        """)
+        self.dockInfo.setObjectName("dockInfo")
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.dockInfo)
 
         playerInfo = QWidget()
         self.vbdock = QVBoxLayout()
         playerInfo.setLayout(self.vbdock)
         playerInfo.setMinimumWidth(250)
-        playerInfo.setStyleSheet("""
-            QWidget {
-                background-color: white;
-                border-radius: 10px;
-                padding: 10px;
-            }
-            QLabel {
-                color: #2C3E50;
-                font-size: 16px;
-                padding: 5px;
-            }
-        """)
+        playerInfo.setObjectName("playerInfo")
 
         # Enhanced player info layout
         turn_label = QLabel("Current Turn")
-        turn_label.setStyleSheet("font-size: 26px; font-weight: bold; color: #385d8c; margin-top 20px;")
+        turn_label.setObjectName("turnHeading")
 
         scores_label = QLabel("Scores")
-        scores_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #385d8c; margin-top: 20px;")
+        scores_label.setObjectName("scoresHeading")
 
-        self.player1_label = QLabel(f"Player 1: {self.player1_score}")
-        self.player2_label = QLabel(f"Player 2: {self.player2_score}")
-        self.player1_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2C3E50;")
-        self.player2_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #2C3E50;")
+        self.player1_label = QLabel(f"Player 1: {self.engine.score(1)}")
+        self.player2_label = QLabel(f"Player 2: {self.engine.score(2)}")
+        self.player1_label.setObjectName("playerScore")
+        self.player2_label.setObjectName("playerScore")
 
         self.vbdock.addWidget(self.word_label)
         self.vbdock.addWidget(turn_label)
@@ -443,138 +1538,347 @@ class PictionaryGame(QMainWindow):
 
         self.dockInfo.setWidget(playerInfo)
 
-    def mousePressEvent(self, event):
-        if self.stacked_widget.currentIndex() == 1:
-            if event.button() == Qt.MouseButton.LeftButton:
-                canvas_pos = self.canvas.mapFrom(self, event.pos())
-                if self.canvas.rect().contains(canvas_pos):
-                    self.drawing = True
-                    self.lastPoint = canvas_pos
-
-    def mouseMoveEvent(self, event):
-        if self.stacked_widget.currentIndex() == 1 and self.drawing:
-            canvas_pos = self.canvas.mapFrom(self, event.pos())
-            if self.canvas.rect().contains(canvas_pos):
-                painter = QPainter(self.canvas.image)
-                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-                pen = QPen(self.brushColor, self.brushSize,
-                           Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap,
-                           Qt.PenJoinStyle.RoundJoin)
-                painter.setPen(pen)
-                painter.drawLine(self.lastPoint, canvas_pos)
-                self.lastPoint = canvas_pos
-                self.canvas.update()
-
-    def mouseReleaseEvent(self, event):
-        if self.stacked_widget.currentIndex() == 1:
-            if event.button() == Qt.MouseButton.LeftButton:
-                self.drawing = False
+    def show_repaint_stats(self):
+        canvas = self.canvas
+        self.statusBar().showMessage(
+            f"Repainted {canvas.repaintedPixels:,} px of {canvas.fullFramePixels:,} px "
+            f"full-frame ({canvas.repaint_ratio():.1%})")
 
     def setBrushColor(self, color):
         self.brushColor = color
+        self.canvas.set_pen(self.brushColor, self.brushSize)
+        if self.big_board is not None:
+            self.big_board.set_pen(self.brushColor, self.brushSize)
 
     def setBrushSize(self, size):
         self.brushSize = size
+        self.canvas.set_pen(self.brushColor, self.brushSize)
+        if self.big_board is not None:
+            self.big_board.set_pen(self.brushColor, self.brushSize)
+
+    def setFillMode(self, enabled):
+        self.canvas.filling = enabled
+        if enabled:
+            self.canvas.setCursor(Qt.CursorShape.PointingHandCursor)
+        else:
+            self.canvas.unsetCursor()
+
+    def setFillTolerance(self, tolerance):
+        self.canvas.fill_tolerance = tolerance
+        for action in self.toleranceActions:
+            action.setChecked(action.text() == f'Tolerance {tolerance}')
+
+    def setPerfHud(self, enabled):
+        metrics.enabled = enabled or self.perf_log is not None
+        self.perf_hud.setVisible(enabled)
+
+    def setBotGuesser(self, enabled):
+        if enabled and self.bot is None:
+            self.bot = BotGuesser(self)
+            self.bot.start()
+        elif not enabled and self.bot is not None:
+            self.bot.stop()
+            self.bot.deleteLater()
+            self.bot = None
+
+    def savePerfData(self):
+        filePath, _ = QFileDialog.getSaveFileName(self, "Save Performance Data", "perf.json",
+                                                  "JSON(*.json);;CSV(*.csv)")
+        if filePath:
+            metrics.dump(filePath)
+            self.statusBar().showMessage(f"Saved {filePath}")
+
+    def openBigBoard(self):
+        if self.big_board is None:
+            self.big_board = BigBoardCanvas()
+            self.big_board.setWindowTitle("Pictionary Big Board")
+            self.big_board.set_pen(self.brushColor, self.brushSize)
+        self.big_board.show()
 
     def save(self):
-        filePath, _ = QFileDialog.getSaveFileName(
+        filters = "PNG(*.png);;JPEG(*.jpg *.jpeg);;"
+        if "webp" in supported_formats():
+            filters += "WebP(*.webp);;"
+        filePath, selectedFilter = QFileDialog.getSaveFileName(
             self, "Save Drawing", "",
-            "PNG(*.png);;JPEG(*.jpg *.jpeg);;All Files(*.*) "
+            filters + "PNG Thumbnail(*.png);;All Files(*.*) "
         )
         if filePath:
-            self.canvas.image.save(filePath)
+            # Only the snapshot happens here; encoding runs on a worker thread
+            thumbnail = THUMBNAIL_SIZE if selectedFilter.startswith("PNG Thumbnail") else None
+            self.exporter.export(self.canvas.snapshot(), filePath, thumbnail)
+
+    def openReplay(self):
+        filePath, _ = QFileDialog.getOpenFileName(self, "Open Replay", "recordings",
+                                                  "Game Recordings(*.prec);;All Files(*.*)")
+        if not filePath:
+            return
+        try:
+            log = GameLog(filePath)
+        except (OSError, ValueError) as error:
+            self.statusBar().showMessage(f"Could not open {filePath}: {error}")
+            return
+        # Kept on the game window so it isn't garbage collected
+        self.replay_window = ReplayWindow(log, self.exporter)
+        self.replay_window.show()
+
+    def setExportPreset(self, preset):
+        self.exporter.preset = preset
+        for action in self.qualityActions:
+            action.setChecked(action.text() == preset)
+
+    def setAutoSave(self, enabled):
+        self.gallery = TurnGallery(self.exporter) if enabled else None
+
+    def save_turn_drawing(self, word):
+        if self.bot is not None:
+            self.bot.learn(word)
+        if self.gallery is not None and len(self.canvas.strokes):
+            self.gallery.save_turn(self.canvas.snapshot(), word)
 
     def clear(self):
+        if self.guest:
+            return
         self.canvas.clear()
+        self.send_network(network.encode_simple(network.CLEAR))
+
+    def undo(self):
+        if self.guest:
+            return
+        self.canvas.undo()
+        self.send_network(network.encode_simple(network.UNDO))
+
+    def redo(self):
+        if self.guest:
+            return
+        self.canvas.redo()
+        self.send_network(network.encode_simple(network.REDO))
+
+    def setup_network(self):
+        self.decoder = network.MessageDecoder()
+        self.link.message_received.connect(self.handle_network_message)
+        self.link.disconnected.connect(self.statusBar().showMessage)
+        if self.guest:
+            # Guests skip the start screen and follow the host's turns
+            self.canvas.interactive = False
+            self.word_label.setText("Guess the drawing!")
+            self.stacked_widget.setCurrentIndex(1)
+
+    def stream_strokes(self):
+        # The drawer's strokes become protocol payloads for guests and the recording
+        self.encoder = network.StrokeEncoder()
+        self.canvas.stroke_started.connect(
+            lambda color, width, point: self.send_network(self.encoder.begin(color, width, point)))
+        self.canvas.points_flushed.connect(
+            lambda points: self.send_network(self.encoder.points(points)))
+        self.canvas.stroke_finished.connect(lambda: self.send_network(self.encoder.end()))
+        self.canvas.filled.connect(
+            lambda color, x, y, tolerance: self.send_network(network.encode_fill(color, x, y, tolerance)))
+
+    def record(self, payload):
+        if self.recorder is None:
+            return
+        self.recorder.record(payload)
+        # A finished turn goes to disk straight away, so a crash costs at most
+        # the turn being played
+        if payload[0] in (network.GUESS_CORRECT, network.TIME_EXPIRED):
+            self.recorder.flush()
+
+    def record_guess(self, guess, result):
+        # Local guesses never go over the network, but the recording keeps them
+        self.record(network.encode_text(network.GUESS, guess))
+        if result == CLOSE:
+            self.record(network.encode_text(network.GUESS_CLOSE, guess))
+        elif result == WRONG:
+            self.record(network.encode_text(network.GUESS_WRONG, guess))
+
+    def send_network(self, payload):
+        self.record(payload)
+        if self.link is not None:
+            self.link.send(payload)
+
+    def handle_network_message(self, payload):
+        # Whatever a peer sends, a bad message is dropped rather than let
+        # through to the recording or out of this slot. The host draws, so
+        # guests follow its drawing and the host only takes guesses from
+        # them, as rooms.py does.
+        try:
+            if self.guest:
+                kind, value = apply_to_canvas(self.canvas, self.decoder, payload)
+            else:
+                kind, value = self.decoder.decode(payload)
+        except network.ProtocolError as error:
+            self.statusBar().showMessage(f"Ignored a bad network message: {error}")
+            return
+        if self.guest:
+            self.record(payload)
+            self.handle_host_event(kind, value)
+        elif kind == network.GUESS:
+            self.record(payload)
+            self.handle_remote_guess(value)
+
+    def handle_remote_guess(self, guess):
+        window = self.guessing_window
+        if window is None or window.is_drawer_view:
+            return
+        result = window.remote_guess(guess)
+        if result == CLOSE:
+            self.send_network(network.encode_text(network.GUESS_CLOSE, guess))
+        elif result == WRONG:
+            self.send_network(network.encode_text(network.GUESS_WRONG, guess))
+
+    def handle_host_event(self, kind, value):
+        window = self.guessing_window
+        if kind == network.TURN:
+            drawer, scores, seconds = value
+            self.engine.current_player = drawer
+            self.engine.scores[:] = scores
+            self.update_score_labels()
+            self.canvas.clear()
+            if window is None:
+                self.guessing_window = GuessingWindow(None)
+                self.guessing_window.guess_submitted.connect(
+                    lambda guess: self.send_network(network.encode_text(network.GUESS, guess)))
+            else:
+                window.reset(None)
+            if self.bot is not None:
+                self.bot.new_turn()
+            self.guessing_window.start_game()
+            # The host decides when the turn ends; this only displays it
+            self.start_countdown(self.scheduler.clock() + seconds)
+            self.guessing_window.show()
+        elif window is not None and kind == network.GUESS_WRONG:
+            window.show_remote_result(WRONG, value)
+        elif window is not None and kind == network.GUESS_CLOSE:
+            window.show_remote_result(CLOSE, value)
+        elif kind in (network.GUESS_CORRECT, network.TIME_EXPIRED):
+            # value is the word of the turn that just ended
+            self.save_turn_drawing(value)
+            if window is not None and kind == network.GUESS_CORRECT:
+                window.show_remote_result(CORRECT, value)
+            elif window is not None:
+                window.show_remote_timeout(value)
+
+    def closeEvent(self, event):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.perf_log is not None:
+            metrics.dump(self.perf_log)
+        super().closeEvent(event)
+
+    def update_score_labels(self):
+        self.player1_label.setText(f"Player 1: {self.engine.score(1)}")
+        self.player2_label.setText(f"Player 2: {self.engine.score(2)}")
 
     def start_game(self):
+        self.build_game_screen()
         difficulty = self.start_screen.difficulty_combo.currentText().lower()
         self.getList(difficulty)
-        self.currentWord = self.getWord()
+        self.engine.new_turn()
         self.timer_label.setText("Starting new turn...")
         self.stacked_widget.setCurrentIndex(1)
         self.show_guessing_window()
 
 
     def show_guessing_window(self):
-        self.guessing_window = GuessingWindow(self.currentWord)
-        self.guessing_window.guess_correct.connect(self.handle_correct_guess)
-        self.guessing_window.time_expired.connect(self.handle_time_expired)
-
-        # Create timer for main window
-        self.game_timer = QTimer()
-        self.time_remaining = 60
-        self.game_timer.timeout.connect(self.update_main_timer)
-        self.game_timer.start(1000)
-
-        QTimer.singleShot(100, self.guessing_window.show)
-
-    def update_main_timer(self):
-        self.time_remaining -= 1
-        self.timer_label.setText(f"Time Remaining: {self.time_remaining}s")
-
-        if self.time_remaining <= 10:
-            self.timer_label.setStyleSheet("""
-                QLabel {
-                    font-size: 18px;
-                    font-weight: bold;
-                    color: white;
-                    padding: 10px;
-                    background-color: #E74C3C;
-                    border-radius: 8px;
-                    margin: 10px;
-                }
-            """)
-
-        if self.time_remaining <= 0:
-            self.game_timer.stop()
+        if self.guessing_window is None:
+            self.guessing_window = GuessingWindow(self.engine.current_word, self.engine.judge)
+            self.guessing_window.guess_correct.connect(self.handle_correct_guess)
+            self.guessing_window.time_expired.connect(self.handle_time_expired)
+            self.guessing_window.drawing_started.connect(self.start_turn_timer)
+            self.guessing_window.guess_judged.connect(self.record_guess)
+        else:
+            self.guessing_window.reset(self.engine.current_word)
+        if self.bot is not None:
+            self.bot.new_turn()
+        self.guessing_window.show()
+
+    def start_turn_timer(self):
+        # The drawer has started; the turn deadline runs from now
+        self.engine.start_timer()
+        self.start_countdown(self.engine.deadline, self.guessing_window.time_up)
+        self.send_network(network.encode_turn(self.engine.current_player, self.engine.scores,
+                                              self.engine.time_remaining()))
+        # Guests must not see the word, so it goes to the recording only
+        self.record(network.encode_text(network.WORD, self.engine.current_word))
+
+    def start_countdown(self, deadline, on_expire=None):
+        # Both the dock and the guessing window display the same deadline
+        self.stop_countdown()
+        self.countdown = Countdown(self.scheduler, deadline, on_expire)
+        self.countdown.subscribe(self.update_main_timer)
+        self.countdown.subscribe(self.guessing_window.update_timer)
+        self.guessing_window.countdown = self.countdown
+        self.countdown.start()
+
+    def stop_countdown(self):
+        if self.countdown is not None:
+            self.countdown.cancel()
+            self.countdown = None
+        set_urgent(self.timer_label, False)
+
+    def update_main_timer(self, time_remaining):
+        self.timer_label.setText(f"Time Remaining: {time_remaining}s")
+        set_urgent(self.timer_label, time_remaining <= 10)
 
     def getList(self, mode):
-        self.wordList.clear()  # Ensure word list is empty before populating
+        # A compiled pack (see wordpack.py) is memory-mapped instead of parsed
+        pack_path = mode + 'mode.wpk'
+        if os.path.exists(pack_path):
+            self.engine.set_words(load_pack(pack_path))
+            return
+
         file_path = mode + 'mode.txt'
 
         try:
-            with open(file_path, 'r') as file:
-                # Read the entire line and split by commas
-                line = file.read()
-                words = line.split(',')  # Split the string by commas
-                for word in words:
-                    word = word.strip()  # Remove any extra spaces or newlines
-                    if word:  # Only add non-empty words
-                        self.wordList.append(word)
+            self.engine.set_words(load_words(file_path))
         except FileNotFoundError:
             print(f"Error: {file_path} not found")
 
     def getWord(self):
-        return random.choice(self.wordList)  # Select a random word from the list
+        return self.engine.draw_word()  # No repeats until every word has been used
 
     def handle_time_expired(self):
-        self.game_timer.stop()
+        if metrics.enabled:
+            start = time.perf_counter()
+        self.stop_countdown()
         self.timer_label.setText("Time's up!")
-        # Switch turns between players
-        self.current_player = 2 if self.current_player == 1 else 1
+        self.send_network(network.encode_text(network.TIME_EXPIRED, self.engine.current_word))
+        self.save_turn_drawing(self.engine.current_word)
+        # Switch turns between players and pick the next word
+        self.engine.expire()
 
-        # Update word for drawing, display in the word label, and clear the canvas
-        self.currentWord = self.getWord()
-        self.word_label.setText(f"Draw this word: \n {self.currentWord}")
+        # Display the new word in the word label and clear the canvas
+        self.word_label.setText(f"Draw this word: \n {self.engine.current_word}")
         self.canvas.clear()
 
-        # Close the guessing window and open it again for the new turn
+        # Reset the guessing window for the new turn
         self.show_guessing_window()
+        if metrics.enabled:
+            metrics.record_since(TURN, start)
 
 
 class GuessingWindow(QWidget):
     guess_correct = pyqtSignal()
     time_expired = pyqtSignal()
+    drawing_started = pyqtSignal()
+    guess_submitted = pyqtSignal(str)
+    guess_judged = pyqtSignal(str, int)  # a guess typed here and its result
+
+    # How long a feedback message stays up, and how many guesses the log keeps
+    FEEDBACK_MS = 2500
+    LOG_LIMIT = 100
+    RESULT_NAMES = {CORRECT: "correct", CLOSE: "close", WRONG: "wrong"}
 
-    def __init__(self, correct_word):
+    def __init__(self, correct_word, judge=None):
         super().__init__()
+        # correct_word is None for a networked guest; the host judges guesses
         self.correct_word = correct_word
+        # judge(guess) returns CORRECT, CLOSE or WRONG
+        self.judge = judge or (lambda guess: GuessMatcher(self.correct_word).match(guess))
         self.setWindowTitle("Pictionary")
-        self.setGeometry(600, 300, 400, 300)
-        self.time_remaining = 60
-        self.timer = None
-        self.is_drawer_view = True  # Flag to track current view
+        self.setGeometry(600, 300, 400, 460)
 
         # Create stacked widget to manage different views
         self.stacked_layout = QStackedWidget()
@@ -585,46 +1889,15 @@ class GuessingWindow(QWidget):
 
         # Word display for drawer
         word_title = QLabel("You will draw:")
-        word_title.setStyleSheet("""
-            QLabel {
-                font-size: 24px;
-                font-weight: bold;
-                color: #2C3E50;
-                margin-bottom: 10px;
-            }
-        """)
+        word_title.setObjectName("wordTitle")
         word_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.word_display = QLabel(self.correct_word)
-        self.word_display.setStyleSheet("""
-            QLabel {
-                font-size: 36px;
-                font-weight: bold;
-                color: #27AE60;
-                padding: 20px;
-                background-color: #F0F2F5;
-                border-radius: 10px;
-                margin: 20px;
-            }
-        """)
+        self.word_display = QLabel()
+        self.word_display.setObjectName("wordDisplay")
         self.word_display.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         self.start_button = QPushButton("Start Drawing!")
-        self.start_button.setStyleSheet("""
-            QPushButton {
-                font-size: 24px;
-                font-weight: bold;
-                padding: 15px 30px;
-                background-color: #2ECC71;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                margin: 20px;
-            }
-            QPushButton:hover {
-                background-color: #27AE60;
-            }
-        """)
+        self.start_button.setObjectName("startDrawingButton")
         self.start_button.clicked.connect(self.start_game)
 
         drawer_layout.addWidget(word_title)
@@ -636,134 +1909,535 @@ class GuessingWindow(QWidget):
         self.guesser_widget = QWidget()
         guesser_layout = QVBoxLayout()
 
-        self.timer_label = QLabel(f"Time Remaining: {self.time_remaining}s")
-        self.timer_label.setStyleSheet("""
-            QLabel {
-                font-size: 20px;
-                font-weight: bold;
-                color: #2C3E50;
-                padding: 10px;
-                background-color: #ECF0F1;
-                border-radius: 8px;
-                margin-bottom: 10px;
-            }
-        """)
+        self.timer_label = QLabel()
+        self.timer_label.setObjectName("guessTimer")
         self.timer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         self.guess_label = QLabel("Enter your guess:")
-        self.guess_label.setStyleSheet("""
-            QLabel {
-                font-size: 18px;
-                color: #2C3E50;
-                margin-top: 10px;
-            }
-        """)
+        self.guess_label.setObjectName("guessLabel")
 
         self.guess_input = QLineEdit()
-        self.guess_input.setStyleSheet("""
-            QLineEdit {
-                font-size: 18px;
-                padding: 10px;
-                border-radius: 8px;
-                border: 1px solid #BDC3C7;
-            }
-        """)
+        self.guess_input.setObjectName("guessInput")
 
         self.submit_button = QPushButton("Submit")
-        self.submit_button.setStyleSheet("""
-            QPushButton {
-                font-size: 20px;
-                font-weight: bold;
-                padding: 10px 20px;
-                background-color: #2ECC71;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                margin-top: 10px;
-            }
-            QPushButton:hover {
-                background-color: #27AE60;
-            }
-        """)
+        self.submit_button.setObjectName("submitButton")
         self.submit_button.clicked.connect(self.check_guess)
+        self.guess_input.returnPressed.connect(self.check_guess)
+
+        # Every guess of the game so far, newest at the bottom
+        self.guess_log = QListWidget()
+        self.guess_log.setObjectName("guessLog")
 
         guesser_layout.addWidget(self.timer_label)
         guesser_layout.addWidget(self.guess_label)
         guesser_layout.addWidget(self.guess_input)
         guesser_layout.addWidget(self.submit_button)
+        guesser_layout.addWidget(self.guess_log)
         self.guesser_widget.setLayout(guesser_layout)
 
         # Add both views to stacked widget
         self.stacked_layout.addWidget(self.drawer_widget)
         self.stacked_layout.addWidget(self.guesser_widget)
 
+        # Feedback shows inline and hides itself, so nothing ever waits on
+        # the player to dismiss a dialog
+        self.feedback_label = QLabel()
+        self.feedback_label.setObjectName("guessFeedback")
+        self.feedback_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.feedback_label.setWordWrap(True)
+        self.feedback_label.hide()
+        self.feedback_timer = QTimer(self)
+        self.feedback_timer.setSingleShot(True)
+        self.feedback_timer.setInterval(self.FEEDBACK_MS)
+        self.feedback_timer.timeout.connect(self.feedback_label.hide)
+
         # Set main layout
         main_layout = QVBoxLayout()
         main_layout.addWidget(self.stacked_layout)
+        main_layout.addWidget(self.feedback_label)
         self.setLayout(main_layout)
 
-        # Start with drawer view
+        self.reset(correct_word)
+
+    def reset(self, correct_word):
+        # Get the same window ready for a new turn, starting with the drawer view
+        self.correct_word = correct_word
+        self.time_remaining = 60
+        self.countdown = None  # Set by the main window once the turn starts
+        self.is_drawer_view = True  # Flag to track current view
+        self.word_display.setText(correct_word or "")
+        self.timer_label.setText(f"Time Remaining: {self.time_remaining}s")
+        set_urgent(self.timer_label, False)
+        self.guess_input.clear()
         self.stacked_layout.setCurrentWidget(self.drawer_widget)
 
+    def show_feedback(self, text, result=None):
+        # Restarting the timer keeps the newest message up for the full time
+        name = self.RESULT_NAMES.get(result, "info")
+        if self.feedback_label.property("result") != name:
+            self.feedback_label.setProperty("result", name)
+            self.feedback_label.style().unpolish(self.feedback_label)
+            self.feedback_label.style().polish(self.feedback_label)
+        self.feedback_label.setText(text)
+        self.feedback_label.show()
+        self.feedback_timer.start()
+
+    def log_guess(self, guess, result):
+        self.guess_log.addItem(f"{guess}  ({self.RESULT_NAMES[result]})")
+        if self.guess_log.count() > self.LOG_LIMIT:
+            self.guess_log.takeItem(0)
+        self.guess_log.scrollToBottom()
+
     def start_game(self):
         self.is_drawer_view = False
         self.stacked_layout.setCurrentWidget(self.guesser_widget)
-        self.start_timer()
+        self.drawing_started.emit()
 
-    def start_timer(self):
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_timer)
-        self.timer.start(1000)
+    def stop_timer(self):
+        if self.countdown is not None:
+            self.countdown.cancel()
 
-    def update_timer(self):
-        self.time_remaining -= 1
+    def update_timer(self, time_remaining):
+        self.time_remaining = time_remaining
         self.timer_label.setText(f"Time Remaining: {self.time_remaining}s")
-
-        if self.time_remaining <= 10:
-            self.timer_label.setStyleSheet("""
-                QLabel {
-                    font-size: 20px;
-                    font-weight: bold;
-                    color: white;
-                    padding: 10px;
-                    background-color: #E74C3C;
-                    border-radius: 8px;
-                    margin-bottom: 10px;
-                }
-            """)
-
-        if self.time_remaining <= 0:
-            self.time_up()
+        set_urgent(self.timer_label, self.time_remaining <= 10)
 
     def check_guess(self):
-        guess = self.guess_input.text().strip().lower()
-        if guess == self.correct_word.lower():
-            if self.timer:
-                self.timer.stop()
-            QMessageBox.information(self, "Correct!", "You guessed the word!")
+        # The guess in the input box; the box is emptied for the next one
+        self.submit_guess(self.guess_input.text())
+        self.guess_input.clear()
+        self.guess_input.setFocus()
+
+    def submit_guess(self, text):
+        # A guess typed by the player or made by a bot. It leaves the input
+        # box alone, so a bot never touches what the player is typing.
+        guess = text.strip().lower()
+        if self.correct_word is None:
+            self.guess_submitted.emit(guess)
+            return
+        if metrics.enabled:
+            start = time.perf_counter()
+        result = self.judge(guess)
+        if metrics.enabled:
+            metrics.record_since(GUESS, start)
+        self.log_guess(guess, result)
+        self.guess_judged.emit(guess, result)
+        if result == CORRECT:
+            self.stop_timer()
+            self.show_feedback(f"Correct! The word was: {self.correct_word}", CORRECT)
+            # Close first: the game reopens this same window for the next turn
+            self.close()
             self.guess_correct.emit()
+        else:
+            if result == CLOSE:
+                self.show_feedback(f"'{guess}' is close! Try again!", CLOSE)
+            else:
+                self.show_feedback(f"'{guess}' is not it. Try again!", WRONG)
+
+    def remote_guess(self, guess):
+        # A guess from a networked guest; only the host shows feedback dialogs
+        if metrics.enabled:
+            start = time.perf_counter()
+        result = self.judge(guess)
+        if metrics.enabled:
+            metrics.record_since(GUESS, start)
+        self.log_guess(guess, result)
+        if result == CORRECT:
+            self.stop_timer()
+            self.show_feedback(f"Guessed! The word was: {self.correct_word}", CORRECT)
             self.close()
+            self.guess_correct.emit()
+        return result
+
+    def show_remote_result(self, result, text):
+        # A guest's window stays open between turns so the result stays visible
+        if result == CORRECT:
+            self.stop_timer()
+            self.show_feedback(f"The word was guessed: {text}", CORRECT)
+            return
+        self.log_guess(text, result)
+        if result == CLOSE:
+            self.show_feedback(f"'{text}' is close! Try again!", CLOSE)
         else:
-            QMessageBox.warning(self, "Incorrect", "Try again!")
-            self.guess_input.clear()
-            self.guess_input.setFocus()
+            self.show_feedback(f"'{text}' is not it. Try again!", WRONG)
+
+    def show_remote_timeout(self, word):
+        self.stop_timer()
+        self.show_feedback(f"Time's up! The word was: {word}")
 
     def time_up(self):
-        if self.timer:
-            self.timer.stop()
-        QMessageBox.information(self, "Time's Up", f"Time's up! The word was: {self.correct_word}")
-        self.time_expired.emit()
+        self.stop_timer()
+        self.show_feedback(f"Time's up! The word was: {self.correct_word}")
         self.close()
+        self.time_expired.emit()
 
-    def closeEvent(self, event):
-        if self.timer:
+
+def turn_frames(turn, interval):
+    # Time-lapse frames of one turn, `interval` seconds of play apart, ending on
+    # the final drawing. Runs on an export thread, so it paints into a QImage;
+    # strokes are only added to it unless an undo or clear took some away.
+    # Like the canvas's ink layer it is transparent, so fills match the game's.
+    replay = StrokeReplay(turn)
+    image = new_image(DrawingCanvas.DEFAULT_SIZE, 1.0)
+    drawn = 0
+    seconds = turn.start
+    while True:
+        if replay.advance(seconds):
+            image.fill(Qt.GlobalColor.transparent)
+            drawn = 0
+        strokes = replay.store.strokes
+        if len(strokes) > drawn:
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            for stroke in strokes[drawn:]:
+                DrawingCanvas.draw_stroke(painter, stroke)
+            painter.end()
+            drawn = len(strokes)
+        yield flatten(image, QColor("#FFFFFF"))
+        if replay.done():
+            return
+        seconds += interval
+
+
+def recorded_sketches(directory="recordings", limit=200):
+    # Bot templates: the final drawing of every turn with a known word in the
+    # newest recordings. Runs on the classifier's thread, so it paints into a
+    # QImage.
+    from sketchbot import drawing_bounds, sketch_pixels
+    size = DrawingCanvas.DEFAULT_SIZE
+    for path in sorted(glob.glob(os.path.join(directory, "*.prec")))[-limit:]:
+        try:
+            turns = [(turn.word, strokes_at(turn)) for turn in GameLog(path)]
+        except (OSError, ValueError, IndexError):
+            # Damaged recordings are skipped; ProtocolError is a ValueError
+            continue
+        for word, store in turns:
+            bounds = drawing_bounds(store, size.width(), size.height())
+            if word is None or bounds is None:
+                continue
+            image = new_image(size, 1.0)
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            for stroke in store:
+                DrawingCanvas.draw_stroke(painter, stroke)
+            painter.end()
+            yield word, sketch_pixels(image, bounds)
+
+
+# Started by the first bot and shared by every bot after it. sketchbot loads
+# numpy, which takes as long as the rest of startup, so nothing imports it
+# before a bot is wanted.
+_classifier = None
+_relay = None
+
+
+class BotRelay(QObject):
+    # Brings classifier answers to the GUI thread. It lives as long as the
+    # classifier, so an answer arriving after its bot was deleted is dropped
+    # by Qt instead of emitting on a deleted object.
+    answered = pyqtSignal(int, int, object, float)  # bot, turn, word, score
+
+
+def sketch_classifier():
+    global _classifier, _relay
+    if _classifier is None:
+        from sketchbot import SketchClassifier
+        _classifier = SketchClassifier(recorded_sketches)
+        _relay = BotRelay()
+    return _classifier, _relay
+
+
+class BotGuesser(QObject):
+    # Plays the guesser through the guessing window, for solo play and load
+    # tests. Every LOOK_MS it shrinks the drawing to a sketch and asks the
+    # shared classifier for the closest word it hasn't tried this turn, then
+    # submits that as a guess. When nothing looks close enough it tries a
+    # random word from the game's list. Finished turns become templates.
+    LOOK_MS = 3000
+
+    keys = itertools.count()
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.game = game
+        self.classifier, self.relay = sketch_classifier()
+        self.key = next(self.keys)
+        self.rng = random.Random()
+        self.turn = 0
+        self.tried = set()
+        self.waiting = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.LOOK_MS)
+        self.timer.timeout.connect(self.look)
+        # Answers come from the classifier's thread, so this is a queued call
+        self.relay.answered.connect(self.make_guess)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.classifier.cancel(self.key)
+        self.waiting = False
+
+    def new_turn(self):
+        self.turn += 1
+        self.tried.clear()
+
+    def sketch(self):
+        from sketchbot import drawing_bounds, sketch_pixels
+        canvas = self.game.canvas
+        bounds = drawing_bounds(canvas.strokes, canvas.width(), canvas.height())
+        return None if bounds is None else sketch_pixels(canvas.image, bounds)
+
+    def look(self):
+        window = self.game.guessing_window
+        if window is None or window.is_drawer_view or self.waiting:
+            return
+        pixels = self.sketch()
+        if pixels is None:
+            return
+        self.waiting = True
+        # The callback holds the relay, never the bot, which may be gone
+        key, turn, relay = self.key, self.turn, self.relay
+        self.classifier.guess(key, pixels, self.tried,
+                              lambda word, score: relay.answered.emit(key, turn, word, score))
+
+    def make_guess(self, key, turn, word, score):
+        from sketchbot import MIN_SCORE
+        if key != self.key:
+            return
+        self.waiting = False
+        window = self.game.guessing_window
+        if turn != self.turn or window is None or window.is_drawer_view:
+            return
+        if word is None or score < MIN_SCORE:
+            word = self.random_word()
+        if word is None:
+            return
+        self.tried.add(word)
+        window.submit_guess(word)
+
+    def random_word(self):
+        words = self.game.engine.words
+        for _ in range(20):
+            if not len(words):
+                return None
+            word = words[self.rng.randrange(len(words))]
+            if word not in self.tried:
+                return word
+        return None
+
+    def learn(self, word):
+        pixels = self.sketch()
+        if pixels is not None:
+            self.classifier.learn(word, pixels)
+
+
+class ReplayPlayer(QObject):
+    # Plays one recorded turn onto a canvas in real time times `speed`.
+    # Events that don't draw anything (guesses and results) are passed on.
+    event_played = pyqtSignal(int, object)
+    finished = pyqtSignal()
+
+    FRAME_MS = 16
+
+    def __init__(self, canvas, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.turn = None
+        self.speed = 1
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.FRAME_MS)
+        self.timer.timeout.connect(self.tick)
+
+    def load(self, turn):
+        self.timer.stop()
+        self.turn = turn
+        self.index = 0
+        self.position = turn.start
+        self.decoder = network.MessageDecoder()
+        self.canvas.clear()
+        self.canvas.drawing = False
+
+    def is_playing(self):
+        return self.timer.isActive()
+
+    def play(self):
+        if self.index >= len(self.turn.events):
+            self.load(self.turn)
+        self.last_tick = time.monotonic()
+        self.timer.start()
+
+    def pause(self):
+        self.timer.stop()
+
+    def tick(self):
+        now = time.monotonic()
+        self.position += (now - self.last_tick) * self.speed
+        self.last_tick = now
+        events = self.turn.events
+        while self.index < len(events) and events[self.index][0] <= self.position:
+            kind, value = apply_to_canvas(self.canvas, self.decoder, events[self.index][1])
+            self.index += 1
+            if kind in network.TEXT_MESSAGES:
+                self.event_played.emit(kind, value)
+        if self.index >= len(events):
             self.timer.stop()
-        event.accept()
+            self.finished.emit()
+
+    def show_final_frame(self):
+        # Skips playback: the final strokes are rebuilt from the vector data
+        # and rasterised once
+        self.timer.stop()
+        self.canvas.clear()
+        self.canvas.drawing = False
+        self.canvas.strokes = strokes_at(self.turn)
+        self.canvas.rebuild()
+        self.index = len(self.turn.events)
+        self.position = self.turn.end
+
+
+class ReplayWindow(QMainWindow):
+    SPEEDS = (1, 2, 5, 10, 25, 50)
+    # Animations show ANIMATION_FRAME_MS of replay per frame, with no more than
+    # ANIMATION_MAX_FRAMES frames however long the turn was
+    ANIMATION_FRAME_MS = 100
+    ANIMATION_MAX_FRAMES = 300
+
+    def __init__(self, log, exporter=None):
+        super().__init__()
+        self.log = log
+        app = QApplication.instance()
+        if app.styleSheet() != STYLESHEET:
+            app.setStyleSheet(STYLESHEET)
+        self.setWindowTitle(f"Pictionary Replay - {os.path.basename(log.path)}")
+        self.exporter = exporter or Exporter(self)
+        self.exporter.finished.connect(lambda path: self.statusBar().showMessage(f"Saved {path}"))
+        self.exporter.failed.connect(
+            lambda path, error: self.statusBar().showMessage(f"Could not save {path}: {error}"))
+
+        self.canvas = DrawingCanvas()
+        self.canvas.interactive = False
+        self.player = ReplayPlayer(self.canvas, self)
+        self.player.event_played.connect(self.show_event)
+        self.player.finished.connect(lambda: self.play_button.setText("Play"))
+
+        self.turn_combo = QComboBox()
+        self.turn_combo.addItems([turn.title() for turn in log.turns])
+        self.turn_combo.currentIndexChanged.connect(self.load_turn)
+        self.speed_combo = QComboBox()
+        self.speed_combo.addItems([f"{speed}x" for speed in self.SPEEDS])
+        self.speed_combo.currentIndexChanged.connect(self.set_speed)
+        self.play_button = QPushButton("Play")
+        self.play_button.clicked.connect(self.toggle_play)
+        final_button = QPushButton("Final Frame")
+        final_button.clicked.connect(self.show_final_frame)
+        export_button = QPushButton("Export Animation")
+        export_button.clicked.connect(self.export_animation)
+        self.event_label = QLabel()
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.turn_combo)
+        controls.addWidget(self.speed_combo)
+        controls.addWidget(self.play_button)
+        controls.addWidget(final_button)
+        controls.addWidget(export_button)
+        controls.addWidget(self.event_label, 1)
+
+        central = QWidget()
+        layout = QVBoxLayout(central)
+        layout.addLayout(controls)
+        layout.addWidget(self.canvas)
+        self.setCentralWidget(central)
+
+        if log.turns:
+            self.load_turn(0)
+        else:
+            self.statusBar().showMessage("This recording has no turns")
+
+    def load_turn(self, index):
+        self.player.load(self.log[index])
+        self.play_button.setText("Play")
+        self.event_label.clear()
+
+    def set_speed(self, index):
+        self.player.speed = self.SPEEDS[index]
+
+    def toggle_play(self):
+        if self.player.turn is None:
+            return
+        if self.player.is_playing():
+            self.player.pause()
+            self.play_button.setText("Play")
+        else:
+            self.player.play()
+            self.play_button.setText("Pause")
+
+    def show_final_frame(self):
+        if self.player.turn is not None:
+            self.player.show_final_frame()
+            self.play_button.setText("Play")
+
+    def show_event(self, kind, value):
+        if kind == network.GUESS:
+            self.event_label.setText(f"Guess: {value}")
+        elif kind == network.GUESS_CLOSE:
+            self.event_label.setText(f"'{value}' is close")
+        elif kind == network.GUESS_CORRECT:
+            self.event_label.setText(f"Guessed! The word was: {value}")
+        elif kind == network.TIME_EXPIRED:
+            self.event_label.setText(f"Time's up! The word was: {value}")
+
+    def export_animation(self):
+        turn = self.player.turn
+        if turn is None:
+            return
+        filePath, _ = QFileDialog.getSaveFileName(
+            self, "Export Animation", f"turn-{turn.number:03d}.png", "Animated PNG(*.png)")
+        if filePath:
+            # The time-lapse runs at the selected replay speed
+            interval = self.player.speed * self.ANIMATION_FRAME_MS / 1000
+            interval = max(interval, (turn.end - turn.start) / self.ANIMATION_MAX_FRAMES)
+            self.exporter.export_animation(turn_frames(turn, interval), filePath,
+                                           interval * 1000 / self.player.speed)
+            self.statusBar().showMessage(f"Exporting {filePath}...")
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    import argparse
+    parser = argparse.ArgumentParser(description="Pictionary")
+    parser.add_argument('--host', type=int, metavar='PORT', nargs='?', const=network.DEFAULT_PORT,
+                        help="host a networked game and draw")
+    parser.add_argument('--join', metavar='HOST[:PORT]', help="join a networked game as a guesser")
+    parser.add_argument('--record', metavar='FILE',
+                        help="where to record the game (default: recordings/<date>-<time>.prec)")
+    parser.add_argument('--no-record', action='store_true', help="don't record the game")
+    parser.add_argument('--replay', metavar='FILE', help="watch a recorded game")
+    parser.add_argument('--perf', action='store_true', help="show the performance HUD (F3)")
+    parser.add_argument('--bot', action='store_true', help="let a bot guess (Tools > Bot Guesser)")
+    parser.add_argument('--perf-log', metavar='FILE',
+                        help="collect timings all session and write them to a .json or .csv file on exit")
+    args, qt_args = parser.parse_known_args()
+
+    # Let Qt merge queued tablet moves the way it already does for mouse moves
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressTabletEvents)
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
-    window = PictionaryGame()
+    if args.replay:
+        window = ReplayWindow(GameLog(args.replay))
+        window.show()
+        sys.exit(app.exec())
+    link = None
+    if args.host is not None:
+        link = NetworkLink('127.0.0.1', args.host, serve=True)
+    elif args.join:
+        address, _, port = args.join.partition(':')
+        link = NetworkLink(address, int(port or network.DEFAULT_PORT))
+    record_path = None
+    if not args.no_record:
+        record_path = args.record or os.path.join("recordings", time.strftime("%Y%m%d-%H%M%S") + ".prec")
+    window = PictionaryGame(link, guest=bool(args.join), record_path=record_path,
+                            perf_log=args.perf_log, perf_hud=args.perf, bot=args.bot)
     window.show()
     app.exec()
\ No newline at end of file
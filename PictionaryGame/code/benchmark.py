@@ -0,0 +1,1146 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# Benchmarks run without a display; headless ones don't import Qt at all
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+_app = None
+
+# Machine-readable results of the benchmarks run so far:
+# benchmark -> metric -> {"value", "unit", "better": "lower" or "higher"}
+RESULTS = {}
+_running = None
+
+
+def result(metric, value, unit, better="lower"):
+    RESULTS.setdefault(_running, {})[metric] = {"value": value, "unit": unit, "better": better}
+
+
+def get_app():
+    # Keep a module-level reference so the application isn't garbage collected
+    from PyQt6.QtWidgets import QApplication
+    global _app
+    if _app is None:
+        _app = QApplication.instance() or QApplication(sys.argv)
+    return _app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def random_stroke(canvas, rng, points=20):
+    from PyQt6.QtGui import QColor
+    from PyQt6.QtCore import QPoint
+    x, y = rng.randrange(1000), rng.randrange(700)
+    color = QColor.fromRgb(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+    canvas.set_pen(color, rng.randrange(2, 11))
+    canvas.begin_stroke(QPoint(x, y))
+    for _ in range(points):
+        x = min(999, max(0, x + rng.randint(-15, 15)))
+        y = min(699, max(0, y + rng.randint(-15, 15)))
+        canvas.extend_stroke(QPoint(x, y))
+    canvas.end_stroke()
+
+
+def bench_undo(total=1200, step=100, samples=10):
+    # Undo latency should stay flat as the drawing grows
+    from PictionaryGame import DrawingCanvas
+    get_app()
+    rng = random.Random(1)
+    canvas = DrawingCanvas()
+    print(f"{'strokes':>8} {'undo ms':>10} {'checkpoints':>12} {'MB':>8}")
+    for count in range(step, total + 1, step):
+        while len(canvas.strokes) < count:
+            random_stroke(canvas, rng)
+        start = time.perf_counter()
+        for _ in range(samples):
+            canvas.undo()
+            canvas.redo()
+        elapsed = (time.perf_counter() - start) / samples * 1000
+        print(f"{count:>8} {elapsed:>10.2f} {len(canvas.history):>12} "
+              f"{canvas.history.used_bytes / 1e6:>8.1f}")
+    result(f"undo_redo_at_{total}_strokes", elapsed, "ms")
+
+
+def bench_turns(turns=1_000_000):
+    # Headless turn flow: a few wrong guesses, then a correct guess or a timeout
+    from engine import GameEngine
+    clock = FakeClock()
+    rng = random.Random(1)
+    engine = GameEngine(["Cow", "Truck", "Door", "Window", "Boat"], clock=clock, rng=rng)
+    engine.new_turn()
+    start = time.perf_counter()
+    for i in range(turns):
+        engine.start_timer()
+        engine.guess("wrong")
+        engine.guess("also wrong")
+        if i % 4:
+            engine.guess(engine.current_word)
+        else:
+            clock.now += engine.turn_seconds
+            engine.poll()
+    elapsed = time.perf_counter() - start
+    print(f"{engine.turns_played:,} turns in {elapsed:.2f}s "
+          f"= {engine.turns_played / elapsed * 60:,.0f} turns/minute")
+    result("turns_per_minute", engine.turns_played / elapsed * 60, "turns/min", "higher")
+
+
+def bench_words(size=200_000, draws=1_000_000):
+    # Loading and drawing from a community-pack sized word bank
+    import tempfile
+    from wordbank import WordSampler, load_words
+    rng = random.Random(1)
+    words = [f"word{i}" for i in range(size)]
+    words += rng.sample(words, size // 10)  # duplicates, as real packs have
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+        file.write(",".join(words))
+    try:
+        start = time.perf_counter()
+        bank = load_words(file.name)
+        loaded = time.perf_counter() - start
+        start = time.perf_counter()
+        load_words(file.name)
+        cached = time.perf_counter() - start
+    finally:
+        os.unlink(file.name)
+    print(f"loaded {len(words):,} words into {len(bank):,} unique in {loaded * 1000:.1f} ms, "
+          f"cached reload {cached * 1e6:.1f} us")
+    result("load", loaded * 1000, "ms")
+
+    sampler = WordSampler(bank, rng)
+    first_cycle = {sampler.draw() for _ in range(len(bank))}
+    print(f"first {len(bank):,} draws: {len(first_cycle):,} distinct words")
+    start = time.perf_counter()
+    for _ in range(draws):
+        sampler.draw()
+    elapsed = time.perf_counter() - start
+    print(f"{draws:,} draws in {elapsed:.2f}s = {elapsed / draws * 1e9:.0f} ns/draw")
+    result("draw", elapsed / draws * 1e9, "ns")
+
+
+WORD_LOAD_SCRIPT = """
+import sys, time
+from engine import GameEngine
+from benchmark import process_rss
+import os
+before = process_rss(os.getpid(), "RssAnon")
+start = time.perf_counter()
+if sys.argv[1].endswith('.wpk'):
+    from wordpack import load_pack as load
+else:
+    from wordbank import load_words as load
+engine = GameEngine(load(sys.argv[1]))
+for _ in range(100):
+    engine.new_turn()
+elapsed = time.perf_counter() - start
+print(elapsed, process_rss(os.getpid(), "RssAnon") - before)
+"""
+
+
+def bench_guesses(guesses=200_000):
+    # Judging cost per guess for right answers, typos and plain wrong guesses
+    from matching import GuessMatcher
+    from wordbank import load_words
+    rng = random.Random(1)
+    words = load_words("easymode.txt") + load_words("hardmode.txt")
+    start = time.perf_counter()
+    matchers = [GuessMatcher(word) for word in words]
+    built = (time.perf_counter() - start) / len(words)
+    print(f"matcher setup: {built * 1e6:.1f} us per word")
+
+    def typo(word):
+        i = rng.randrange(len(word))
+        return word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1:]
+
+    kinds = {
+        "exact": lambda word: word.upper(),
+        "typo": typo,
+        "wrong word": lambda word: rng.choice(words),
+        "junk": lambda word: "".join(rng.choice("abcdefghij") for _ in range(rng.randrange(3, 12))),
+    }
+    for name, make in kinds.items():
+        cases = []
+        for _ in range(guesses // len(kinds)):
+            matcher = rng.choice(matchers)
+            cases.append((matcher, make(matcher.word)))
+        start = time.perf_counter()
+        for matcher, guess in cases:
+            matcher.match(guess)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>11}: {elapsed / len(cases) * 1e6:.2f} us per guess")
+        result(name.replace(" ", "_"), elapsed / len(cases) * 1e6, "us")
+
+
+def bench_wordpack(sizes=(10_000, 100_000, 1_000_000)):
+    # Startup cost of a text word list vs. a memory-mapped pack, each loaded in
+    # a fresh process that then draws 100 words. Memory is the private kind;
+    # mapped pack pages are page cache the kernel can drop at any time.
+    import tempfile
+    from wordpack import compile_pack
+    print(f"{'words':>10} {'format':>6} {'startup ms':>11} {'anon MiB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            words = [f"themed word {i}" for i in range(size)]
+            text_path = os.path.join(directory, f"{size}.txt")
+            pack_path = os.path.join(directory, f"{size}.wpk")
+            with open(text_path, "w") as file:
+                file.write(",".join(words))
+            compile_pack(((word, "themed", i % 5) for i, word in enumerate(words)), pack_path)
+            for name, path in (("text", text_path), ("pack", pack_path)):
+                output = subprocess.run([sys.executable, "-c", WORD_LOAD_SCRIPT, path],
+                                        capture_output=True, text=True, check=True).stdout
+                elapsed, rss = output.split()
+                print(f"{size:>10,} {name:>6} {float(elapsed) * 1000:>11.1f} "
+                      f"{int(rss) / 2 ** 20:>9.1f}")
+                result(f"{name}_{size}_startup", float(elapsed) * 1000, "ms")
+
+
+STARTUP_SCRIPT = """
+import sys, time
+from PyQt6.QtCore import QEvent, QObject, Qt
+from PyQt6.QtWidgets import QApplication
+from PictionaryGame import PictionaryGame
+imports_done = time.time()
+
+class FirstPaint(QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint:
+            print(imports_done, built, time.time(), ",".join(sorted(sys.modules)), flush=True)
+            app.quit()
+        return False
+
+QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressTabletEvents)
+app = QApplication(sys.argv[:1])
+app.setStyle('Fusion')
+window = PictionaryGame()
+built = time.time()
+first_paint = FirstPaint()
+window.start_screen.installEventFilter(first_paint)
+window.show()
+app.exec()
+"""
+
+
+# Modules that are slow to import and only needed once a feature is used, so
+# they must not be loaded by the time the start screen is painted
+LAZY_MODULES = ("numpy", "asyncio")
+
+
+def bench_startup(samples=7):
+    # Process start to the first paint of the start screen, as `python
+    # PictionaryGame.py` does it, in fresh processes; the median is reported
+    runs = []
+    for _ in range(samples):
+        start = time.time()
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT],
+                                capture_output=True, text=True, check=True).stdout
+        *times, modules = output.split()
+        imported, built, painted = (float(value) for value in times)
+        modules = modules.split(",")
+        runs.append(((imported - start) * 1000, (built - imported) * 1000,
+                     (painted - built) * 1000, (painted - start) * 1000))
+    imported, built, painted, total = sorted(runs, key=lambda run: run[3])[len(runs) // 2]
+    print(f"interpreter + imports {imported:.1f} ms, window {built:.1f} ms, "
+          f"first paint {painted:.1f} ms: {total:.1f} ms to first paint")
+    result("imports", imported, "ms")
+    result("window", built, "ms")
+    result("first_paint", total, "ms")
+    # Module count moves only when imports change, so unlike the timings it
+    # shows up in a --baseline comparison however noisy the machine is
+    print(f"{len(modules)} modules loaded")
+    result("modules", len(modules), "modules")
+    loaded = [name for name in LAZY_MODULES if name in modules]
+    assert not loaded, f"loaded before the first paint: {', '.join(loaded)}"
+
+
+def bench_export(strokes=400, scale=3.0, samples=5):
+    # How long saving blocks the GUI thread: encoding in place vs. taking a
+    # QImage snapshot and handing it to the export pool
+    import tempfile
+    from PyQt6.QtCore import QEventLoop
+    from PictionaryGame import DrawingCanvas
+    from export import Exporter
+    get_app()
+    rng = random.Random(1)
+    canvas = DrawingCanvas()
+    for _ in range(strokes):
+        random_stroke(canvas, rng)
+    image = canvas.render_strokes(scale)
+    exporter = Exporter()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "drawing.png")
+        blocking = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            image.save(path)
+            blocking.append(time.perf_counter() - start)
+        submitting = []
+        done = []
+        loop = QEventLoop()
+        exporter.finished.connect(lambda path: (done.append(time.perf_counter()),
+                                                len(done) == samples and loop.quit()))
+        start = time.perf_counter()
+        for i in range(samples):
+            submitted = time.perf_counter()
+            exporter.export(image.copy(), os.path.join(directory, f"drawing{i}.png"))
+            submitting.append(time.perf_counter() - submitted)
+        loop.exec()
+        total = done[-1] - start
+    print(f"{image.width()}x{image.height()} PNG, {samples} saves")
+    print(f"  save on GUI thread: {percentile(blocking, 0.5) * 1000:.1f} ms blocked per save")
+    print(f"  export pool:        {percentile(submitting, 0.5) * 1000:.2f} ms blocked per save, "
+          f"all {samples} written after {total * 1000:.0f} ms")
+    result("pool_blocked", percentile(submitting, 0.5) * 1000, "ms")
+    result("pool_all_written", total * 1000, "ms")
+
+
+def bench_turn_switch(turns=200):
+    # Time from a correct guess to the next turn's window being on screen, with
+    # the guessing window reused vs. a new one built each turn. Both use the
+    # current window code, shared stylesheet included, so this measures reuse
+    # alone and not the game before it reused the window.
+    from PictionaryGame import PictionaryGame
+    app = get_app()
+    game = PictionaryGame()
+    game.show()
+    game.start_game()
+    app.processEvents()
+
+    results = {}
+    closed = []  # kept alive so freeing them isn't part of the timing
+    for name, rebuild in (("new window", True), ("reuse window", False)):
+        times = []
+        for _ in range(turns):
+            start = time.perf_counter()
+            if rebuild:
+                game.guessing_window.close()
+                closed.append(game.guessing_window)
+                game.guessing_window = None
+            game.handle_correct_guess()
+            app.processEvents()
+            times.append(time.perf_counter() - start)
+        results[name] = times
+
+    for name, times in results.items():
+        print(f"{name:>15}: p50 {percentile(times, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(times, 0.99) * 1000:.2f} ms")
+    result("reuse_p50", percentile(results["reuse window"], 0.5) * 1000, "ms")
+
+
+def stroke_trace(kind, rng):
+    # Synthetic pointer paths inside the canvas, as (x, y) per move event
+    if kind == "long":
+        # One slow, smooth stroke: small steps along a wandering curve
+        points = []
+        for i in range(10_000):
+            t = i / 400
+            points.append((460 + 380 * math.sin(t * 1.3) * math.cos(t * 0.21),
+                           350 + 280 * math.sin(t * 0.7 + 1) * math.cos(t * 0.13)))
+        return points
+    # Fast scribbles: big jumps back and forth
+    x, y = 460.0, 350.0
+    points = []
+    for _ in range(4_000):
+        x = min(900, max(20, x + rng.uniform(-60, 60)))
+        y = min(680, max(20, y + rng.uniform(-60, 60)))
+        points.append((x, y))
+    return points
+
+
+# name: (trace, move events per 16 ms frame, brush size)
+STROKE_TRACES = {
+    "scribble": ("scribble", 8, 3),
+    "long_stroke": ("long", 2, 3),
+    "max_brush": ("scribble", 8, 10),
+}
+# Simplifying frame by frame may keep at most this many times the points that
+# simplifying the whole stroke at once does
+MAX_KEPT_RATIO = 1.5
+
+
+def game_window():
+    # A game on its first turn with the drawer drawing, as a player sees it
+    from PictionaryGame import PictionaryGame
+    app = get_app()
+    game = PictionaryGame()
+    game.show()
+    game.start_game()
+    game.guessing_window.start_game()
+    app.processEvents()
+    return game
+
+
+def bench_strokes():
+    # Stroke traces sent as mouse events through Qt to the game's canvas,
+    # with the canvas flushed and painted once per frame of moves
+    from PyQt6.QtCore import QEvent, QPointF, Qt
+    from PyQt6.QtGui import QMouseEvent
+    from strokes import simplify
+    app = get_app()
+    game = game_window()
+    canvas = game.canvas
+    rng = random.Random(1)
+    left = Qt.MouseButton.LeftButton
+
+    def send(kind, x, y):
+        point = QPointF(x, y)
+        app.sendEvent(canvas, QMouseEvent(kind, point, point, left, left,
+                                          Qt.KeyboardModifier.NoModifier))
+
+    for name, (trace, per_frame, brush) in STROKE_TRACES.items():
+        points = stroke_trace(trace, rng)
+        game.setBrushSize(brush)
+        canvas.clear()
+        canvas.reset_repaint_stats()
+        app.processEvents()
+        frames = []
+        start = time.perf_counter()
+        send(QEvent.Type.MouseButtonPress, *points[0])
+        for i in range(0, len(points), per_frame):
+            frame = time.perf_counter()
+            for x, y in points[i:i + per_frame]:
+                send(QEvent.Type.MouseMove, x, y)
+            canvas.flush_stroke()
+            app.processEvents()
+            frames.append(time.perf_counter() - frame)
+        send(QEvent.Type.MouseButtonRelease, *points[-1])
+        app.processEvents()
+        elapsed = time.perf_counter() - start
+        per_move = elapsed / len(points) * 1e6
+        kept = len(canvas.strokes[-1])
+        best = len(simplify([(x, y, None) for x, y in points], canvas.SIMPLIFY_TOLERANCE, 0.0))
+        print(f"{name:>12}: {len(points):,} moves, brush {brush}, {per_move:.1f} us per move, "
+              f"frame p50 {percentile(frames, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(frames, 0.99) * 1000:.2f} ms, "
+              f"{kept:,} points kept ({best:,} for the whole stroke at once), "
+              f"repainted {canvas.repaint_ratio():.1%}")
+        assert kept <= best * MAX_KEPT_RATIO, f"{name}: {kept} points kept, expected at most " \
+                                              f"{best * MAX_KEPT_RATIO:.0f}"
+        result(f"{name}_per_move", per_move, "us")
+        result(f"{name}_frame_p50", percentile(frames, 0.5) * 1000, "ms")
+        result(f"{name}_frame_p99", percentile(frames, 0.99) * 1000, "ms")
+
+
+def bench_turn_cycle(turns=300):
+    # Turn changes through the game window: drawing starts, then the turn
+    # ends with handle_correct_guess or handle_time_expired in turn
+    app = get_app()
+    game = game_window()
+    times = {"correct guess": [], "time expired": []}
+    for i in range(turns):
+        name = "time expired" if i % 2 else "correct guess"
+        start = time.perf_counter()
+        if i % 2:
+            game.handle_time_expired()
+        else:
+            game.handle_correct_guess()
+        game.guessing_window.start_game()
+        app.processEvents()
+        times[name].append(time.perf_counter() - start)
+    for name, values in times.items():
+        print(f"{name:>14}: p50 {percentile(values, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(values, 0.99) * 1000:.2f} ms")
+        key = name.replace(" ", "_")
+        result(f"{key}_p50", percentile(values, 0.5) * 1000, "ms")
+        result(f"{key}_p99", percentile(values, 0.99) * 1000, "ms")
+
+
+def bench_get_word(draws=200_000):
+    # Word sampling the way the game does it: getList once, then getWord
+    game = game_window()
+    start = time.perf_counter()
+    game.getList("hard")
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(draws):
+        game.getWord()
+    elapsed = time.perf_counter() - start
+    print(f"getList: {loaded * 1000:.2f} ms, getWord: {elapsed / draws * 1e9:.0f} ns per word")
+    result("get_word", elapsed / draws * 1e9, "ns")
+
+
+def bench_feedback(seconds=2.0, tick_ms=10, guess_ms=50):
+    # Guesses arrive every guess_ms while a tick_ms timer runs; feedback must
+    # never hold up the event loop, so the ticks keep their spacing
+    from PyQt6.QtCore import QEventLoop, QTimer
+    from PictionaryGame import GuessingWindow
+    app = get_app()
+    window = GuessingWindow("Giraffe")
+    window.show()
+    window.start_game()
+    app.processEvents()
+
+    ticks = []
+    ticker = QTimer()
+    ticker.setInterval(tick_ms)
+    ticker.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    # All wrong: a correct guess would close the window and end the test
+    guesses = iter(["elephant", "zebra", "lion", "hippo", "camel"] * 1000)
+
+    def guess():
+        window.guess_input.setText(next(guesses))
+        window.check_guess()
+
+    guesser = QTimer()
+    guesser.setInterval(guess_ms)
+    guesser.timeout.connect(guess)
+    loop = QEventLoop()
+    ticker.start()
+    guesser.start()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+    ticker.stop()
+    guesser.stop()
+
+    gaps = [(b - a) * 1000 for a, b in zip(ticks, ticks[1:])]
+    print(f"{window.guess_log.count()} guesses answered, {len(ticks)} timer ticks "
+          f"(about {int(seconds * 1000 / tick_ms)} expected)")
+    print(f"tick gap p50 {percentile(gaps, 0.5):.1f} ms, max {max(gaps):.1f} ms "
+          f"(timer interval {tick_ms} ms)")
+    result("tick_gap_max", max(gaps), "ms")
+
+
+def record_session(path, turns=60, turn_seconds=60, seed=1):
+    # A synthetic hour of play: a stroke every two seconds streamed in
+    # per-frame batches, and a wrong guess every five seconds
+    import network
+    from recording import GameRecorder
+    rng = random.Random(seed)
+    clock = FakeClock()
+    recorder = GameRecorder(path, clock=clock)
+    for turn in range(turns):
+        recorder.record(network.encode_turn(turn % 2 + 1, (turn // 2, turn // 2), turn_seconds))
+        recorder.record(network.encode_text(network.WORD, f"word{turn}"))
+        start = clock.now
+        encoder = network.StrokeEncoder()
+        while clock.now - start < turn_seconds - 2:
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 700)
+            recorder.record(encoder.begin(rng.randrange(1 << 32), rng.randrange(2, 11), (x, y, None)))
+            for _ in range(90):
+                clock.now += 0.016
+                points = []
+                for _ in range(3):
+                    x = min(999, max(0, x + rng.uniform(-5, 5)))
+                    y = min(699, max(0, y + rng.uniform(-5, 5)))
+                    points.append((x, y, None))
+                recorder.record(encoder.points(points))
+            recorder.record(encoder.end())
+            if rng.random() < 0.1:
+                recorder.record(network.encode_simple(network.UNDO))
+            if int(clock.now - start) % 5 == 0:
+                recorder.record(network.encode_text(network.GUESS, "nope"))
+                recorder.record(network.encode_text(network.GUESS_WRONG, "nope"))
+            clock.now += 0.5
+        clock.now = start + turn_seconds
+        recorder.record(network.encode_text(network.TIME_EXPIRED, f"word{turn}"))
+    recorder.close()
+
+
+def bench_replay(turns=60):
+    # An hour-long recording: indexing it, jumping to the final frame of a
+    # turn, and playing every turn onto a canvas as fast as possible
+    import tempfile
+    import network
+    from PictionaryGame import DrawingCanvas
+    from recording import GameLog, apply_to_canvas, strokes_at
+    get_app()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session.prec")
+        start = time.perf_counter()
+        record_session(path, turns)
+        recorded = time.perf_counter() - start
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        log = GameLog(path)
+        indexed = time.perf_counter() - start
+    events = sum(len(turn.events) for turn in log.turns)
+    canvas = DrawingCanvas()
+    start = time.perf_counter()
+    canvas.strokes = strokes_at(log[-1])
+    canvas.rebuild()
+    final = time.perf_counter() - start
+    start = time.perf_counter()
+    for turn in log.turns:
+        strokes_at(turn)
+    every_turn = time.perf_counter() - start
+    start = time.perf_counter()
+    for turn in log.turns:
+        canvas.clear()
+        decoder = network.MessageDecoder()
+        for _, payload in turn.events:
+            apply_to_canvas(canvas, decoder, payload)
+    played = time.perf_counter() - start
+    print(f"{len(log)} turns, {events:,} events, {size / 1024:.0f} KiB on disk "
+          f"(recorded in {recorded:.2f} s)")
+    print(f"  load and index:             {indexed * 1000:.0f} ms")
+    print(f"  final frame of the session: {final * 1000:.0f} ms "
+          f"({(indexed + final) * 1000:.0f} ms from opening the file)")
+    print(f"  final strokes of all turns: {every_turn * 1000:.0f} ms")
+    print(f"  play every event on canvas: {played:.2f} s")
+    result("load_and_index", indexed * 1000, "ms")
+    result("final_frame", final * 1000, "ms")
+    result("play_all_events", played, "s")
+
+
+def bench_fill(strokes=60, samples=9):
+    # Bucket fills of the whole canvas on the canvas's own backing store: an
+    # empty canvas, and the background of a drawing, where every stroke splits
+    # the rows it crosses into more spans. The pure-Python fallback runs once.
+    from PyQt6.QtGui import QColor
+    from PictionaryGame import DrawingCanvas
+    from fill import scanline_fill, span_fill
+    get_app()
+    rng = random.Random(1)
+    empty = DrawingCanvas()
+    drawing = DrawingCanvas()
+    for _ in range(strokes):
+        random_stroke(drawing, rng, points=60)
+    red, blue = QColor("#C0392B").rgba(), QColor("#2980B9").rgba()
+    for name, canvas in (("empty", empty), ("drawing", drawing)):
+        image = canvas.image
+        for tolerance in (0, 32):
+            times = []
+            for i in range(samples):
+                start = time.perf_counter()
+                span_fill(image, 0, 0, red if i % 2 else blue, tolerance)
+                times.append((time.perf_counter() - start) * 1000)
+            print(f"{name:>8} {image.width()}x{image.height()}, tolerance {tolerance:>2}: "
+                  f"p50 {percentile(times, 0.5):.1f} ms, max {max(times):.1f} ms")
+            result(f"{name}_tolerance_{tolerance}", percentile(times, 0.5), "ms")
+    start = time.perf_counter()
+    scanline_fill(empty.image, 0, 0, red, 0)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"pure-Python scanline fill of the empty canvas: {elapsed:.0f} ms")
+    result("python_empty", elapsed, "ms")
+
+
+def bench_layers(depths=(3, 6, 12), frames=200, size=(1920, 1080)):
+    # A pointer moving over the top layer of stacks 3, 6 and 12 layers deep:
+    # compositing only the rects it touched against compositing the whole
+    # canvas every frame, as a single backing store redrawn per paint would
+    from PyQt6.QtCore import QRect, QSize
+    from PyQt6.QtGui import QColor
+    from layers import LayerStack
+    get_app()
+    rng = random.Random(1)
+    size = QSize(*size)
+    for depth in depths:
+        stack = LayerStack([f"layer{i}" for i in range(depth)], size, 1.0)
+        for layer in stack:
+            painter = layer.begin_paint()
+            for _ in range(50):
+                painter.fillRect(rng.randrange(size.width()), rng.randrange(size.height()),
+                                 80, 80, QColor(rng.randrange(256), 0, 0, 128))
+            painter.end()
+        stack.flush()
+        top = stack.layers[-1]
+        timings = {}
+        for mode in ("dirty", "full"):
+            times = []
+            previous = QRect(0, 0, 16, 16)
+            for frame in range(frames):
+                rect = QRect(frame * 9 % size.width(), frame * 5 % size.height(), 16, 16)
+                start = time.perf_counter()
+                if mode == "dirty":
+                    top.mark_dirty(previous)
+                    top.mark_dirty(rect)
+                else:
+                    top.mark_dirty()
+                stack.flush()
+                times.append((time.perf_counter() - start) * 1000)
+                previous = rect
+            timings[mode] = percentile(times, 0.5)
+            result(f"{mode}_{depth}_layers", timings[mode], "ms")
+        print(f"{depth:>2} layers {size.width()}x{size.height()}: dirty rects p50 "
+              f"{timings['dirty']:.3f} ms, full composite p50 {timings['full']:.2f} ms "
+              f"({timings['full'] / timings['dirty']:.0f}x)")
+
+
+def bench_bigboard(strokes=20_000, world=100_000, frames=300, cache_mb=32):
+    # A party board 100,000 units square with ink scattered over it, panned
+    # across at several zoom levels in a 1920x1080 window
+    from PyQt6.QtCore import QPointF
+    from PictionaryGame import BigBoardCanvas
+    app = get_app()
+    rng = random.Random(1)
+    board = BigBoardCanvas()
+    board.cache.max_bytes = cache_mb * 1024 * 1024
+    board.resize(1920, 1080)
+    board.show()
+    app.processEvents()
+    for _ in range(strokes):
+        x, y = rng.uniform(0, world), rng.uniform(0, world)
+        stroke = board.strokes.begin_stroke(rng.randrange(1 << 32), rng.randrange(2, 11), x, y)
+        for _ in range(20):
+            x += rng.uniform(-15, 15)
+            y += rng.uniform(-15, 15)
+            stroke.add_point(x, y)
+        board.strokes.end_stroke()
+        board.index.add(stroke, *stroke.bounds())
+    times = []
+    start = time.perf_counter()
+    for zoom in (3, 1, 5):
+        board.zoom_to(zoom, QPointF(960, 540))
+        for _ in range(frames // 3):
+            board.pan(-48, -27)
+            frame = time.perf_counter()
+            board.repaint()
+            times.append(time.perf_counter() - frame)
+    total = time.perf_counter() - start
+    cache = board.cache
+    print(f"{strokes:,} strokes on a {world:,}x{world:,} board, {len(times)} frames in {total:.2f} s")
+    print(f"  frame p50 {percentile(times, 0.5) * 1000:.2f} ms, p99 {percentile(times, 0.99) * 1000:.2f} ms")
+    print(f"  tiles rendered {board.tilesRendered:,}, painted {board.tilesPainted:,}, "
+          f"evicted {cache.evictions:,}")
+    print(f"  tile cache {cache.used_bytes / 2**20:.1f} MiB (budget {cache_mb} MiB), "
+          f"{len(board.index):,} cells with ink")
+    print(f"  one pixmap for the whole board would be {world * world * 4 / 2**30:,.0f} GiB")
+    result("frame_p50", percentile(times, 0.5) * 1000, "ms")
+    result("frame_p99", percentile(times, 0.99) * 1000, "ms")
+
+
+def bench_instrumentation(moves=20_000, rounds=5):
+    # Cost of perf.metrics on the pointer path, off and on: move events into
+    # the canvas with a flush every fourth move, best of several rounds
+    from PyQt6.QtCore import QPointF
+    from PictionaryGame import DrawingCanvas
+    from perf import metrics
+    get_app()
+    canvas = DrawingCanvas()
+    points = [QPointF(100 + (i * 7) % 600, 100 + (i * 13) % 400) for i in range(moves)]
+    results = {}
+    for enabled in (False, True, False, True):
+        metrics.enabled = enabled
+        best = None
+        for _ in range(rounds):
+            canvas.begin_stroke(QPointF(100, 100))
+            start = time.perf_counter()
+            for i, point in enumerate(points):
+                if metrics.enabled:
+                    metrics.mark("move_events")
+                canvas.extend_stroke(point)
+                if i % 4 == 3:
+                    canvas.flush_stroke()
+            elapsed = time.perf_counter() - start
+            canvas.end_stroke()
+            canvas.clear()
+            best = elapsed if best is None else min(best, elapsed)
+        results[enabled] = min(best, results.get(enabled, best))
+    metrics.enabled = False
+    metrics.clear()
+    off, on = results[False] / moves * 1e6, results[True] / moves * 1e6
+    print(f"metrics off: {off:.2f} us per move, on: {on:.2f} us per move "
+          f"({(on - off) / off:+.1%})")
+    result("move_metrics_off", off, "us")
+    result("move_metrics_on", on, "us")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def process_rss(pid, field="VmRSS"):
+    # Resident set size in bytes, or None where /proc is not available.
+    # RssAnon leaves out file pages, e.g. a memory-mapped file's page cache.
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+
+async def room_bot(port, room, sent, latencies, stop):
+    # Joins a room; draws if the server hands it the word, otherwise records how
+    # long each batch of stroke points took to arrive
+    import network
+    client = network.GameClient()
+    await client.connect('127.0.0.1', port)
+    client.send(network.encode_text(network.JOIN, room))
+    received = 0
+    drawing = None
+    async for payload in client.messages():
+        kind = payload[0]
+        if kind == network.WORD and drawing is None:
+            drawing = asyncio.create_task(draw_bot(client, sent, stop))
+        elif kind == network.STROKE_POINTS:
+            latencies.append(time.perf_counter() - sent[received])
+            received += 1
+        if stop.is_set():
+            break
+    if drawing is not None:
+        await drawing
+    await client.close()
+
+
+async def draw_bot(client, sent, stop):
+    import network
+    encoder = network.StrokeEncoder()
+    rng = random.Random()
+    while not stop.is_set():
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 700)
+        client.send(encoder.begin(0xFF2C3E50, 3, (x, y, None)))
+        for _ in range(30):
+            points = []
+            for _ in range(4):
+                x, y = x + rng.uniform(-5, 5), y + rng.uniform(-5, 5)
+                points.append((x, y, None))
+            sent.append(time.perf_counter())
+            client.send(encoder.points(points))
+            await asyncio.sleep(0.016)
+            if stop.is_set():
+                break
+        client.send(encoder.end())
+
+
+def bench_rooms(rooms=100, bots=4, seconds=5, port=56200):
+    # N rooms with M bots each against a room server in its own process
+    server = subprocess.Popen(
+        [sys.executable, "rooms.py", "--host", "127.0.0.1", "--port", str(port),
+         "--turn-seconds", "3600"],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()  # "listening on ..."
+        idle_rss = process_rss(server.pid)
+        latencies = []
+
+        async def run():
+            stop = asyncio.Event()
+            tasks = []
+            for room in range(rooms):
+                sent = []
+                for _ in range(bots):
+                    tasks.append(asyncio.create_task(
+                        room_bot(port, f"room-{room}", sent, latencies, stop)))
+            await asyncio.sleep(seconds)
+            stop.set()
+            await asyncio.wait(tasks, timeout=5)
+
+        asyncio.run(run())
+        busy_rss = process_rss(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"{rooms} rooms x {bots} bots, {len(latencies):,} point batches delivered")
+    if latencies:
+        print(f"stroke delivery p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+        result("delivery_p99", percentile(latencies, 0.99) * 1000, "ms")
+    if idle_rss is not None and busy_rss is not None:
+        print(f"server memory per room: {(busy_rss - idle_rss) / rooms / 1024:.1f} KiB")
+        result("memory_per_room", (busy_rss - idle_rss) / rooms / 1024, "KiB")
+
+
+def drawing_signature(replay):
+    store = replay.store
+    return len(store.strokes), store.nbytes(), len(replay.redo)
+
+
+async def spectate(port, room, on_message):
+    import network
+    client = network.GameClient()
+    await client.connect('127.0.0.1', port)
+    client.send(network.encode_text(network.SPECTATE, room))
+    try:
+        async for payload in client.messages():
+            if on_message(payload):
+                break
+    finally:
+        await client.close()
+
+
+def bench_spectators(spectators=200, late=20, strokes=600, port=56300):
+    # One room with a drawer, a guesser and N spectators watching live, while
+    # late spectators join one at a time during a long turn. A late joiner is
+    # synced once its drawing matches the drawer's; it gets a keyframe and a
+    # short tail instead of every frame of the turn.
+    import network
+    from recording import StrokeReplay
+    server = subprocess.Popen(
+        [sys.executable, "rooms.py", "--host", "127.0.0.1", "--port", str(port),
+         "--turn-seconds", "3600"],
+        stdout=subprocess.PIPE, text=True)
+    live_bytes = [0] * spectators
+    checker = StrokeReplay()
+    joins = []
+    sent = [0]
+    truth = StrokeReplay()
+
+    async def watch(index):
+        # Live spectators only count bytes, so the harness keeps up with the
+        # server; the first one also decodes, to check what they were sent
+        if index == 0:
+            def on_message(payload):
+                live_bytes[0] += len(network.frame(payload))
+                checker.apply(payload)
+            await spectate(port, "spectated", on_message)
+            return
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(network.frame(network.encode_text(network.SPECTATE, "spectated")))
+        while data := await reader.read(65536):
+            live_bytes[index] += len(data)
+        writer.close()
+
+    async def late_join():
+        target = drawing_signature(truth)
+        replay = StrokeReplay()
+        received = [0]
+
+        def on_message(payload):
+            received[0] += len(payload)
+            replay.apply(payload)
+            return drawing_signature(replay) == target
+
+        start = time.perf_counter()
+        await spectate(port, "spectated", on_message)
+        joins.append((time.perf_counter() - start, received[0]))
+
+    async def run():
+        rng = random.Random(1)
+        players = [network.GameClient(), network.GameClient()]
+        drawers = asyncio.Queue()
+
+        async def play(client):
+            await client.connect('127.0.0.1', port)
+            client.send(network.encode_text(network.JOIN, "spectated"))
+            async for payload in client.messages():
+                if payload[0] == network.WORD:
+                    drawers.put_nowait(client)
+
+        readers = [asyncio.create_task(play(client)) for client in players]
+        drawer = await drawers.get()
+        watchers = [asyncio.create_task(watch(i)) for i in range(spectators)]
+        await asyncio.sleep(0.5)
+        encoder = network.StrokeEncoder()
+
+        def send(payload):
+            drawer.send(payload)
+            truth.apply(payload)
+            sent[0] += len(network.frame(payload))
+
+        x, y = 500.0, 350.0
+        for i in range(strokes):
+            if i % 7 == 6:
+                send(network.encode_simple(network.UNDO))
+            elif i % 23 == 22:
+                send(network.encode_simple(network.REDO))
+            elif i % 50 == 49:
+                send(network.encode_fill(0xFF27AE60, rng.uniform(0, 1000), rng.uniform(0, 700), 32))
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 700)
+            send(encoder.begin(0xFF2C3E50, 3, (x, y, None)))
+            for _ in range(4):
+                points = []
+                for _ in range(10):
+                    x, y = x + rng.uniform(-5, 5), y + rng.uniform(-5, 5)
+                    points.append((x, y, None))
+                send(encoder.points(points))
+            send(encoder.end())
+            await drawer.writer.drain()
+            if i % (strokes // late) == strokes // late - 1:
+                await asyncio.sleep(0.01)
+                await late_join()
+        await asyncio.sleep(0.5)
+        for task in watchers:
+            task.cancel()
+        for client in players:
+            await client.close()
+        await asyncio.gather(*readers, *watchers, return_exceptions=True)
+
+    try:
+        server.stdout.readline()  # "listening on ..."
+        asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+    times = [elapsed * 1000 for elapsed, _ in joins]
+    join_kb = sum(nbytes for _, nbytes in joins) / len(joins) / 1024
+    print(f"{spectators} live spectators, {len(joins)} late joiners over {strokes} strokes, "
+          f"whole turn {sent[0] / 1024:.0f} KiB")
+    print(f"join to synced p50 {percentile(times, 0.5):.1f} ms, max {max(times):.1f} ms, "
+          f"{join_kb:.1f} KiB per late joiner (last {joins[-1][1] / 1024:.1f} KiB)")
+    print(f"live spectators: {sum(live_bytes) / len(live_bytes) / 1024:.0f} KiB each, "
+          f"drawing matches the drawer's: {drawing_signature(checker) == drawing_signature(truth)}")
+    result("join_p50", percentile(times, 0.5), "ms")
+    result("join_max", max(times), "ms")
+    result("join_kib", join_kb, "KiB")
+    result("last_join_kib", joins[-1][1] / 1024, "KiB")
+
+
+def bench_bot(words=300, rooms=(1, 16, 64), rounds=5):
+    # Bot guessers against a template per word. Each room's drawing is a
+    # word's template drawn again with its points shifted a little; the bot
+    # should still name the word. Capturing a sketch runs on the GUI thread,
+    # classifying on the shared worker, with every room's request at once
+    # against one room at a time.
+    import threading
+    from PyQt6.QtCore import QPointF
+    from PictionaryGame import DrawingCanvas
+    from sketchbot import SketchClassifier, drawing_bounds, sketch_pixels
+    get_app()
+    rng = random.Random(1)
+    canvas = DrawingCanvas()
+    canvas.resize(DrawingCanvas.DEFAULT_SIZE)
+
+    def draw(shape, jitter):
+        canvas.clear()
+        for points in shape:
+            canvas.begin_stroke(QPointF(*points[0]))
+            for x, y in points[1:]:
+                canvas.extend_stroke(QPointF(x + rng.uniform(-jitter, jitter),
+                                             y + rng.uniform(-jitter, jitter)))
+            canvas.end_stroke()
+        return sketch_pixels(canvas.image, drawing_bounds(canvas.strokes, 1000, 700))
+
+    shapes = []
+    for _ in range(words):
+        shape = []
+        for _ in range(rng.randint(2, 5)):
+            x, y = rng.uniform(100, 900), rng.uniform(100, 600)
+            points = [(x, y)]
+            for _ in range(12):
+                x, y = x + rng.uniform(-40, 40), y + rng.uniform(-40, 40)
+                points.append((x, y))
+            shape.append(points)
+        shapes.append(shape)
+    classifier = SketchClassifier()
+    for word, shape in enumerate(shapes):
+        classifier.learn(f"word{word}", draw(shape, 0))
+    captures = []
+    drawings = []
+    for _ in range(max(rooms)):
+        word = rng.randrange(words)
+        draw(shapes[word], 4)
+        start = time.perf_counter()
+        pixels = sketch_pixels(canvas.image, drawing_bounds(canvas.strokes, 1000, 700))
+        captures.append(time.perf_counter() - start)
+        drawings.append((f"word{word}", pixels))
+
+    def classify(requests):
+        # Returns the answers once every request has one
+        answers = {}
+        done = threading.Event()
+
+        def answer(key, word, score):
+            answers[key] = word
+            if len(answers) == len(requests):
+                done.set()
+        for key, (_, pixels) in enumerate(requests):
+            classifier.guess(key, pixels, (), lambda word, score, key=key: answer(key, word, score))
+        done.wait()
+        return answers
+
+    classify(drawings[:1])  # templates are loaded and the matrix built
+    answers = classify(drawings)
+    accuracy = sum(answers[i] == word for i, (word, _) in enumerate(drawings)) / len(drawings)
+    print(f"{words} templates; sketch capture on the GUI thread p50 "
+          f"{percentile(captures, 0.5) * 1000:.2f} ms; top-1 on redrawn words {accuracy:.0%}")
+    result("capture", percentile(captures, 0.5) * 1000, "ms")
+    result("accuracy", accuracy * 100, "%", better="higher")
+    for count in rooms:
+        batched, single = [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            classify(drawings[:count])
+            batched.append((time.perf_counter() - start) / count)
+            start = time.perf_counter()
+            for drawing in drawings[:count]:
+                classify([drawing])
+            single.append((time.perf_counter() - start) / count)
+        print(f"{count:>3} rooms: batched {percentile(batched, 0.5) * 1000:.3f} ms per guess, "
+              f"one at a time {percentile(single, 0.5) * 1000:.3f} ms")
+        result(f"batched_{count}", percentile(batched, 0.5) * 1000, "ms")
+    classifier.stop()
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "strokes": bench_strokes,
+    "turn_cycle": bench_turn_cycle,
+    "get_word": bench_get_word,
+    "undo": bench_undo,
+    "turns": bench_turns,
+    "words": bench_words,
+    "wordpack": bench_wordpack,
+    "guesses": bench_guesses,
+    "turn_switch": bench_turn_switch,
+    "feedback": bench_feedback,
+    "export": bench_export,
+    "fill": bench_fill,
+    "layers": bench_layers,
+    "replay": bench_replay,
+    "bigboard": bench_bigboard,
+    "instrumentation": bench_instrumentation,
+    "rooms": bench_rooms,
+    "spectators": bench_spectators,
+    "bot": bench_bot,
+}
+
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if "PyQt6.QtCore" in sys.modules:
+        from PyQt6.QtCore import QT_VERSION_STR
+        info["qt"] = QT_VERSION_STR
+    return info
+
+
+def compare(results, baseline, tolerance):
+    # Prints every metric found in both runs; returns how many got worse by
+    # more than `tolerance` (a fraction) in their "better" direction
+    regressions = 0
+    print(f"{'metric':<44} {'baseline':>10} {'now':>10} {'change':>8}")
+    for bench, metrics in results.items():
+        for metric, now in metrics.items():
+            before = baseline.get(bench, {}).get(metric)
+            if before is None or not before["value"]:
+                continue
+            change = now["value"] / before["value"] - 1
+            worse = change > tolerance if now["better"] == "lower" else change < -tolerance
+            regressions += worse
+            print(f"{bench + '.' + metric:<44} {before['value']:>10.4g} {now['value']:>10.4g} "
+                  f"{change:>+8.1%} {now['unit']}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pictionary benchmarks")
+    parser.add_argument('names', nargs='*', metavar='BENCHMARK',
+                        help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--json', metavar='FILE', help="write the results to FILE")
+    parser.add_argument('--baseline', metavar='FILE',
+                        help="compare with the results of an earlier --json run")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="relative slowdown reported as a regression (default 0.25)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+    for name in args.names or list(BENCHMARKS):
+        print(f"== {name}")
+        _running = name
+        BENCHMARKS[name]()
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({"environment": environment(), "results": RESULTS}, file, indent=1)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        print("== compared with", args.baseline)
+        if compare(RESULTS, baseline, args.tolerance):
+            sys.exit(1)
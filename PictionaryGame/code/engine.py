@@ -0,0 +1,100 @@
+import math
+import random
+import time
+
+from matching import CORRECT, WRONG, matcher_for
+from wordbank import WordSampler
+from wordpack import WordPack
+
+
+def as_words(words):
+    # Memory-mapped packs are sampled in place; copying one would decode it all
+    if isinstance(words, (tuple, WordPack)):
+        return words
+    return tuple(words)
+
+
+class GameEngine:
+    # Turn, scoring, word and timing state for one game, with no Qt dependency.
+    # The clock is injectable so turns can be simulated without waiting.
+    __slots__ = ("words", "sampler", "clock", "rng", "turn_seconds", "scores",
+                 "current_player", "current_word", "matcher", "deadline", "turns_played")
+
+    def __init__(self, words=(), clock=time.monotonic, rng=None, turn_seconds=60, players=2):
+        # A tuple or word pack is kept as-is, so many engines can share one list
+        self.words = as_words(words)
+        self.clock = clock
+        self.rng = rng or random.Random()
+        # No word comes up twice until the whole list has been used
+        self.sampler = WordSampler(self.words, self.rng)
+        self.turn_seconds = turn_seconds
+        self.scores = [0] * players
+        self.current_player = 1  # Start with player 1
+        self.current_word = ""
+        self.matcher = None  # judges guesses for current_word
+        self.deadline = None  # None until the drawer starts the turn
+        self.turns_played = 0
+
+    def set_words(self, words):
+        self.words = as_words(words)
+        self.sampler = WordSampler(self.words, self.rng)
+
+    def draw_word(self):
+        return self.sampler.draw()
+
+    def score(self, player):
+        return self.scores[player - 1]
+
+    def new_turn(self):
+        self.current_word = self.draw_word()
+        self.matcher = matcher_for(self.current_word)
+        self.deadline = None
+        return self.current_word
+
+    def start_timer(self):
+        self.deadline = self.clock() + self.turn_seconds
+
+    def time_remaining(self):
+        if self.deadline is None:
+            return self.turn_seconds
+        return max(0, math.ceil(self.deadline - self.clock()))
+
+    def is_expired(self):
+        return self.deadline is not None and self.clock() >= self.deadline
+
+    def judge(self, guess):
+        # CORRECT, CLOSE or WRONG; see matching.py for what counts as which
+        if self.matcher is None:
+            return WRONG
+        return self.matcher.match(guess, self.words)
+
+    def is_correct(self, guess):
+        return self.judge(guess) == CORRECT
+
+    def guess(self, text):
+        # Returns True and ends the turn when the guess is right
+        if not self.is_correct(text):
+            return False
+        self.correct_guess()
+        return True
+
+    def correct_guess(self):
+        # Update the score of the current player, then move to the next turn
+        self.scores[self.current_player - 1] += 1
+        self.end_turn()
+
+    def expire(self):
+        self.end_turn()
+
+    def poll(self):
+        # Ends the turn if its deadline has passed; returns True if it did
+        if self.is_expired():
+            self.expire()
+            return True
+        return False
+
+    def end_turn(self):
+        # Switch turns between players and pick the next word
+        self.turns_played += 1
+        self.current_player = self.current_player % len(self.scores) + 1
+        self.new_turn()
@@ -0,0 +1,192 @@
+import os
+import re
+import struct
+import time
+import zlib
+
+from PyQt6.QtCore import QBuffer, QIODevice, QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageWriter
+
+# Encoding presets: (quality for JPEG/WebP, compression for PNG), both 0-100.
+# PNG compression trades encoding time for file size; the pixels are the same.
+# Qt maps it onto zlib levels, so anything under about 15 is stored raw.
+QUALITY_PRESETS = {
+    "Best": (95, 80),
+    "Balanced": (85, 50),
+    "Fast": (75, 20),
+}
+THUMBNAIL_SIZE = 256
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def supported_formats():
+    return {bytes(name).decode() for name in QImageWriter.supportedImageFormats()}
+
+
+def scaled_to_fit(image, size):
+    # Thumbnails keep the aspect ratio and fit in a size x size square
+    return image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def encode_png(image, compression=50):
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    writer = QImageWriter(buffer, b"png")
+    writer.setCompression(compression)
+    if not writer.write(image):
+        raise ValueError(writer.errorString())
+    return bytes(buffer.data())
+
+
+def png_chunks(data):
+    # (type, body) for every chunk of a PNG file
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG image")
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, kind = struct.unpack_from('>I4s', data, pos)
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def png_chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def write_apng(path, pngs, delay_ms):
+    # Streams encoded frames of the same size into an animated PNG. Each
+    # frame's compressed data is copied as it is: the first frame keeps its
+    # IDAT chunks and the rest become fdAT chunks behind a frame header.
+    delay_ms = max(0, min(0xFFFF, int(delay_ms)))
+    header = None
+    frames = sequence = 0
+    with open(path, 'wb') as file:
+        file.write(PNG_SIGNATURE)
+        for png in pngs:
+            chunks = list(png_chunks(png))
+            ihdr = next(body for kind, body in chunks if kind == b'IHDR')
+            if header is None:
+                header = ihdr
+                file.write(png_chunk(b'IHDR', ihdr))
+                # The frame count is patched in once every frame is written
+                control_at = file.tell()
+                file.write(png_chunk(b'acTL', struct.pack('>II', 0, 0)))
+            elif ihdr != header:
+                raise ValueError("animation frames must all have the same size and format")
+            width, height = struct.unpack_from('>II', ihdr)
+            file.write(png_chunk(b'fcTL', struct.pack('>IIIIIHHBB', sequence, width, height,
+                                                      0, 0, delay_ms, 1000, 0, 0)))
+            sequence += 1
+            for kind, body in chunks:
+                if kind != b'IDAT':
+                    continue
+                if frames == 0:
+                    file.write(png_chunk(b'IDAT', body))
+                else:
+                    file.write(png_chunk(b'fdAT', struct.pack('>I', sequence) + body))
+                    sequence += 1
+            frames += 1
+        if header is None:
+            raise ValueError("an animation needs at least one frame")
+        file.write(png_chunk(b'IEND', b''))
+        file.seek(control_at)
+        file.write(png_chunk(b'acTL', struct.pack('>II', frames, 0)))
+    return frames
+
+
+class ExportTask(QRunnable):
+    # Encodes one image on a pool thread. The image is a QImage snapshot taken
+    # on the GUI thread, so drawing can carry on while this runs.
+    def __init__(self, exporter, image, path, quality, compression, thumbnail):
+        super().__init__()
+        self.exporter = exporter
+        self.image = image
+        self.path = path
+        self.quality = quality
+        self.compression = compression
+        self.thumbnail = thumbnail
+
+    def run(self):
+        image = self.image
+        if self.thumbnail:
+            image = scaled_to_fit(image, self.thumbnail)
+        # The file extension picks the format; files without one are PNG
+        image_format = os.path.splitext(self.path)[1][1:].lower() or "png"
+        writer = QImageWriter(self.path, image_format.encode())
+        if image_format == "png":
+            writer.setCompression(self.compression)
+        else:
+            writer.setQuality(self.quality)
+        if writer.write(image):
+            self.exporter.finished.emit(self.path)
+        else:
+            self.exporter.failed.emit(self.path, writer.errorString())
+
+
+class AnimationTask(QRunnable):
+    # Writes an animated PNG. frames is any iterable of QImages and is consumed
+    # on the pool thread, so a generator can render each frame just before it
+    # is encoded and only one frame is held in memory at a time.
+    def __init__(self, exporter, frames, path, delay_ms, compression):
+        super().__init__()
+        self.exporter = exporter
+        self.frames = frames
+        self.path = path
+        self.delay_ms = delay_ms
+        self.compression = compression
+
+    def run(self):
+        try:
+            # One pixel format for every frame, so their PNG headers match
+            pngs = (encode_png(image.convertToFormat(QImage.Format.Format_RGB32), self.compression)
+                    for image in self.frames)
+            write_apng(self.path, pngs, self.delay_ms)
+        except (OSError, ValueError) as error:
+            self.exporter.failed.emit(self.path, str(error))
+        else:
+            self.exporter.finished.emit(self.path)
+
+
+class Exporter(QObject):
+    # Saves images in the background. finished and failed are emitted from the
+    # pool threads and reach GUI-thread slots as queued signals.
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None, threads=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(threads)
+        self.preset = "Balanced"
+
+    def export(self, image, path, thumbnail=None, preset=None):
+        # image must be a QImage; QPixmap can only be used on the GUI thread
+        quality, compression = QUALITY_PRESETS[preset or self.preset]
+        self.pool.start(ExportTask(self, image, path, quality, compression, thumbnail))
+
+    def export_animation(self, frames, path, delay_ms, preset=None):
+        compression = QUALITY_PRESETS[preset or self.preset][1]
+        self.pool.start(AnimationTask(self, frames, path, delay_ms, compression))
+
+    def wait(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+
+class TurnGallery:
+    # Auto-save mode: each finished turn's drawing and a thumbnail go into
+    # one folder per session, e.g. gallery/20250101-120000/turn-003-boat.png
+    def __init__(self, exporter, root="gallery"):
+        self.exporter = exporter
+        self.directory = os.path.join(root, time.strftime("%Y%m%d-%H%M%S"))
+        self.turns = 0
+
+    def save_turn(self, image, word):
+        if self.turns == 0:
+            os.makedirs(self.directory, exist_ok=True)
+        self.turns += 1
+        name = re.sub(r'[^a-z0-9]+', '-', word.lower()).strip('-') or "turn"
+        base = os.path.join(self.directory, f"turn-{self.turns:03d}-{name}")
+        self.exporter.export(image, base + ".png")
+        self.exporter.export(image, base + "-thumb.png", thumbnail=THUMBNAIL_SIZE)
@@ -0,0 +1,174 @@
+from bisect import bisect_right
+
+from PyQt6.QtCore import QRect
+from PyQt6.QtGui import QImage
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bucket fill on a 32-bit QImage, in place. The pixels are read and written
+# through QImage.bits() without copying the image, so a fill can run on the
+# canvas backing store, even while a QPainter is open on it. With numpy the
+# fill works on spans: every row of the image is split into runs of pixels
+# that match the seed colour, and only the runs connected to the seed's run
+# are visited, one Python step per run rather than per pixel. Without numpy a
+# plain scanline fill does the same job, only much more slowly.
+
+FORMATS = (QImage.Format.Format_ARGB32_Premultiplied, QImage.Format.Format_ARGB32,
+           QImage.Format.Format_RGB32)
+
+
+def stored_color(image, rgba):
+    # 0xAARRGGBB as the image stores it
+    if image.format() == QImage.Format.Format_RGB32:
+        return rgba | 0xFF000000
+    alpha = rgba >> 24
+    if alpha == 0xFF or image.format() == QImage.Format.Format_ARGB32:
+        return rgba
+    if alpha == 0:
+        return 0
+    red, green, blue = (rgba >> 16) & 0xFF, (rgba >> 8) & 0xFF, rgba & 0xFF
+    return (alpha << 24 | (red * alpha // 255) << 16 | (green * alpha // 255) << 8
+            | blue * alpha // 255)
+
+
+def pixel_view(image):
+    # The image's pixels as a height x width uint32 array sharing its memory
+    pointer = image.bits()
+    pointer.setsize(image.sizeInBytes())
+    rows = np.frombuffer(pointer, np.uint32).reshape(image.height(), image.bytesPerLine() // 4)
+    return rows[:, :image.width()]
+
+
+def matching(pixels, seed, tolerance):
+    # Pixels whose channels all lie within `tolerance` of the seed's. Most of
+    # a drawing is exactly the seed colour, so only the rest is compared
+    # channel by channel.
+    mask = pixels == seed
+    if tolerance > 0:
+        rows, columns = np.nonzero(~mask)
+        values = pixels[rows, columns]
+        close = np.ones(len(values), bool)
+        for shift in (0, 8, 16, 24):
+            channel = ((values >> shift) & 0xFF).astype(np.int16)
+            close &= np.abs(channel - ((int(seed) >> shift) & 0xFF)) <= tolerance
+        mask[rows, columns] = close
+    return mask
+
+
+def row_runs(mask):
+    # Runs of True in every row as row, start and end (exclusive) arrays in
+    # row-major order, and where each row's runs begin in them. The rows are
+    # laid end to end with a False between them, so a single pass over the
+    # flattened mask finds every run.
+    height, width = mask.shape
+    flat = np.zeros(height * (width + 1) + 1, bool)
+    flat[:-1].reshape(height, width + 1)[:, 1:] = mask
+    before, after = flat[:-1], flat[1:]
+    starts = np.flatnonzero(after > before) + 1
+    ends = np.flatnonzero(before > after) + 1
+    rows = starts // (width + 1)
+    row_starts = rows * (width + 1) + 1
+    offsets = np.searchsorted(rows, np.arange(height + 1))
+    return rows, starts - row_starts, ends - row_starts, offsets
+
+
+def span_fill(image, x, y, rgba, tolerance=0):
+    # Returns the filled area in device pixels, or None if nothing was filled
+    pixels = pixel_view(image)
+    height, width = pixels.shape
+    rows, starts, ends, offsets = row_runs(matching(pixels, pixels[y, x], tolerance))
+    start_list, end_list, offset_list = starts.tolist(), ends.tolist(), offsets.tolist()
+    # The seed's run, then every run overlapping a filled run on the row above
+    # or below (4-connected, so fills don't leak through diagonal gaps)
+    seed = bisect_right(start_list, x, offset_list[y], offset_list[y + 1]) - 1
+    row_list = rows.tolist()
+    seen = bytearray(len(start_list))
+    seen[seed] = 1
+    stack = [seed]
+    filled = []
+    while stack:
+        run = stack.pop()
+        filled.append(run)
+        start, end, row = start_list[run], end_list[run], row_list[run]
+        for neighbour in (row - 1, row + 1):
+            if 0 <= neighbour < height:
+                last = offset_list[neighbour + 1]
+                other = bisect_right(end_list, start, offset_list[neighbour], last)
+                while other < last and start_list[other] < end:
+                    if not seen[other]:
+                        seen[other] = 1
+                        stack.append(other)
+                    other += 1
+    # Paint the runs in one go over their bounding box: +1 where a run starts
+    # and -1 where it ends, summed along each row, marks the filled pixels
+    filled = np.array(filled)
+    run_rows, run_starts, run_ends = rows[filled], starts[filled], ends[filled]
+    top, bottom = run_rows.min(), run_rows.max() + 1
+    left, right = run_starts.min(), run_ends.max()
+    marks = np.zeros((bottom - top, right - left + 1), np.int8)
+    marks[run_rows - top, run_starts - left] = 1
+    marks[run_rows - top, run_ends - left] = -1
+    region = np.cumsum(marks, axis=1, dtype=np.int8)[:, :-1].astype(bool)
+    pixels[top:bottom, left:right][region] = stored_color(image, rgba)
+    return QRect(int(left), int(top), int(right - left), int(bottom - top))
+
+
+def scanline_fill(image, x, y, rgba, tolerance=0):
+    # The same fill a pixel at a time, for when numpy is not installed
+    width, height = image.width(), image.height()
+    stride = image.bytesPerLine() // 4
+    pointer = image.bits()
+    pointer.setsize(image.sizeInBytes())
+    pixels = memoryview(pointer).cast('I')
+    seed = pixels[y * stride + x]
+    seed_channels = [(seed >> shift) & 0xFF for shift in (0, 8, 16, 24)]
+
+    def matches(value):
+        if value == seed:
+            return True
+        return all(abs(((value >> shift) & 0xFF) - channel) <= tolerance
+                   for shift, channel in zip((0, 8, 16, 24), seed_channels))
+
+    color = stored_color(image, rgba)
+    seen = bytearray(width * height)
+    left_most, top_most, right_most, bottom_most = x, y, x, y
+    stack = [(x, y)]
+    while stack:
+        x, y = stack.pop()
+        if seen[y * width + x]:
+            continue
+        row = y * stride
+        left = x
+        while left > 0 and not seen[y * width + left - 1] and matches(pixels[row + left - 1]):
+            left -= 1
+        right = x
+        while right < width - 1 and not seen[y * width + right + 1] and matches(pixels[row + right + 1]):
+            right += 1
+        for column in range(left, right + 1):
+            seen[y * width + column] = 1
+            pixels[row + column] = color
+        left_most, right_most = min(left_most, left), max(right_most, right)
+        top_most, bottom_most = min(top_most, y), max(bottom_most, y)
+        for neighbour in (y - 1, y + 1):
+            if 0 <= neighbour < height:
+                above = neighbour * stride
+                inside = False
+                for column in range(left, right + 1):
+                    hit = not seen[neighbour * width + column] and matches(pixels[above + column])
+                    if hit and not inside:
+                        stack.append((column, neighbour))
+                    inside = hit
+    return QRect(left_most, top_most, right_most - left_most + 1, bottom_most - top_most + 1)
+
+
+def flood_fill(image, x, y, rgba, tolerance=0):
+    # Fill the area around device pixel (x, y) of a 32-bit image with `rgba`
+    # (0xAARRGGBB, as QColor.rgba() returns). Returns the filled QRect.
+    if image.format() not in FORMATS or not (0 <= x < image.width() and 0 <= y < image.height()):
+        return None
+    if np is None:
+        return scanline_fill(image, x, y, rgba, tolerance)
+    return span_fill(image, x, y, rgba, tolerance)
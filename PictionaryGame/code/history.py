@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+
+class UndoHistory:
+    # Raster checkpoints taken every `interval` strokes, keyed by the number of
+    # strokes they contain. Undo restores the nearest checkpoint at or below the
+    # target stroke count and replays the few strokes after it, so its cost is
+    # bounded by `interval` rather than by the length of the drawing.
+    # Checkpoints are kept in LRU order and evicted once they exceed `max_bytes`.
+    def __init__(self, interval=16, max_bytes=64 * 1024 * 1024):
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.checkpoints = OrderedDict()  # stroke count -> (snapshot, nbytes)
+        self.used_bytes = 0
+        self.redo_stack = []
+
+    def __len__(self):
+        return len(self.checkpoints)
+
+    def wants_checkpoint(self, count):
+        return count > 0 and count % self.interval == 0
+
+    def add_checkpoint(self, count, snapshot, nbytes):
+        self._discard(count)
+        self.checkpoints[count] = (snapshot, nbytes)
+        self.used_bytes += nbytes
+        self._evict()
+
+    def nearest(self, count):
+        # Latest checkpoint at or below `count`, or (0, None) for an empty canvas
+        best = 0
+        for key in self.checkpoints:
+            if best < key <= count:
+                best = key
+        if best == 0:
+            return 0, None
+        self.checkpoints.move_to_end(best)
+        return best, self.checkpoints[best][0]
+
+    def stroke_added(self, count):
+        # A new stroke forks history: redo is gone and checkpoints at or past
+        # the new count describe strokes that no longer exist
+        self.redo_stack.clear()
+        for key in [key for key in self.checkpoints if key >= count]:
+            self._discard(key)
+
+    def push_redo(self, stroke):
+        self.redo_stack.append(stroke)
+
+    def pop_redo(self):
+        return self.redo_stack.pop() if self.redo_stack else None
+
+    def clear_checkpoints(self):
+        # Snapshots stop matching the canvas once its backing store is resized
+        # or rescaled; undo then falls back to replaying from the start
+        self.checkpoints.clear()
+        self.used_bytes = 0
+
+    def clear(self):
+        self.clear_checkpoints()
+        self.redo_stack.clear()
+
+    def _discard(self, count):
+        entry = self.checkpoints.pop(count, None)
+        if entry is not None:
+            self.used_bytes -= entry[1]
+
+    def _evict(self):
+        while self.used_bytes > self.max_bytes and len(self.checkpoints) > 1:
+            _, (_, nbytes) = self.checkpoints.popitem(last=False)
+            self.used_bytes -= nbytes
@@ -0,0 +1,155 @@
+from PyQt6.QtCore import QRect, QRectF, Qt
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+# A canvas shown as a stack of layers, bottom first, each with its own
+# backing store: the background, the ink and an overlay for things that come
+# and go over the drawing. The screen shows a cached composite of the stack.
+# A layer that changes marks the area it touched, and only that area is
+# composited again before the next paint, so a cursor moving over the
+# overlay or a new background never redraws any ink.
+
+FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+# Past this many separate dirty rects, their bounding rect is composited
+MAX_RECTS = 16
+
+
+def new_image(size, ratio, color=Qt.GlobalColor.transparent):
+    # An image covering `size` logical pixels at `ratio` device pixels each;
+    # painters on it work in logical coordinates
+    image = QImage(round(size.width() * ratio), round(size.height() * ratio), FORMAT)
+    image.setDevicePixelRatio(ratio)
+    image.fill(color)
+    return image
+
+
+def device_rect(rect, ratio):
+    return QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
+
+
+def merge_rects(rects):
+    # Overlapping rects united, so no pixel is composited twice; too many
+    # rects become one. PyQt's QRegion can't hand its rects back, hence lists.
+    merged = []
+    for rect in rects:
+        i = 0
+        while i < len(merged):
+            if merged[i].intersects(rect):
+                rect = rect.united(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    if len(merged) > MAX_RECTS:
+        bounds = merged[0]
+        for rect in merged[1:]:
+            bounds = bounds.united(rect)
+        merged = [bounds]
+    return merged
+
+
+def flatten(image, background, size=None):
+    # An opaque copy of `image` over a solid colour, cropped to `size` logical
+    # pixels (default: all of it)
+    ratio = image.devicePixelRatio()
+    if size is None:
+        width, height = image.width(), image.height()
+    else:
+        width, height = round(size.width() * ratio), round(size.height() * ratio)
+    flat = QImage(width, height, QImage.Format.Format_RGB32)
+    flat.setDevicePixelRatio(ratio)
+    flat.fill(background)
+    painter = QPainter(flat)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return flat
+
+
+class Layer:
+    __slots__ = ("name", "image", "visible", "empty", "dirty")
+
+    def __init__(self, name, image):
+        self.name = name
+        self.image = image
+        self.visible = True
+        # Nothing drawn since the last clear, so compositing can skip it
+        self.empty = True
+        # Logical rects changed since the last composite
+        self.dirty = []
+
+    def bounds(self):
+        ratio = self.image.devicePixelRatio()
+        return QRect(0, 0, round(self.image.width() / ratio), round(self.image.height() / ratio))
+
+    def mark_dirty(self, rect=None):
+        # rect: logical QRect, or None for the whole layer
+        if rect is None:
+            self.dirty = [self.bounds()]
+        elif not rect.isEmpty():
+            self.dirty.append(rect)
+
+    def begin_paint(self):
+        self.empty = False
+        painter = QPainter(self.image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        return painter
+
+    def erase(self, rect):
+        painter = QPainter(self.image)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+        painter.fillRect(rect, Qt.GlobalColor.transparent)
+        painter.end()
+        self.mark_dirty(rect)
+
+    def clear(self):
+        self.image.fill(Qt.GlobalColor.transparent)
+        self.empty = True
+        self.mark_dirty()
+
+
+class LayerStack:
+    def __init__(self, names, size, ratio):
+        self.layers = [Layer(name, new_image(size, ratio)) for name in names]
+        self.by_name = {layer.name: layer for layer in self.layers}
+        self.composite = new_image(size, ratio, QColor("#FFFFFF"))
+        # Logical pixels composited again, for the repaint statistics
+        self.compositedPixels = 0
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def __iter__(self):
+        return iter(self.layers)
+
+    def resize(self, size, ratio):
+        # Layers keep their images; their owner redraws or replaces them
+        self.composite = new_image(size, ratio, QColor("#FFFFFF"))
+        for layer in self.layers:
+            layer.mark_dirty()
+
+    def flush(self):
+        # Composite every area a layer has changed since the last flush, one
+        # rect at a time and only from the layers with anything on them.
+        # Returns the rects that were composited.
+        rects = []
+        for layer in self.layers:
+            rects += layer.dirty
+            layer.dirty = []
+        if not rects:
+            return rects
+        rects = merge_rects(rects)
+        layers = [layer for layer in self.layers if layer.visible and not layer.empty]
+        ratio = self.composite.devicePixelRatio()
+        painter = QPainter(self.composite)
+        for rect in rects:
+            source = device_rect(rect, ratio)
+            target = QRectF(rect)
+            # The bottom layer replaces what was there, the rest blend over it
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+            if not layers:
+                painter.fillRect(target, Qt.GlobalColor.transparent)
+            for layer in layers:
+                painter.drawImage(target, layer.image, source)
+                painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+            self.compositedPixels += rect.width() * rect.height()
+        painter.end()
+        return rects
@@ -0,0 +1,234 @@
+import functools
+import re
+import unicodedata
+
+# Results of judging a guess
+WRONG = 0
+CLOSE = 1
+CORRECT = 2
+
+# Other accepted names for a word, by normalized form. Aliases work both ways:
+# guessing "airplane" for "Aeroplane" and "aeroplane" for "Airplane" both count.
+ALIASES = {
+    "aeroplane": ("airplane", "plane"),
+    "mobilephone": ("cellphone", "phone", "smartphone"),
+    "trousers": ("pants",),
+    "football": ("soccer", "soccerball"),
+    "tshirt": ("teeshirt", "tee"),
+    "sunglasses": ("shades",),
+    "hotdog": ("frankfurter",),
+    "laptop": ("notebook",),
+    "icecream": ("icecreamcone",),
+    "candybar": ("chocolatebar",),
+    "polarbear": ("whitebear",),
+}
+
+
+def _alias_table(aliases):
+    table = {}
+    for word, others in aliases.items():
+        group = (word,) + others
+        for name in group:
+            table.setdefault(name, set()).update(group)
+    return table
+
+
+_ALIAS_TABLE = _alias_table(ALIASES)
+
+
+# ASCII characters normalize() drops
+_ASCII_DROP = bytes(i for i in range(128) if not chr(i).isalnum())
+
+
+def normalize(text):
+    # Case, accents, spaces and punctuation don't matter: "Hot-dog " == "hotdog"
+    text = text.casefold()
+    if text.isascii():
+        return text.encode('ascii').translate(None, _ASCII_DROP).decode('ascii')
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(filter(str.isalnum, text))
+
+
+# Shortest singular plural_forms() will make, so "bus" never becomes "bu"
+MIN_STEM = 3
+
+
+def plural_forms(word):
+    # Simple English singular and plural forms; good enough for guessing games.
+    # Only endings that really make plurals are taken off: "tennis", "bus"
+    # and "kiss" have no singular.
+    forms = {word}
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        forms.add(word + 'es')
+    elif word.endswith('y') and len(word) > 1 and word[-2] not in 'aeiou':
+        forms.add(word[:-1] + 'ies')
+    else:
+        forms.add(word + 's')
+    if word.endswith('ies'):
+        stem = word[:-3] + 'y'
+    elif word.endswith(('sses', 'ches', 'shes', 'xes', 'zes')):
+        stem = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        stem = word[:-1]
+    else:
+        stem = None
+    if stem is not None and len(stem) >= MIN_STEM:
+        forms.add(stem)
+    return forms
+
+
+def plural_sources(text):
+    # Every word w that could have text in plural_forms(w)
+    sources = {text, text + 's', text + 'es'}
+    if text.endswith('y'):
+        sources.add(text[:-1] + 'ies')
+    if text.endswith('s'):
+        sources.add(text[:-1])
+    if text.endswith('es'):
+        sources.add(text[:-2])
+    if text.endswith('ies'):
+        sources.add(text[:-3] + 'y')
+    return sources
+
+
+def _char_pattern(char):
+    if char.isascii() and char.isalpha():
+        return b'[' + char.upper().encode('ascii') + char.lower().encode('ascii') + b']'
+    return re.escape(char.encode('utf-8'))
+
+
+def bank_pattern(names):
+    # Bytes regex finding, in UTF-8 text, any word that normalizes to one of
+    # `names`, which all start with the same letter as plural_sources() do:
+    # the letters in any case with spaces or punctuation between them.
+    # Accented letters aren't matched. Only the first letter is consumed and
+    # the rest is a lookahead, so matches may overlap.
+    gap = b'[^A-Za-z0-9\x80-\xff]*'
+    names = sorted(name for name in names if name)
+    rests = [b''.join(gap + _char_pattern(char) for char in name[1:]) for name in names]
+    return re.compile(_char_pattern(names[0][0]) + b'(?=' + b'|'.join(rests) + b')')
+
+
+def in_bank(text, words):
+    # Whether the normalized guess `text` is a form of some word of the bank.
+    # Only this one guess is looked up: a word pack is searched in place
+    # through its search() method, a word list is read through, and neither
+    # is copied. Pack answers are cached as every search reads the whole pack.
+    if hasattr(words, "search"):
+        return _in_pack(text, words)
+    return _in_words(text, words)
+
+
+def _in_words(text, words):
+    sources = plural_sources(text)
+    for word in words:
+        name = normalize(word)
+        if name in sources and text in plural_forms(name):
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=4096)
+def _in_pack(text, pack):
+    return _in_words(text, pack.search(bank_pattern(plural_sources(text))))
+
+
+def typo_limit(length):
+    # Edits still counted as the right answer; short words must be exact
+    if length <= 4:
+        return 0
+    if length <= 8:
+        return 1
+    return 2
+
+
+# Aliases shorter than this must be spelled exactly. Short ones such as
+# "plane" and "phone" are a typo away from unrelated words ("place", "shone").
+MIN_TYPO_ALIAS = 6
+
+
+def char_masks(word):
+    # Bit i of masks[c] is set where word[i] == c; used by edit_distance
+    masks = {}
+    for i, char in enumerate(word):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def edit_distance(masks, length, text):
+    # Levenshtein distance between a word (given by its char_masks and length)
+    # and text, using Myers' bit-parallel algorithm: one pass over text with a
+    # handful of integer operations per character, whatever the word length.
+    if length == 0:
+        return len(text)
+    full = (1 << length) - 1
+    top = 1 << (length - 1)
+    positive, negative = full, 0
+    score = length
+    for char in text:
+        equal = masks.get(char, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        h_positive = negative | (~(horizontal | positive) & full)
+        h_negative = positive & horizontal
+        if h_positive & top:
+            score += 1
+        elif h_negative & top:
+            score -= 1
+        h_positive = ((h_positive << 1) | 1) & full
+        h_negative = (h_negative << 1) & full
+        positive = h_negative | (~(vertical | h_positive) & full)
+        negative = h_positive & vertical
+    return score
+
+
+class GuessMatcher:
+    # Judges guesses for one word. Everything that depends only on the word is
+    # worked out once when the turn starts, so judging a guess is a set lookup
+    # plus, for near misses, a bit-parallel edit distance against a few forms.
+    # The word allows typos by its length and so do long aliases; short
+    # aliases like "tee" or "plane" must be exact.
+    __slots__ = ("word", "exact", "targets")
+
+    def __init__(self, word, aliases=None):
+        self.word = word
+        table = _ALIAS_TABLE if aliases is None else _alias_table(aliases)
+        base = normalize(word)
+        names = {base} | table.get(base, set())
+        # Exact matches: every name and its singular/plural forms
+        self.exact = frozenset(form for name in names for form in plural_forms(name))
+        # Typos are measured against the names themselves
+        self.targets = tuple(
+            (len(name), char_masks(name),
+             typo_limit(len(name)) if name == base or len(name) >= MIN_TYPO_ALIAS else 0)
+            for name in names)
+
+    def match(self, guess, words=()):
+        # `words` is the bank the word came from: a guess that is another of
+        # its words is never taken for a typo of this one ("plate" for "plane")
+        text = normalize(guess)
+        if not text:
+            return WRONG
+        if text in self.exact:
+            return CORRECT
+        result = WRONG
+        size = len(text)
+        for length, masks, typos in self.targets:
+            # The length difference alone is a lower bound on the distance
+            if abs(length - size) > typos + 1:
+                continue
+            distance = edit_distance(masks, length, text)
+            if distance <= typos:
+                if not in_bank(text, words):
+                    return CORRECT
+                result = CLOSE
+            elif distance == typos + 1:
+                result = CLOSE
+        return result
+
+
+@functools.lru_cache(maxsize=4096)
+def matcher_for(word):
+    # Matchers never change once built, so every turn and every room that
+    # draws the same word can share one
+    return GuessMatcher(word)
@@ -0,0 +1,363 @@
+import struct
+import zlib
+
+# Wire format: every message is a varint length followed by a payload whose
+# first byte is the message type. Stroke coordinates are sent as zigzag varint
+# deltas in quarter-pixel units, so a typical point costs two or three bytes.
+# The codec is needed by every game, the asyncio transport below only by
+# networked ones, so asyncio is imported where it is used rather than here.
+
+STROKE_BEGIN = 1
+STROKE_POINTS = 2
+STROKE_END = 3
+CLEAR = 4
+UNDO = 5
+REDO = 6
+GUESS = 7
+GUESS_WRONG = 8
+GUESS_CORRECT = 9
+TIME_EXPIRED = 10
+TURN = 11
+JOIN = 12  # room name, sent first when talking to a room server
+WORD = 13  # the word to draw, sent by a room server to the drawer only
+GUESS_CLOSE = 14  # a wrong guess that was nearly right
+FILL = 15  # bucket fill: colour, seed point and tolerance
+SPECTATE = 16  # room name, sent first to watch a room without playing
+KEYFRAME = 17  # zlib-compressed drawing messages that redraw the turn so far
+
+# Everything that changes the drawing, in the order the drawer does it
+DRAWING_MESSAGES = (STROKE_BEGIN, STROKE_POINTS, STROKE_END, CLEAR, UNDO, REDO, FILL)
+
+TEXT_MESSAGES = (GUESS, GUESS_WRONG, GUESS_CORRECT, TIME_EXPIRED, JOIN, WORD, GUESS_CLOSE,
+                 SPECTATE)
+
+QUANTUM = 4  # sub-pixel steps per logical pixel
+HAS_PRESSURE = 1
+DEFAULT_PORT = 5555
+# Largest payload accepted from a peer, and largest a keyframe may inflate to;
+# a keyframe of a busy drawing is a few hundred kilobytes
+MAX_FRAME = 4 * 1024 * 1024
+MAX_KEYFRAME = 8 * MAX_FRAME
+# Bytes a peer may leave unread before the server gives up on it; enough for
+# a late joiner's keyframe and the turn so far several times over
+MAX_WRITE_BUFFER = 4 * MAX_FRAME
+
+
+class ProtocolError(ValueError):
+    # A peer sent something that isn't a valid message. Whoever reads from
+    # the network catches it and drops the message or the connection.
+    pass
+
+
+def zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def encode_varint(value, out):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def frame(payload):
+    out = bytearray()
+    encode_varint(len(payload), out)
+    out += payload
+    return bytes(out)
+
+
+def split_frames(data):
+    # The payloads of a run of frames
+    pos = 0
+    while pos < len(data):
+        length, pos = decode_varint(data, pos)
+        yield data[pos:pos + length]
+        pos += length
+
+
+async def read_frame(reader):
+    length = shift = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+        if shift > 28:
+            raise ProtocolError("frame length too long")
+    if length > MAX_FRAME:
+        raise ProtocolError(f"frame of {length} bytes")
+    return await reader.readexactly(length)
+
+
+def send(writer, data):
+    # Servers write to peers through this. A peer that has stopped reading
+    # would make its buffer grow without end, so once it holds more than
+    # MAX_WRITE_BUFFER the connection is dropped along with what it holds;
+    # the peer's read loop then ends as for any other disconnect. Returns
+    # whether `data` was queued.
+    transport = writer.transport
+    if transport.is_closing():
+        return False
+    if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+        transport.abort()
+        return False
+    writer.write(data)
+    return True
+
+
+def encode_text(kind, text):
+    return bytes([kind]) + text.encode('utf-8')
+
+
+def encode_simple(kind):
+    return bytes([kind])
+
+
+def encode_turn(drawer, scores, seconds):
+    # drawer numbers players from 1, in the order of scores. The first two
+    # scores go before the seconds and any others after, so two-player
+    # messages keep the layout older recordings have.
+    scores = list(scores) + [0] * (2 - len(scores))
+    out = bytearray([TURN])
+    for value in [drawer] + scores[:2] + [seconds] + scores[2:]:
+        encode_varint(value, out)
+    return bytes(out)
+
+
+def encode_fill(color, x, y, tolerance):
+    out = bytearray([FILL])
+    out += struct.pack('>I', color)
+    encode_varint(zigzag(_quantize(x)), out)
+    encode_varint(zigzag(_quantize(y)), out)
+    out.append(tolerance)
+    return bytes(out)
+
+
+def decode_keyframe(data):
+    inflater = zlib.decompressobj()
+    data = inflater.decompress(data, MAX_KEYFRAME)
+    if inflater.unconsumed_tail:
+        raise ProtocolError("keyframe too large")
+    return list(split_frames(data))
+
+
+def encode_keyframe(payloads):
+    # Drawing messages that replace whatever the receiver has drawn. They
+    # are framed as on the wire and compressed as one block.
+    return bytes([KEYFRAME]) + zlib.compress(b''.join(frame(payload) for payload in payloads))
+
+
+def _quantize(value):
+    return int(round(value * QUANTUM))
+
+
+def _pressure_byte(pressure):
+    return max(0, min(255, int(round(pressure * 255))))
+
+
+class StrokeEncoder:
+    # Turns canvas stroke events into payloads. Points are encoded relative to
+    # the previous point of the same stroke, so state lives between calls.
+    def __init__(self):
+        self.last = (0, 0)
+        self.pressure = False
+
+    def begin(self, color, width, point):
+        x, y, pressure = point
+        self.pressure = pressure is not None
+        self.last = (_quantize(x), _quantize(y))
+        out = bytearray([STROKE_BEGIN])
+        out += struct.pack('>I', color)
+        encode_varint(_quantize(width), out)
+        out.append(HAS_PRESSURE if self.pressure else 0)
+        encode_varint(zigzag(self.last[0]), out)
+        encode_varint(zigzag(self.last[1]), out)
+        if self.pressure:
+            out.append(_pressure_byte(pressure))
+        return bytes(out)
+
+    def points(self, points):
+        # One message per canvas flush, i.e. one batch per frame
+        out = bytearray([STROKE_POINTS])
+        encode_varint(len(points), out)
+        lx, ly = self.last
+        for x, y, pressure in points:
+            qx, qy = _quantize(x), _quantize(y)
+            encode_varint(zigzag(qx - lx), out)
+            encode_varint(zigzag(qy - ly), out)
+            if self.pressure:
+                out.append(_pressure_byte(pressure))
+            lx, ly = qx, qy
+        self.last = (lx, ly)
+        return bytes(out)
+
+    def end(self):
+        return encode_simple(STROKE_END)
+
+
+class MessageDecoder:
+    # Inverse of StrokeEncoder and the encode_* helpers. Returns (kind, value)
+    # where value depends on the message type.
+    def __init__(self):
+        self.last = (0, 0)
+        self.pressure = False
+
+    def decode(self, payload):
+        # Raises ProtocolError for a payload that is empty, cut short or not
+        # what its type says; the decoder's state is then left as it was
+        try:
+            return self._decode(payload)
+        except (IndexError, OverflowError, struct.error, UnicodeDecodeError, zlib.error) as error:
+            kind = payload[0] if payload else None
+            raise ProtocolError(f"bad message of type {kind}: {error}") from error
+
+    def _decode(self, payload):
+        kind = payload[0]
+        if kind == STROKE_BEGIN:
+            color = struct.unpack_from('>I', payload, 1)[0]
+            width, pos = decode_varint(payload, 5)
+            pressure = bool(payload[pos] & HAS_PRESSURE)
+            x, pos = decode_varint(payload, pos + 1)
+            y, pos = decode_varint(payload, pos)
+            last = (unzigzag(x), unzigzag(y))
+            point = (last[0] / QUANTUM, last[1] / QUANTUM, payload[pos] / 255 if pressure else None)
+            self.pressure, self.last = pressure, last
+            return kind, (color, width / QUANTUM, point)
+        if kind == STROKE_POINTS:
+            count, pos = decode_varint(payload, 1)
+            lx, ly = self.last
+            points = []
+            for _ in range(count):
+                dx, pos = decode_varint(payload, pos)
+                dy, pos = decode_varint(payload, pos)
+                lx += unzigzag(dx)
+                ly += unzigzag(dy)
+                pressure = None
+                if self.pressure:
+                    pressure = payload[pos] / 255
+                    pos += 1
+                points.append((lx / QUANTUM, ly / QUANTUM, pressure))
+            self.last = (lx, ly)
+            return kind, points
+        if kind == FILL:
+            color = struct.unpack_from('>I', payload, 1)[0]
+            x, pos = decode_varint(payload, 5)
+            y, pos = decode_varint(payload, pos)
+            return kind, (color, unzigzag(x) / QUANTUM, unzigzag(y) / QUANTUM, payload[pos])
+        if kind == KEYFRAME:
+            return kind, decode_keyframe(payload[1:])
+        if kind in TEXT_MESSAGES:
+            return kind, payload[1:].decode('utf-8')
+        if kind == TURN:
+            values = []
+            pos = 1
+            while pos < len(payload) or len(values) < 4:
+                value, pos = decode_varint(payload, pos)
+                values.append(value)
+            drawer, score1, score2, seconds, *scores = values
+            return kind, (drawer, (score1, score2, *scores), seconds)
+        return kind, None
+
+
+class RelayServer:
+    # Hub for one game: every frame a client sends is forwarded unchanged to
+    # all other clients. The host's game decides what the messages mean.
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.server = None
+        self.clients = set()
+        self.handlers = set()
+
+    async def start(self):
+        import asyncio
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        import asyncio
+        for writer in list(self.clients):
+            writer.close()
+        # Closing the transports ends each handler's read loop; let them finish
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        import asyncio
+        self.clients.add(writer)
+        self.handlers.add(asyncio.current_task())
+        try:
+            while True:
+                data = frame(await read_frame(reader))
+                for client in self.clients:
+                    if client is not writer:
+                        send(client, data)
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+
+class GameClient:
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host, port):
+        import asyncio
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    def send(self, payload):
+        self.writer.write(frame(payload))
+
+    async def messages(self):
+        # Ends when the connection closes; an oversized frame raises
+        # ProtocolError
+        import asyncio
+        try:
+            while True:
+                yield await read_frame(self.reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    parser = argparse.ArgumentParser(description="Pictionary relay server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    asyncio.run(RelayServer(args.host, args.port).serve_forever())
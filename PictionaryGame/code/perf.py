@@ -0,0 +1,124 @@
+import csv
+import json
+import time
+from array import array
+
+# Optional timing instrumentation. Hot paths test `metrics.enabled` before
+# touching the clock, so leaving it off costs one attribute lookup. When on,
+# every sample goes into a fixed-size ring buffer: recording never allocates
+# and a long-running kiosk keeps only the most recent samples.
+
+INPUT_LATENCY = "input_latency_ms"  # input point queued -> painted on screen
+PAINT = "paint_ms"                  # one canvas paintEvent
+TURN = "turn_ms"                    # end of a turn -> next turn ready
+GUESS = "guess_ms"                  # judging one guess
+MOVES = "move_events"               # timestamps of pointer moves, for the rate
+
+RING_SIZE = 4096
+
+
+class RingBuffer:
+    __slots__ = ("samples", "size", "count", "index")
+
+    def __init__(self, size=RING_SIZE):
+        self.samples = array('d', bytes(8 * size))
+        self.size = size
+        self.count = 0
+        self.index = 0
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+
+    def values(self):
+        # Oldest first
+        if self.count < self.size:
+            return self.samples[:self.count].tolist()
+        return (self.samples[self.index:] + self.samples[:self.index]).tolist()
+
+    def clear(self):
+        self.count = 0
+        self.index = 0
+
+
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[round(last * 0.5)],
+        "p90": ordered[round(last * 0.9)],
+        "p99": ordered[round(last * 0.99)],
+        "max": ordered[-1],
+    }
+
+
+class Metrics:
+    def __init__(self, size=RING_SIZE):
+        self.enabled = False
+        self.size = size
+        self.channels = {}
+
+    def channel(self, name):
+        ring = self.channels.get(name)
+        if ring is None:
+            ring = self.channels[name] = RingBuffer(self.size)
+        return ring
+
+    def record(self, name, value):
+        self.channel(name).append(value)
+
+    def record_since(self, name, start):
+        # Milliseconds from a time.perf_counter() reading until now
+        self.channel(name).append((time.perf_counter() - start) * 1000)
+
+    def mark(self, name, now=None):
+        self.channel(name).append(time.perf_counter() if now is None else now)
+
+    def rate(self, name, window=1.0):
+        # Marks per second over the last `window` seconds
+        ring = self.channels.get(name)
+        if ring is None:
+            return 0.0
+        since = time.perf_counter() - window
+        return sum(1 for stamp in ring.values() if stamp >= since) / window
+
+    def summary(self):
+        stats = {name: summarize(ring.values()) for name, ring in self.channels.items()
+                 if name != MOVES}
+        stats[MOVES] = {"per_second": self.rate(MOVES)}
+        return stats
+
+    def clear(self):
+        for ring in self.channels.values():
+            ring.clear()
+
+    def dump(self, path):
+        # .json gets the summary and every sample; anything else is written
+        # as CSV with one metric,value row per sample
+        if path.lower().endswith('.json'):
+            data = {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "summary": self.summary(),
+                "samples": {name: ring.values() for name, ring in self.channels.items()},
+            }
+            with open(path, 'w') as file:
+                json.dump(data, file, indent=1)
+            return
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["metric", "value"])
+            for name, ring in self.channels.items():
+                for value in ring.values():
+                    writer.writerow([name, f"{value:.6f}"])
+
+
+# The application's instrumentation, off unless asked for
+metrics = Metrics()
@@ -0,0 +1,257 @@
+import os
+import time
+
+import network
+from strokes import Fill, StrokeStore
+
+# Game recordings are append-only logs of the same payloads the network
+# protocol sends. After the magic bytes, each record is framed as on the wire
+# (varint length) and holds a varint of milliseconds since the previous record
+# followed by the payload: strokes, fills, clears and undos, TURN with the
+# scores, WORD, guesses and their results.
+
+MAGIC = b'PREC\x01'
+CHUNK_BYTES = 64 * 1024
+
+
+class GameRecorder:
+    # Events are collected in memory and written out a chunk at a time, so
+    # recording costs one small append per event on the GUI thread
+    def __init__(self, path, clock=time.monotonic, chunk_bytes=CHUNK_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.clock = clock
+        self.start = clock()
+        self.elapsed_ms = 0
+        self.chunk_bytes = chunk_bytes
+        self.buffer = bytearray()
+
+    def record(self, payload):
+        # Deltas are taken from a running total so rounding never drifts
+        elapsed_ms = round((self.clock() - self.start) * 1000)
+        record = bytearray()
+        network.encode_varint(max(0, elapsed_ms - self.elapsed_ms), record)
+        record += payload
+        self.elapsed_ms = max(elapsed_ms, self.elapsed_ms)
+        network.encode_varint(len(record), self.buffer)
+        self.buffer += record
+        if len(self.buffer) >= self.chunk_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_records(path):
+    # Yields (seconds, payload). A record cut short at the end of the file,
+    # e.g. by a crash mid-write, is ignored.
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a game recording")
+    pos = len(MAGIC)
+    elapsed_ms = 0
+    while pos < len(data):
+        try:
+            length, start = network.decode_varint(data, pos)
+        except IndexError:
+            return
+        end = start + length
+        if end > len(data):
+            return
+        try:
+            delta, body = network.decode_varint(data, start)
+        except IndexError:
+            return
+        if body > end:
+            raise network.ProtocolError(f"{path}: record at byte {pos} is too short for its time")
+        elapsed_ms += delta
+        yield elapsed_ms / 1000, data[body:end]
+        pos = end
+
+
+class Turn:
+    # One turn of a recording: the events from its TURN record up to the next
+    __slots__ = ("number", "word", "drawer", "scores", "events")
+
+    def __init__(self, number):
+        self.number = number
+        self.word = None
+        self.drawer = None
+        self.scores = None
+        self.events = []  # (seconds, payload)
+
+    @property
+    def start(self):
+        return self.events[0][0] if self.events else 0.0
+
+    @property
+    def end(self):
+        return self.events[-1][0] if self.events else 0.0
+
+    def title(self):
+        word = self.word or "?"
+        return f"Turn {self.number}: {word}"
+
+
+class GameLog:
+    # A recording split into turns. The turn list doubles as the replay
+    # checkpoints: the canvas is cleared every turn, so any turn's drawing
+    # can be rebuilt from that turn's events alone.
+    def __init__(self, path):
+        self.path = path
+        self.turns = []
+        decoder = network.MessageDecoder()
+        turn = Turn(0)
+        for seconds, payload in read_records(path):
+            if not payload:
+                raise network.ProtocolError(f"{path}: empty record at {seconds:.3f} s")
+            kind = payload[0]
+            if kind == network.TURN:
+                if turn.events:
+                    self.turns.append(turn)
+                turn = Turn(len(self.turns) + 1)
+                turn.drawer, turn.scores, _ = decoder.decode(payload)[1]
+            elif kind == network.WORD or (kind in (network.GUESS_CORRECT, network.TIME_EXPIRED)
+                                          and turn.word is None):
+                # Guests never receive WORD; the end of the turn tells them
+                turn.word = decoder.decode(payload)[1]
+            turn.events.append((seconds, payload))
+        if turn.events:
+            self.turns.append(turn)
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __getitem__(self, index):
+        return self.turns[index]
+
+
+class StrokeReplay:
+    # Steps a turn's strokes forward in time without drawing anything. Undo
+    # and redo work on the stroke list the same way the canvas does. Without
+    # a turn, payloads are fed in one at a time with apply().
+    __slots__ = ("events", "index", "store", "redo", "decoder")
+
+    def __init__(self, turn=None):
+        self.events = [] if turn is None else turn.events
+        self.index = 0
+        self.store = StrokeStore()
+        self.redo = []
+        self.decoder = network.MessageDecoder()
+
+    def done(self):
+        return self.index >= len(self.events)
+
+    def advance(self, seconds=None):
+        # Applies every event up to `seconds` (default: all of them). Returns
+        # True if strokes were taken away, i.e. a drawing of the earlier strokes
+        # can't simply be added to.
+        removed = False
+        while self.index < len(self.events):
+            when, payload = self.events[self.index]
+            if seconds is not None and when > seconds:
+                break
+            self.index += 1
+            removed = self.apply(payload) or removed
+        return removed
+
+    def apply(self, payload):
+        # One payload; returns True if it took strokes away
+        store = self.store
+        kind = payload[0]
+        if kind == network.STROKE_BEGIN:
+            color, width, point = self.decoder.decode(payload)[1]
+            store.begin_stroke(color, width, *point)
+        elif kind == network.STROKE_POINTS:
+            for x, y, pressure in self.decoder.decode(payload)[1]:
+                store.add_point(x, y, pressure)
+        elif kind == network.STROKE_END:
+            if store.end_stroke() is not None:
+                self.redo.clear()
+        elif kind == network.FILL:
+            store.add_fill(*self.decoder.decode(payload)[1])
+            self.redo.clear()
+        elif kind == network.CLEAR:
+            removed = bool(store.strokes)
+            store.clear()
+            self.redo.clear()
+            return removed
+        elif kind == network.UNDO and store.strokes:
+            self.redo.append(store.strokes.pop())
+            return True
+        elif kind == network.REDO and self.redo:
+            store.strokes.append(self.redo.pop())
+        elif kind == network.KEYFRAME:
+            store.clear()
+            self.redo.clear()
+            for inner in self.decoder.decode(payload)[1]:
+                self.apply(inner)
+            return True
+        return False
+
+
+def drawing_payloads(store, redo=()):
+    # Messages that draw `store` on a blank canvas. The strokes in `redo` (a
+    # redo stack, next redo last) are then drawn and undone again, so REDO
+    # brings them back just as it would have on the original canvas.
+    encoder = network.StrokeEncoder()
+    payloads = []
+    for stroke in list(store) + list(reversed(redo)):
+        if isinstance(stroke, Fill):
+            payloads.append(network.encode_fill(stroke.color, stroke.x, stroke.y, stroke.tolerance))
+            continue
+        pressures = stroke.pressures
+        points = [(x, y, None if pressures is None else pressures[i])
+                  for i, (x, y) in enumerate(stroke.xy())]
+        payloads.append(encoder.begin(stroke.color, stroke.width, points[0]))
+        payloads.append(encoder.points(points[1:]))
+        payloads.append(encoder.end())
+    payloads += [network.encode_simple(network.UNDO)] * len(redo)
+    return payloads
+
+
+def strokes_at(turn, seconds=None):
+    # The turn's strokes as they stood at `seconds` (default: the end of the
+    # turn). The canvas is cleared every turn, so this never looks further
+    # back than the start of the turn.
+    replay = StrokeReplay(turn)
+    replay.advance(seconds)
+    return replay.store
+
+
+def apply_to_canvas(canvas, decoder, payload):
+    # Plays one payload onto a DrawingCanvas; used for network play and replay.
+    # Returns the decoded (kind, value) so callers can handle everything else.
+    kind, value = decoder.decode(payload)
+    if kind == network.STROKE_BEGIN:
+        canvas.apply_remote_begin(*value)
+    elif kind == network.STROKE_POINTS:
+        canvas.apply_remote_points(value)
+    elif kind == network.STROKE_END:
+        canvas.apply_remote_end()
+    elif kind == network.FILL:
+        canvas.apply_fill(*value)
+    elif kind == network.CLEAR:
+        canvas.clear()
+    elif kind == network.UNDO:
+        canvas.undo()
+    elif kind == network.REDO:
+        canvas.redo()
+    elif kind == network.KEYFRAME:
+        canvas.clear()
+        for inner in value:
+            apply_to_canvas(canvas, decoder, inner)
+    return kind, value
@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+
+import network
+from engine import GameEngine, as_words
+from matching import CLOSE, CORRECT
+from recording import StrokeReplay, drawing_payloads
+from timers import DeadlineScheduler
+from wordbank import load_words
+from wordpack import load_pack
+
+# A keyframe is never rebuilt for less than this many bytes of drawing
+KEYFRAME_MIN_BYTES = 4096
+
+
+class DrawingFeed:
+    # The current turn's drawing as sent to late joiners: one keyframe that
+    # redraws everything up to some point, plus the frames received since.
+    # Once the frames since the last keyframe add up to more than the
+    # keyframe itself, a new one is built from the vector strokes, so a
+    # joiner never downloads much more than twice the compressed drawing,
+    # however long the turn has been going, and rebuilding costs no more
+    # than the frames it replaces. Both are encoded once and the same bytes
+    # objects go to every joiner.
+    __slots__ = ("keyframe", "tail", "tail_bytes", "replay")
+
+    def __init__(self):
+        self.keyframe = None  # framed KEYFRAME message, or None for a blank canvas
+        self.tail = []
+        self.tail_bytes = 0
+        self.replay = StrokeReplay()
+
+    def frames(self):
+        return self.tail if self.keyframe is None else [self.keyframe] + self.tail
+
+    def append(self, data, payload):
+        # Raises ProtocolError, with nothing added, for a payload that
+        # doesn't decode
+        self.replay.apply(payload)
+        self.tail.append(data)
+        self.tail_bytes += len(data)
+        keyframe_bytes = 0 if self.keyframe is None else len(self.keyframe)
+        # Only between strokes, so the keyframe never holds half of one
+        if (self.replay.store.current is None
+                and self.tail_bytes >= max(KEYFRAME_MIN_BYTES, keyframe_bytes)):
+            self.compact()
+
+    def compact(self):
+        store, redo = self.replay.store, self.replay.redo
+        self.keyframe = None
+        if store.strokes or redo:
+            self.keyframe = network.frame(network.encode_keyframe(drawing_payloads(store, redo)))
+        self.tail = []
+        self.tail_bytes = 0
+
+    def reset(self):
+        self.keyframe = None
+        self.tail = []
+        self.tail_bytes = 0
+        self.replay = StrokeReplay()
+
+
+class Room:
+    # Everything one game needs on the server. Rooms are small and numerous,
+    # so their state is kept in __slots__. The engine picks words, judges
+    # guesses and times turns; players come and go, so the room keeps the
+    # turn order and the scores itself, by member.
+    __slots__ = ("name", "engine", "members", "scores", "spectators", "outbox", "drawer",
+                 "feed", "timer")
+
+    def __init__(self, name, words, clock):
+        self.name = name
+        self.engine = GameEngine(words, clock=clock)
+        self.members = []  # stream writers, in join order; they take turns drawing in it
+        self.scores = {}  # member: points
+        self.spectators = []  # stream writers that only watch
+        self.outbox = []  # frames not yet sent to the spectators
+        self.drawer = None
+        # The current turn's drawing, replayed to late joiners
+        self.feed = DrawingFeed()
+        self.timer = None  # entry in the server's shared DeadlineScheduler
+
+    def turn_frame(self):
+        # TURN for the turn being played, with every member's score and the
+        # time left, or None between turns
+        if self.drawer is None:
+            return None
+        return network.frame(network.encode_turn(
+            self.members.index(self.drawer) + 1, [self.scores[member] for member in self.members],
+            self.engine.time_remaining()))
+
+    def broadcast(self, data, skip=None):
+        # `data` is encoded once and the same bytes object goes to every
+        # member. Spectators get it with the room's next flush_spectators().
+        for member in self.members:
+            if member is not skip:
+                network.send(member, data)
+        if self.spectators:
+            self.outbox.append(data)
+
+    def flush_spectators(self):
+        # Everything broadcast since the last flush, joined into one bytes
+        # object that every spectator shares: one write per spectator per
+        # flush, however many frames the drawer sent meanwhile
+        if self.outbox:
+            data = b''.join(self.outbox)
+            self.outbox.clear()
+            for spectator in self.spectators:
+                network.send(spectator, data)
+
+
+class RoomServer:
+    # Hosts many independent games on one event loop. Clients send JOIN with a
+    # room name first; the server then runs that room's turns, judges guesses
+    # and fans the drawer's strokes out to everyone else in the room. Clients
+    # that send SPECTATE instead get everything a guesser sees, but anything
+    # they send is ignored and they never count towards a game.
+    def __init__(self, words, host='127.0.0.1', port=network.DEFAULT_PORT, turn_seconds=60):
+        self.words = as_words(words)  # shared by every room
+        self.host = host
+        self.port = port
+        self.turn_seconds = turn_seconds
+        self.rooms = {}
+        self.server = None
+        self.handlers = set()
+        self.loop = None
+        # Rooms with frames waiting for their spectators, flushed once per
+        # pass of the event loop
+        self.unflushed = set()
+        # Every room's turn deadline goes through one scheduler and one loop timer
+        self.scheduler = None
+        self.wakeup = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.scheduler = DeadlineScheduler(self.loop.time, self.arm_wakeup)
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def arm_wakeup(self, when):
+        if self.wakeup is not None:
+            self.wakeup.cancel()
+            self.wakeup = None
+        if when is not None:
+            self.wakeup = self.loop.call_at(when, self.scheduler.run_due)
+
+    async def close(self):
+        for room in self.rooms.values():
+            self.scheduler.cancel(room.timer)
+            for member in room.members + room.spectators:
+                member.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def room(self, name):
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.rooms[name] = Room(name, self.words, self.loop.time)
+            room.engine.turn_seconds = self.turn_seconds
+        return room
+
+    async def _handle(self, reader, writer):
+        self.handlers.add(asyncio.current_task())
+        room = None
+        spectating = False
+        try:
+            kind, name = network.MessageDecoder().decode(await network.read_frame(reader))
+            if kind not in (network.JOIN, network.SPECTATE):
+                return
+            room = self.room(name)
+            if kind == network.SPECTATE:
+                spectating = True
+                self.spectate(room, writer)
+                while True:
+                    await network.read_frame(reader)
+            self.join(room, writer)
+            while True:
+                self.dispatch(room, writer, await network.read_frame(reader))
+        except (asyncio.IncompleteReadError, ConnectionError, network.ProtocolError):
+            pass
+        finally:
+            if spectating:
+                self.stop_spectating(room, writer)
+            elif room is not None:
+                self.leave(room, writer)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+    def join(self, room, writer):
+        # Someone joining mid-turn gets the turn and its drawing so far
+        room.members.append(writer)
+        room.scores[writer] = 0
+        if room.drawer is None:
+            if len(room.members) >= 2:
+                self.start_turn(room, 0)
+            return
+        network.send(writer, room.turn_frame())
+        for data in room.feed.frames():
+            network.send(writer, data)
+
+    def broadcast(self, room, data, skip=None):
+        room.broadcast(data, skip)
+        if room.outbox and room not in self.unflushed:
+            if not self.unflushed:
+                self.loop.call_soon(self.flush_spectators)
+            self.unflushed.add(room)
+
+    def flush_spectators(self):
+        for room in self.unflushed:
+            room.flush_spectators()
+        self.unflushed.clear()
+
+    def spectate(self, room, writer):
+        # The room's feed already holds what its spectators are still owed
+        room.flush_spectators()
+        room.spectators.append(writer)
+        turn_frame = room.turn_frame()
+        if turn_frame is not None:
+            network.send(writer, turn_frame)
+        for data in room.feed.frames():
+            network.send(writer, data)
+
+    def stop_spectating(self, room, writer):
+        if writer in room.spectators:
+            room.spectators.remove(writer)
+        self.close_if_empty(room)
+
+    def leave(self, room, writer):
+        if writer not in room.members:
+            return
+        index = room.members.index(writer)
+        room.members.remove(writer)
+        del room.scores[writer]
+        if not room.members:
+            self.close_if_empty(room)
+        elif writer is room.drawer:
+            # The turn ends as if time ran out, and whoever joined after the
+            # drawer (now at its index) draws next
+            self.end_turn(room, network.TIME_EXPIRED, index)
+
+    def close_if_empty(self, room):
+        # A room goes once nobody is playing or watching it. Spectators of a
+        # room whose players have all left wait there with the game stopped.
+        if room.members:
+            return
+        self.scheduler.cancel(room.timer)
+        room.timer = None
+        room.drawer = None
+        if not room.spectators and self.rooms.get(room.name) is room:
+            del self.rooms[room.name]
+
+    def dispatch(self, room, writer, payload):
+        # Only the drawer draws and only the others guess; anything else,
+        # including a message that doesn't decode, is dropped
+        kind = payload[0] if payload else None
+        if kind in network.DRAWING_MESSAGES:
+            if writer is room.drawer:
+                data = network.frame(payload)
+                try:
+                    room.feed.append(data, payload)
+                except network.ProtocolError:
+                    return
+                self.broadcast(room, data, skip=writer)
+        elif kind == network.GUESS and room.drawer is not None and writer is not room.drawer:
+            try:
+                guess = network.MessageDecoder().decode(payload)[1]
+            except network.ProtocolError:
+                return
+            result = room.engine.judge(guess)
+            if result == CORRECT:
+                # The drawer scores for a drawing someone guessed
+                room.scores[room.drawer] += 1
+                self.end_turn(room, network.GUESS_CORRECT)
+            else:
+                kind = network.GUESS_CLOSE if result == CLOSE else network.GUESS_WRONG
+                network.send(writer, network.frame(network.encode_text(kind, guess)))
+
+    def end_turn(self, room, kind, next_index=None):
+        # Tells everyone the word with GUESS_CORRECT or TIME_EXPIRED, then
+        # starts the next turn with the member at next_index drawing, by
+        # default the one after the drawer
+        word = room.engine.current_word
+        self.broadcast(room, network.frame(network.encode_text(kind, word)))
+        if next_index is None:
+            next_index = room.members.index(room.drawer) + 1
+        room.engine.end_turn()
+        self.start_turn(room, next_index)
+
+    def start_turn(self, room, index):
+        self.scheduler.cancel(room.timer)
+        room.timer = None
+        room.feed.reset()
+        if len(room.members) < 2:
+            room.drawer = None
+            return
+        engine = room.engine
+        if not engine.current_word:
+            engine.new_turn()
+        room.drawer = room.members[index % len(room.members)]
+        engine.start_timer()
+        self.broadcast(room, room.turn_frame())
+        network.send(room.drawer, network.frame(network.encode_text(network.WORD, engine.current_word)))
+        room.timer = self.scheduler.call_at(engine.deadline, lambda: self.time_expired(room))
+
+    def time_expired(self, room):
+        room.timer = None
+        if room.engine.is_expired():
+            self.end_turn(room, network.TIME_EXPIRED)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pictionary multi-room server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=network.DEFAULT_PORT)
+    parser.add_argument('--words', default='easymode.txt', help="word list or compiled .wpk pack")
+    parser.add_argument('--turn-seconds', type=int, default=60)
+    args = parser.parse_args()
+
+    words = load_pack(args.words) if args.words.endswith('.wpk') else load_words(args.words)
+
+    async def main():
+        server = RoomServer(words, args.host, args.port, args.turn_seconds)
+        await server.start()
+        print(f"listening on {server.host}:{server.port}", flush=True)
+        async with server.server:
+            await server.server.serve_forever()
+
+    asyncio.run(main())
@@ -0,0 +1,253 @@
+import queue
+import threading
+import traceback
+
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+from strokes import Fill
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# A guesser for solo play and load tests that runs on the CPU with no network.
+# A drawing is shrunk to a small grayscale sketch: cropped to its ink, scaled
+# to fit SIZE x SIZE pixels and centred. The classifier compares sketches to
+# templates, sketches of earlier drawings labelled with their word, and
+# guesses the word of the closest one (cosine similarity). Everything the
+# classifier does runs on one worker thread, and requests that arrive while
+# it is busy are answered together, as one matrix product for all of them.
+# numpy makes that product fast; without it the same sums run in Python.
+
+SIZE = 24
+# Below this similarity a template is no better than a wild guess
+MIN_SCORE = 0.75
+# Templates kept per word; the oldest goes first
+TEMPLATES_PER_WORD = 8
+
+
+def drawing_bounds(strokes, width, height):
+    # Logical (x, y, w, h) of the ink, or None if there is none. Fills can
+    # cover anything, so a drawing with one is taken whole.
+    left = top = right = bottom = None
+    for stroke in strokes:
+        if isinstance(stroke, Fill):
+            return 0, 0, width, height
+        x0, y0, x1, y1 = stroke.bounds()
+        pad = stroke.width
+        if left is None:
+            left, top, right, bottom = x0 - pad, y0 - pad, x1 + pad, y1 + pad
+        else:
+            left, top = min(left, x0 - pad), min(top, y0 - pad)
+            right, bottom = max(right, x1 + pad), max(bottom, y1 + pad)
+    if left is None:
+        return None
+    left, top = max(0, left), max(0, top)
+    return left, top, max(1, min(width, right) - left), max(1, min(height, bottom) - top)
+
+
+def sketch_pixels(image, bounds):
+    # SIZE x SIZE grayscale bytes of the logical area `bounds` of a canvas
+    # image, ink on white, scaled to fit with its aspect ratio kept. Smooth
+    # scaling averages whole areas, so thin lines fade rather than vanish.
+    ratio = image.devicePixelRatio()
+    x, y, width, height = bounds
+    crop = image.copy(QRect(round(x * ratio), round(y * ratio),
+                            max(1, round(width * ratio)), max(1, round(height * ratio))))
+    small = crop.scaled(SIZE, SIZE, Qt.AspectRatioMode.KeepAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+    small.setDevicePixelRatio(1.0)
+    sketch = QImage(SIZE, SIZE, QImage.Format.Format_RGB32)
+    sketch.fill(QColor("#FFFFFF"))
+    painter = QPainter(sketch)
+    painter.drawImage((SIZE - small.width()) // 2, (SIZE - small.height()) // 2, small)
+    painter.end()
+    gray = sketch.convertToFormat(QImage.Format.Format_Grayscale8)
+    rows = gray.constBits().asstring(gray.sizeInBytes())
+    stride = gray.bytesPerLine()
+    return b''.join(rows[row * stride:row * stride + SIZE] for row in range(SIZE))
+
+
+def feature_matrix(sketches):
+    # features() of many sketches at once with numpy, one row each; blank
+    # sketches get a row of zeros
+    ink = np.zeros((len(sketches), SIZE + 2, SIZE + 2), np.float32)
+    ink[:, 1:-1, 1:-1] = 255 - np.frombuffer(b''.join(sketches), np.uint8).reshape(-1, SIZE, SIZE)
+    ink = sum(ink[:, dy:dy + SIZE, dx:dx + SIZE] for dy in range(3) for dx in range(3))
+    ink = ink.reshape(len(sketches), -1)
+    norms = np.sqrt(np.einsum('ij,ij->i', ink, ink))
+    return ink / np.maximum(norms, 1e-9)[:, None], norms > 0
+
+
+def features(pixels):
+    # Unit-length ink vector of a sketch, or None for a blank one. Each pixel
+    # is summed with its neighbours first, so lines a pixel or two apart
+    # still overlap.
+    if np is not None:
+        rows, drawn = feature_matrix([pixels])
+        return rows[0] if drawn[0] else None
+    ink = [255 - value for value in pixels]
+    blurred = []
+    for y in range(SIZE):
+        for x in range(SIZE):
+            blurred.append(sum(ink[row * SIZE + column]
+                               for row in range(max(0, y - 1), min(SIZE, y + 2))
+                               for column in range(max(0, x - 1), min(SIZE, x + 2))))
+    norm = sum(value * value for value in blurred) ** 0.5
+    return [value / norm for value in blurred] if norm else None
+
+
+class Guess:
+    # One request: `exclude` holds words already tried; `done` is called on
+    # the worker thread with the best word and its score, or (None, 0.0)
+    __slots__ = ("key", "pixels", "exclude", "done")
+
+    def __init__(self, key, pixels, exclude, done):
+        self.key = key
+        self.pixels = pixels
+        self.exclude = exclude
+        self.done = done
+
+
+class SketchClassifier:
+    # Shared by every bot in the process. `load` returns (word, pixels)
+    # pairs to start from; it runs on the worker thread the first time the
+    # classifier is used, so nothing is read or drawn until a bot plays.
+    def __init__(self, load=None):
+        self.load = load
+        self.requests = queue.Queue()
+        self.words = []  # the word of every template row
+        self.rows = []  # template feature vectors, in the same order
+        self.matrix = None  # numpy copy of rows, rebuilt after changes
+        self.batches = 0
+        self.answered = 0
+        self.waiting = {}  # key -> the Guess still to be answered
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def guess(self, key, pixels, exclude, done):
+        # A newer request with the same key replaces one still waiting
+        request = Guess(key, pixels, frozenset(exclude), done)
+        with self.lock:
+            self.waiting[key] = request
+        self.start()
+        self.requests.put(request)
+
+    def cancel(self, key):
+        # The request waiting under `key`, if any, is never answered
+        with self.lock:
+            self.waiting.pop(key, None)
+
+    def learn(self, word, pixels):
+        self.start()
+        self.requests.put((word, pixels))
+
+    def stop(self):
+        if self.thread is not None:
+            if self.thread.is_alive():
+                self.requests.put(None)
+                self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        # A job that fails is reported and dropped; the thread carries on
+        if self.load is not None:
+            try:
+                for word, pixels in self.load():
+                    self._add(word, pixels)
+            except Exception:
+                traceback.print_exc()
+        while True:
+            pending = [self.requests.get()]
+            # Everything queued meanwhile goes into the same batch
+            while True:
+                try:
+                    pending.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+            guesses = {}
+            for request in pending:
+                if request is None:
+                    return
+                if isinstance(request, Guess):
+                    guesses[request.key] = request
+                else:
+                    try:
+                        self._add(*request)
+                    except Exception:
+                        traceback.print_exc()
+            with self.lock:
+                guesses = [guess for key, guess in guesses.items() if self.waiting.get(key) is guess]
+            if guesses:
+                try:
+                    self.classify(guesses)
+                except Exception:
+                    traceback.print_exc()
+                    # Bots wait for an answer before looking again
+                    for guess in guesses:
+                        self._answer(guess, None, 0.0)
+
+    def _answer(self, guess, word, score):
+        # Calls `done` unless the request was cancelled, replaced or answered
+        with self.lock:
+            if self.waiting.get(guess.key) is not guess:
+                return
+            del self.waiting[guess.key]
+        self.answered += 1
+        guess.done(word, score)
+
+    def _add(self, word, pixels):
+        vector = features(pixels)
+        if vector is None:
+            return
+        same = [i for i, other in enumerate(self.words) if other == word]
+        if len(same) >= TEMPLATES_PER_WORD:
+            del self.words[same[0]], self.rows[same[0]]
+        self.words.append(word)
+        self.rows.append(vector)
+        self.matrix = None
+
+    def classify(self, guesses):
+        self.batches += 1
+        # For each request with something drawn: its best template row, and
+        # a function ranking every row for when that word was already tried
+        best = {}
+        if self.rows and np is not None:
+            if self.matrix is None:
+                self.matrix = np.array(self.rows, np.float32)
+            vectors, drawn = feature_matrix([guess.pixels for guess in guesses])
+            drawn = np.flatnonzero(drawn)
+            scores = vectors[drawn] @ self.matrix.T
+            for i, row in zip(drawn.tolist(), scores):
+                def ranking(row=row):
+                    order = np.argsort(-row)
+                    return zip(order.tolist(), row[order].tolist())
+                top = int(row.argmax())
+                best[i] = (top, float(row[top]), ranking)
+        elif self.rows:
+            for i, guess in enumerate(guesses):
+                vector = features(guess.pixels)
+                if vector is not None:
+                    row = [sum(a * b for a, b in zip(vector, template)) for template in self.rows]
+                    ranked = sorted(enumerate(row), key=lambda item: -item[1])
+                    best[i] = ranked[0] + (lambda ranked=ranked: ranked,)
+        for i, guess in enumerate(guesses):
+            word, score = None, 0.0
+            if i in best:
+                top, top_score, ranking = best[i]
+                if self.words[top] not in guess.exclude:
+                    word, score = self.words[top], top_score
+                else:
+                    for index, other_score in ranking():
+                        if self.words[index] not in guess.exclude:
+                            word, score = self.words[index], other_score
+                            break
+            self._answer(guess, word, score)
@@ -0,0 +1,143 @@
+from array import array
+
+
+def simplify(points, tolerance, pressure_scale=0.0):
+    # Ramer-Douglas-Peucker over a short run of (x, y, pressure) tuples. Returns
+    # the indices of the points to keep; the first and last point are always
+    # kept. With a pressure_scale, a change in pressure counts as that many
+    # pixels of deviation, so width changes survive on straight tablet strokes.
+    count = len(points)
+    if count < 3:
+        return list(range(count))
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    limit = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = points[first][0], points[first][1]
+        dx, dy = points[last][0] - x1, points[last][1] - y1
+        length = dx * dx + dy * dy
+        furthest, index = limit, -1
+        for i in range(first + 1, last):
+            px, py = points[i][0] - x1, points[i][1] - y1
+            # Distance to the segment, not the infinite line, so scribbles that
+            # double back on themselves are not collapsed
+            t = 0.0 if length == 0 else min(1.0, max(0.0, (px * dx + py * dy) / length))
+            ex, ey = px - t * dx, py - t * dy
+            distance = ex * ex + ey * ey
+            if pressure_scale:
+                # A merged segment is drawn at its end point's pressure
+                ep = (points[i][2] - points[last][2]) * pressure_scale
+                distance += ep * ep
+            if distance > furthest:
+                furthest, index = distance, i
+        if index != -1:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [i for i in range(count) if keep[i]]
+
+
+class Stroke:
+    # One continuous pen stroke. Points are kept interleaved (x0, y0, x1, y1, ...)
+    # in a float array in logical canvas coordinates, so a stroke costs 8 bytes
+    # per point no matter how large the canvas is. Tablet strokes also keep one
+    # pressure value per point; mouse strokes leave `pressures` as None.
+    __slots__ = ("color", "width", "points", "pressures")
+
+    def __init__(self, color, width, points=None, pressures=None):
+        self.color = color  # 0xAARRGGBB, as returned by QColor.rgba()
+        self.width = width
+        self.points = array('f') if points is None else array('f', points)
+        self.pressures = None if pressures is None else array('f', pressures)
+
+    def __len__(self):
+        return len(self.points) // 2
+
+    def add_point(self, x, y, pressure=None):
+        self.points.append(x)
+        self.points.append(y)
+        if pressure is not None:
+            if self.pressures is None:
+                self.pressures = array('f')
+            self.pressures.append(pressure)
+
+    def xy(self):
+        pts = self.points
+        return zip(pts[0::2], pts[1::2])
+
+    def bounds(self):
+        xs = self.points[0::2]
+        ys = self.points[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def nbytes(self):
+        size = self.points.itemsize * len(self.points)
+        if self.pressures is not None:
+            size += self.pressures.itemsize * len(self.pressures)
+        return size
+
+
+class Fill:
+    # A bucket fill at (x, y): the area around the point whose colour is within
+    # `tolerance` per channel of the colour under it. What it covers depends on
+    # everything drawn before it, so only the seed is kept and the fill is
+    # redone whenever the drawing is rasterised.
+    __slots__ = ("color", "x", "y", "tolerance")
+
+    def __init__(self, color, x, y, tolerance=0):
+        self.color = color  # 0xAARRGGBB, as returned by QColor.rgba()
+        self.x = x
+        self.y = y
+        self.tolerance = tolerance
+
+    def nbytes(self):
+        return 16
+
+
+class StrokeStore:
+    # Vector record of everything drawn on the canvas, in drawing order.
+    # The raster image on the canvas is only a cache of these strokes.
+    def __init__(self):
+        self.strokes = []
+        self.current = None
+
+    def __len__(self):
+        return len(self.strokes)
+
+    def __iter__(self):
+        return iter(self.strokes)
+
+    def __getitem__(self, index):
+        return self.strokes[index]
+
+    def begin_stroke(self, color, width, x, y, pressure=None):
+        self.current = Stroke(color, width)
+        self.current.add_point(x, y, pressure)
+        return self.current
+
+    def add_point(self, x, y, pressure=None):
+        if self.current is not None:
+            self.current.add_point(x, y, pressure)
+
+    def end_stroke(self):
+        stroke = self.current
+        self.current = None
+        # A press without any movement never reaches the canvas, so don't keep it
+        if stroke is None or len(stroke) < 2:
+            return None
+        self.strokes.append(stroke)
+        return stroke
+
+    def add_fill(self, color, x, y, tolerance=0):
+        fill = Fill(color, x, y, tolerance)
+        self.strokes.append(fill)
+        return fill
+
+    def clear(self):
+        self.strokes.clear()
+        self.current = None
+
+    def nbytes(self):
+        return sum(stroke.nbytes() for stroke in self.strokes)
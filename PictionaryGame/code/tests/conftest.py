@@ -0,0 +1,17 @@
+import os
+import sys
+
+# The game's modules sit next to each other in the code directory, and word
+# lists and icons are opened relative to it
+CODE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE)
+os.chdir(CODE)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
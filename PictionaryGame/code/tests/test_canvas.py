@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+from PyQt6.QtCore import QPointF
+
+from PictionaryGame import DrawingCanvas
+from strokes import simplify
+
+
+def curve(count):
+    # A slow, smooth stroke, as long_stroke in benchmark.py
+    for i in range(count):
+        t = i / 400
+        yield (460 + 380 * math.sin(t * 1.3) * math.cos(t * 0.21),
+               350 + 280 * math.sin(t * 0.7 + 1) * math.cos(t * 0.13))
+
+
+def draw(canvas, points, per_frame):
+    # Moves in batches of per_frame, flushed once per batch like the frame
+    # timer does; returns every point sent out to other players
+    sent = []
+    canvas.points_flushed.connect(sent.extend)
+    canvas.begin_stroke(QPointF(*points[0]))
+    for i in range(1, len(points), per_frame):
+        for x, y in points[i:i + per_frame]:
+            canvas.extend_stroke(QPointF(x, y))
+        canvas.flush_stroke()
+    canvas.end_stroke()
+    return sent
+
+
+def test_smooth_stroke_simplified_across_frames(app):
+    canvas = DrawingCanvas()
+    points = list(curve(4000))
+    sent = draw(canvas, points, 2)
+    stroke = canvas.strokes[-1]
+    whole = simplify([(x, y, None) for x, y in points], canvas.SIMPLIFY_TOLERANCE, 0.0)
+    assert len(stroke) <= 1.5 * len(whole)
+    assert len(stroke) < len(points) / 10
+    # Other players get exactly the stored points (the store keeps 32-bit
+    # floats), and the provisional tail is gone from the overlay
+    assert [v for x, y, _ in sent for v in (x, y)] == pytest.approx(list(stroke.points[2:]), abs=1e-3)
+    assert canvas.tailRect is None and not canvas.tailPoints
+    overlay = canvas.layers["overlay"].image
+    assert not overlay.constBits().asstring(overlay.sizeInBytes()).strip(b"\0")
+
+
+def test_tail_committed_when_too_long(app):
+    # A straight line has no corners, but still reaches other players
+    canvas = DrawingCanvas()
+    sent = []
+    canvas.points_flushed.connect(sent.extend)
+    canvas.begin_stroke(QPointF(10, 10))
+    for i in range(1, canvas.MAX_TAIL + 2):
+        canvas.extend_stroke(QPointF(10 + 2 * i, 10))
+        canvas.flush_stroke()
+    assert sent
+    assert len(canvas.tailPoints) < canvas.MAX_TAIL
+
+
+def test_undo_mid_stroke_ends_the_stroke_first(app):
+    canvas = DrawingCanvas()
+    draw(canvas, [(100, 100), (300, 120), (320, 300)], 1)
+    canvas.begin_stroke(QPointF(500, 500))
+    for i in range(1, 10):
+        canvas.extend_stroke(QPointF(500 + 20 * i, 500 + 5 * i * i))
+        canvas.flush_stroke()
+    canvas.undo()
+    # The new stroke was ended and undone; the first one is left, drawn the
+    # same as a full redraw, with no provisional tail on the overlay
+    assert not canvas.drawing and len(canvas.strokes) == 1
+    assert canvas.tailRect is None and not canvas.tailPoints
+    undone = canvas.image.copy()
+    canvas.rebuild()
+    assert undone == canvas.image
+    canvas.redo()
+    assert len(canvas.strokes) == 2
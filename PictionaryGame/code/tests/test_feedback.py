@@ -0,0 +1,63 @@
+import time
+
+from PyQt6.QtCore import QEventLoop, QTimer
+
+from PictionaryGame import GuessingWindow
+
+SECONDS = 1.0
+TICK_MS = 10
+GUESS_MS = 50
+# A modal dialog would stop the ticks for as long as it is up; anything
+# shorter than this is ordinary scheduling noise
+MAX_GAP_MS = 100
+
+
+def test_feedback_does_not_block_event_loop(app):
+    # As bench_feedback: a wrong guess every GUESS_MS while a TICK_MS timer
+    # runs, and every tick must still arrive on time
+    window = GuessingWindow("Giraffe")
+    window.show()
+    window.start_game()
+    app.processEvents()
+    ticks = []
+    ticker = QTimer()
+    ticker.setInterval(TICK_MS)
+    ticker.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    guesses = iter(["elephant", "zebra", "lion", "hippo", "camel"] * 100)
+
+    def guess():
+        window.guess_input.setText(next(guesses))
+        window.check_guess()
+
+    guesser = QTimer()
+    guesser.setInterval(GUESS_MS)
+    guesser.timeout.connect(guess)
+    loop = QEventLoop()
+    ticker.start()
+    guesser.start()
+    QTimer.singleShot(int(SECONDS * 1000), loop.quit)
+    loop.exec()
+    ticker.stop()
+    guesser.stop()
+    assert window.feedback_label.isVisible()
+    window.stop_timer()
+    window.close()
+
+    gaps = [(b - a) * 1000 for a, b in zip(ticks, ticks[1:])]
+    assert window.guess_log.count() >= 0.8 * SECONDS * 1000 / GUESS_MS
+    assert len(ticks) >= 0.8 * SECONDS * 1000 / TICK_MS
+    assert max(gaps) < MAX_GAP_MS
+
+
+def test_submitted_guess_leaves_input_alone(app):
+    # A bot guesses through submit_guess while the player is typing
+    window = GuessingWindow("Giraffe")
+    window.start_game()
+    window.guess_input.setText("gir")
+    window.submit_guess("Zebra")
+    assert window.guess_input.text() == "gir"
+    assert window.guess_log.item(window.guess_log.count() - 1).text().startswith("zebra")
+    window.check_guess()
+    assert window.guess_input.text() == ""
+    window.stop_timer()
+    window.close()
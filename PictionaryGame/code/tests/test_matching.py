@@ -0,0 +1,95 @@
+import pytest
+
+from engine import GameEngine
+from matching import CLOSE, CORRECT, WRONG, GuessMatcher, bank_pattern, in_bank, plural_forms
+from wordbank import load_words
+from wordpack import WordPack, compile_pack
+
+BANK = load_words("easymode.txt") + load_words("hardmode.txt")
+
+
+def judge(word, guess):
+    return GuessMatcher(word).match(guess, BANK)
+
+
+@pytest.mark.parametrize("word, guess", [
+    ("Aeroplane", "Plate"),
+    ("Aeroplane", "Flame"),
+    ("Mobile Phone", "Plane"),
+    ("T-shirt", "Tree"),
+    ("Chair", "Hair"),
+    ("Basketball", "Baseball"),
+    ("Sunglasses", "Shape"),
+    ("Plane", "Plate"),
+    ("Plate", "Plane"),
+])
+def test_other_bank_words_are_not_correct(word, guess):
+    assert judge(word, guess) != CORRECT
+
+
+@pytest.mark.parametrize("word, guess", [
+    ("Aeroplane", "plane"),
+    ("Aeroplane", "airplane"),
+    ("Aeroplane", "aeroplnae"),
+    ("Mobile Phone", "phone"),
+    ("T-shirt", "tee"),
+    ("Sunglasses", "shades"),
+    ("Basketball", "basketbal"),
+    ("Chair", "chairs"),
+    ("Pancakes", "pancake"),
+    ("Tennis", "tennis"),
+])
+def test_names_plurals_and_typos_are_correct(word, guess):
+    assert judge(word, guess) == CORRECT
+
+
+@pytest.mark.parametrize("word, guess, result", [
+    ("Aeroplane", "airplan", CORRECT),  # long aliases allow typos...
+    ("Mobile Phone", "smartphnoe", CORRECT),
+    ("Mobile Phone", "phine", CLOSE),  # ...short ones must be exact
+    ("T-shirt", "tea", CLOSE),
+    ("Aeroplane", "place", CLOSE),
+    ("Aeroplane", "plant", CLOSE),
+    ("Aeroplane", "plank", CLOSE),
+    ("Mobile Phone", "shone", CLOSE),
+])
+def test_typo_budget_of_aliases(word, guess, result):
+    assert judge(word, guess) == result
+
+
+@pytest.mark.parametrize("word, stem", [
+    ("bus", "bu"), ("tennis", "tenni"), ("pancakes", "pancak"), ("shapes", "shap"),
+    ("kiss", "kis"),
+])
+def test_plural_forms_keep_real_stems(word, stem):
+    assert stem not in plural_forms(word)
+
+
+def test_plural_forms():
+    assert {"pancake", "shape", "sunglass", "body", "box"} <= (
+        plural_forms("pancakes") | plural_forms("shapes") | plural_forms("sunglasses")
+        | plural_forms("bodies") | plural_forms("boxes"))
+
+
+def test_engine_judges_against_its_bank():
+    engine = GameEngine(BANK)
+    while engine.new_turn() != "Plane":
+        pass
+    assert engine.judge("plate") == CLOSE
+    assert engine.judge("planes") == CORRECT
+    assert engine.judge("cat") == WRONG
+
+
+def test_word_pack_bank_is_searched_in_place(tmp_path):
+    path = str(tmp_path / "bank.wpk")
+    compile_pack(((word, "bank", 0) for word in list(BANK) + ["Hot-dog stand", "Plates"]), path)
+    pack = WordPack(path)
+    try:
+        assert GuessMatcher("Plane").match("plate", pack) == CLOSE
+        assert GuessMatcher("Plane").match("plann", pack) == CORRECT
+        assert GuessMatcher("Hot dog stands").match("hotdogstand", pack) == CORRECT
+        assert in_bank("hotdogstand", pack) and in_bank("plate", pack)
+        assert not in_bank("plann", pack)
+        assert list(pack.search(bank_pattern({"hotdogstand"}))) == ["Hot-dog stand"]
+    finally:
+        pack.close()
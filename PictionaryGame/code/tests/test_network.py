@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+import network
+
+
+def sample_payloads():
+    encoder = network.StrokeEncoder()
+    yield encoder.begin(0xFF2C3E50, 3.0, (10.0, 20.0, 0.5))
+    yield encoder.points([(12.5, 21.0, 0.6), (15.0, 25.25, 0.7)])
+    yield encoder.end()
+    yield network.encode_fill(0xFFFF0000, 30.0, 40.0, 32)
+    yield network.encode_text(network.GUESS, "giraffe")
+    yield network.encode_turn(2, (1, 0), 60)
+    encoder = network.StrokeEncoder()
+    yield network.encode_keyframe([encoder.begin(0xFF000000, 3.0, (1.0, 2.0, None)),
+                                   encoder.points([(5.0, 6.0, None)]), encoder.end()])
+
+
+def decode_or_reject(payload):
+    try:
+        network.MessageDecoder().decode(payload)
+    except network.ProtocolError:
+        pass
+
+
+@pytest.mark.parametrize("payload", list(sample_payloads()))
+def test_truncated_payloads_are_rejected(payload):
+    # Every cut of a valid message either decodes or raises ProtocolError
+    for end in range(len(payload)):
+        decode_or_reject(payload[:end])
+
+
+def test_bad_payloads_raise_protocol_error():
+    bad = [b"", bytes([network.STROKE_BEGIN]), bytes([network.GUESS]) + b"\xff\xfe",
+           bytes([network.KEYFRAME]) + b"not zlib", bytes([network.STROKE_POINTS, 5, 1]),
+           bytes([network.STROKE_POINTS, 1]) + b"\xff" * 160 + b"\x01\x00"]
+    for payload in bad:
+        with pytest.raises(network.ProtocolError):
+            network.MessageDecoder().decode(payload)
+
+
+def test_failed_decode_keeps_decoder_state():
+    encoder = network.StrokeEncoder()
+    decoder = network.MessageDecoder()
+    decoder.decode(encoder.begin(0xFF000000, 3.0, (10.0, 10.0, None)))
+    with pytest.raises(network.ProtocolError):
+        decoder.decode(network.StrokeEncoder().begin(0xFF000000, 3.0, (50.0, 50.0, 0.5))[:-1])
+    assert decoder.decode(encoder.points([(11.0, 12.0, None)]))[1] == [(11.0, 12.0, None)]
+
+
+def test_read_frame_caps_length():
+    def read(data):
+        async def main():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await network.read_frame(reader)
+        return asyncio.run(main())
+
+    assert read(network.frame(b"hello")) == b"hello"
+    too_long = bytearray()
+    network.encode_varint(network.MAX_FRAME + 1, too_long)
+    with pytest.raises(network.ProtocolError):
+        read(bytes(too_long))
+    with pytest.raises(network.ProtocolError):
+        read(b"\xff" * 10)
+
+
+def test_relay_drops_peers_that_stop_reading(monkeypatch):
+    monkeypatch.setattr(network, "MAX_WRITE_BUFFER", 256 * 1024)
+
+    async def main():
+        relay = network.RelayServer(port=0)
+        port = await relay.start()
+        sender, reader, stalled = (network.GameClient() for _ in range(3))
+        for client in (sender, reader, stalled):
+            await client.connect('127.0.0.1', port)
+        await asyncio.sleep(0.05)
+        payload = bytes(1024 * 1024)
+        try:
+            # Far more than the socket buffers of the peer that never reads
+            for _ in range(48):
+                sender.send(payload)
+                assert await asyncio.wait_for(network.read_frame(reader.reader), 2) == payload
+            await asyncio.sleep(0.05)
+            assert len(relay.clients) == 2
+            assert max(client.transport.get_write_buffer_size() for client in relay.clients) == 0
+        finally:
+            for client in (sender, reader, stalled):
+                await client.close()
+            await relay.close()
+    asyncio.run(main())
+
+def test_game_drops_bad_messages(app):
+    from PictionaryGame import PictionaryGame
+    game = PictionaryGame()
+    game.build_game_screen()
+    game.decoder = network.MessageDecoder()
+    for payload in (b"", bytes([network.FILL, 1]), bytes([network.GUESS]) + b"\xff",
+                    bytes([network.STROKE_POINTS, 0])):
+        game.handle_network_message(payload)
+    assert game.statusBar().currentMessage().startswith("Ignored a bad network message")
+    game.close()
+
+
+def test_host_ignores_drawing_from_guests(app):
+    from PyQt6.QtCore import QPointF
+    from PictionaryGame import PictionaryGame
+    game = PictionaryGame()
+    game.build_game_screen()
+    game.decoder = network.MessageDecoder()
+    canvas = game.canvas
+    canvas.begin_stroke(QPointF(10, 10))
+    canvas.extend_stroke(QPointF(50, 50))
+    canvas.end_stroke()
+    pen = canvas.pen.color().rgba(), canvas.pen.width()
+    encoder = network.StrokeEncoder()
+    for payload in (network.encode_simple(network.UNDO), network.encode_simple(network.CLEAR),
+                    encoder.begin(0xFF00FF00, 9.0, (5.0, 5.0, None))):
+        game.handle_network_message(payload)
+    assert len(canvas.strokes) == 1
+    assert (canvas.pen.color().rgba(), canvas.pen.width()) == pen
+    assert not canvas.drawing
+    game.close()
+
+
+def test_guest_cannot_change_drawing(app):
+    from PictionaryGame import PictionaryGame
+    game = PictionaryGame(guest=True)
+    game.build_game_screen()
+    sent = []
+    game.send_network = sent.append
+    for action in game.menuBar().actions()[0].menu().actions():
+        if action.text() in ("Clear Canvas", "Undo Stroke", "Redo Stroke"):
+            assert not action.isEnabled()
+    game.clear()
+    game.undo()
+    game.redo()
+    assert not sent
+    game.close()
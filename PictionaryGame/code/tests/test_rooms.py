@@ -0,0 +1,125 @@
+import asyncio
+import socket
+
+import network
+from rooms import RoomServer
+
+WORDS = ["Giraffe", "Pizza", "Bicycle"]
+
+
+async def player(port, kind=network.JOIN, room="room"):
+    client = network.GameClient()
+    await client.connect('127.0.0.1', port)
+    client.send(network.encode_text(kind, room))
+    return client
+
+
+async def receive(client, kind):
+    # The value of the next message of `kind`, skipping the others
+    decoder = network.MessageDecoder()
+    while True:
+        payload = await asyncio.wait_for(network.read_frame(client.reader), 2)
+        got, value = decoder.decode(payload)
+        if got == kind:
+            return value
+
+
+def run(test):
+    async def main():
+        server = RoomServer(WORDS, port=0)
+        port = await server.start()
+        try:
+            await test(server, port)
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+
+def test_scores_follow_members():
+    async def test(server, port):
+        first = await player(port)
+        await asyncio.sleep(0.05)
+        second = await player(port)
+        word = await receive(first, network.WORD)
+        assert await receive(second, network.TURN) == (1, (0, 0), 60)
+        # A third player joining mid-turn gets the turn with every score
+        third = await player(port)
+        assert await receive(third, network.TURN) == (1, (0, 0, 0), 60)
+        second.send(network.encode_text(network.GUESS, word))
+        assert await receive(third, network.GUESS_CORRECT) == word
+        # The first player drew the guessed word; the second draws next
+        assert await receive(third, network.TURN) == (2, (1, 0, 0), 60)
+        await receive(second, network.WORD)
+        for client in (first, second, third):
+            await client.close()
+    run(test)
+
+
+def test_drawer_leaving_ends_turn():
+    async def test(server, port):
+        clients = []
+        for _ in range(3):
+            clients.append(await player(port))
+            await asyncio.sleep(0.05)
+        drawer, second, third = clients
+        word = await receive(drawer, network.WORD)
+        await drawer.close()
+        assert await receive(third, network.TIME_EXPIRED) == word
+        # The player after the drawer takes over, now first in the room
+        assert await receive(third, network.TURN) == (1, (0, 0), 60)
+        await receive(second, network.WORD)
+        await second.close()
+        await third.close()
+    run(test)
+
+
+def test_bad_messages_are_dropped():
+    async def test(server, port):
+        first = await player(port)
+        await asyncio.sleep(0.05)
+        second = await player(port)
+        word = await receive(first, network.WORD)
+        for payload in (b"", bytes([network.GUESS]) + b"\xff", bytes([network.STROKE_POINTS])):
+            second.send(payload)
+            first.send(payload)
+        second.send(network.encode_text(network.GUESS, word))
+        assert await receive(first, network.GUESS_CORRECT) == word
+        # A first message that isn't JOIN or SPECTATE closes the connection
+        stranger = network.GameClient()
+        await stranger.connect('127.0.0.1', port)
+        stranger.send(b"")
+        assert await asyncio.wait_for(stranger.reader.read(), 2) == b""
+        for client in (first, second, stranger):
+            await client.close()
+    run(test)
+
+
+def test_spectator_that_stops_reading_is_dropped(monkeypatch):
+    monkeypatch.setattr(network, "MAX_WRITE_BUFFER", 64 * 1024)
+
+    async def test(server, port):
+        drawer = await player(port)
+        await asyncio.sleep(0.05)
+        guesser = await player(port)
+        stalled = await player(port, network.SPECTATE)
+        await receive(drawer, network.WORD)
+        room = server.rooms["room"]
+        # Small socket buffers, so the server's own buffer fills up soon
+        sending = room.spectators[0].transport.get_extra_info('socket')
+        sending.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        receiving = stalled.writer.transport.get_extra_info('socket')
+        receiving.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        encoder = network.StrokeEncoder()
+        drawer.send(encoder.begin(0xFF000000, 3, (0, 0, None)))
+        await receive(guesser, network.STROKE_BEGIN)
+        # Points far apart, about 40 kB a batch
+        batch = [(900 * (i % 2), 700 * (i % 2), None) for i in range(10_000)]
+        for _ in range(8):
+            drawer.send(encoder.points(batch))
+            await receive(guesser, network.STROKE_POINTS)
+            await asyncio.sleep(0.01)
+        assert room.spectators == []
+        assert len(room.members) == 2
+        for client in (drawer, guesser, stalled):
+            await client.close()
+    run(test)
@@ -0,0 +1,78 @@
+import threading
+
+import network
+from PictionaryGame import recorded_sketches
+from recording import MAGIC, GameRecorder
+from sketchbot import SIZE, SketchClassifier
+
+
+def square():
+    # A grayscale sketch as sketch_pixels() makes them: black ink on white
+    return bytes(0 if 4 <= x < 12 and 4 <= y < 12 else 255
+                 for y in range(SIZE) for x in range(SIZE))
+
+
+def ask(classifier, key, pixels):
+    answers = []
+    done = threading.Event()
+
+    def answer(word, score):
+        answers.append(word)
+        done.set()
+    classifier.guess(key, pixels, (), answer)
+    assert done.wait(5)
+    return answers[0]
+
+
+def test_classifier_survives_failing_jobs():
+    def load():
+        yield "box", square()
+        raise OSError("unreadable recording")
+    classifier = SketchClassifier(load)
+    assert ask(classifier, 1, square()) == "box"
+    classifier.learn("broken", None)
+    assert ask(classifier, 1, square()) == "box"
+    assert classifier.thread.is_alive()
+    classifier.stop()
+
+
+def test_cancelled_guess_is_not_answered():
+    release = threading.Event()
+
+    def load():
+        release.wait(5)  # keeps the worker busy until the guess is cancelled
+        yield "box", square()
+    classifier = SketchClassifier(load)
+    cancelled = []
+    classifier.guess(1, square(), (), lambda word, score: cancelled.append(word))
+    classifier.cancel(1)
+    release.set()
+    assert ask(classifier, 2, square()) == "box"
+    assert cancelled == []
+    classifier.stop()
+
+
+def test_stopped_classifier_restarts():
+    classifier = SketchClassifier(lambda: [("box", square())])
+    assert ask(classifier, 1, square()) == "box"
+    classifier.stop()
+    assert ask(classifier, 1, square()) == "box"
+    classifier.stop()
+
+
+def test_damaged_recordings_are_skipped(app, tmp_path):
+    recorder = GameRecorder(str(tmp_path / "b-good.prec"))
+    encoder = network.StrokeEncoder()
+    recorder.record(network.encode_turn(0, (0, 0), 60))
+    recorder.record(network.encode_text(network.WORD, "Box"))
+    recorder.record(encoder.begin(0xFF000000, 3, (100, 100, None)))
+    recorder.record(encoder.points([(300, 100, None), (300, 300, None)]))
+    recorder.record(encoder.end())
+    recorder.close()
+    good = (tmp_path / "b-good.prec").read_bytes()
+    # An empty record, a record too short for its time, and a stroke that
+    # doesn't decode
+    (tmp_path / "a-empty.prec").write_bytes(good + b"\x01\x00")
+    (tmp_path / "a-short.prec").write_bytes(MAGIC + b"\x01\x80" + good[len(MAGIC):])
+    (tmp_path / "c-stroke.prec").write_bytes(good + b"\x02\x00" + bytes([network.STROKE_POINTS]))
+    assert [word for word, _ in recorded_sketches(str(tmp_path))] == ["Box"]
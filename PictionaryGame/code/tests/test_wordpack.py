@@ -0,0 +1,27 @@
+import pytest
+
+from wordpack import compile_pack, load_pack, read_source
+
+
+def test_pack_round_trip(tmp_path):
+    source = tmp_path / "animals.csv"
+    source.write_text("Cat,pets,1\n\nHorse , farm , 3\ncat,pets,2\nÉléphant,zoo,7\n", encoding="utf-8")
+    words = tmp_path / "Kitchen.txt"
+    words.write_text("Spoon, Kettle\n")
+    entries = list(read_source(str(source))) + list(read_source(str(words), 4))
+    assert compile_pack(entries, str(tmp_path / "all.wpk")) == 5
+    pack = load_pack(str(tmp_path / "all.wpk"))
+    # Case duplicates are dropped, keeping the first
+    assert [(pack[i], pack.category(i), pack.difficulty(i)) for i in range(len(pack))] == [
+        ("Cat", "pets", 1), ("Horse", "farm", 3), ("Éléphant", "zoo", 7),
+        ("Spoon", "Kitchen", 4), ("Kettle", "Kitchen", 4)]
+
+
+def test_short_csv_row_names_its_line(tmp_path):
+    source = tmp_path / "animals.csv"
+    source.write_text("Cat,pets,1\nDog,pets\nHorse,farm,3\n")
+    with pytest.raises(ValueError, match=r"animals\.csv, line 2: .*'Dog,pets'"):
+        list(read_source(str(source)))
+    source.write_text("Cat,pets,easy\n")
+    with pytest.raises(ValueError, match="line 1"):
+        list(read_source(str(source)))
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+# Tiled raster cache for boards far larger than the screen. Strokes stay in
+# world coordinates and are indexed by the grid cells they touch; tiles are
+# TILE x TILE device pixels rasterised on demand at one zoom scale, kept in an
+# LRU cache with a memory budget and redrawn from the strokes once evicted.
+# Cells or tiles without ink are never allocated.
+
+TILE = 256
+
+
+def cell_range(x0, y0, x1, y1, size):
+    # Every grid cell of `size` units touched by the box (inclusive)
+    for cy in range(int(y0 // size), int(y1 // size) + 1):
+        for cx in range(int(x0 // size), int(x1 // size) + 1):
+            yield cx, cy
+
+
+def tile_rect(scale, tx, ty, size=TILE):
+    # World box covered by tile (tx, ty) at `scale` device pixels per unit
+    span = size / scale
+    return tx * span, ty * span, (tx + 1) * span, (ty + 1) * span
+
+
+class TileIndex:
+    # Which strokes touch which world cell. Cells hold their strokes in an
+    # insertion-ordered dict with each stroke's serial number, so strokes
+    # gathered from several cells can be put back into drawing order.
+    def __init__(self, cell=TILE, margin=2):
+        # margin: world units of antialiasing around a stroke's pen width
+        self.cell = cell
+        self.margin = margin
+        self.cells = {}
+        self.serials = {}
+        self.next_serial = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def padded(self, x0, y0, x1, y1, width):
+        margin = width / 2 + self.margin
+        return x0 - margin, y0 - margin, x1 + margin, y1 + margin
+
+    def add(self, stroke, x0, y0, x1, y1):
+        # Called as the stroke grows, with the box of its newest points
+        serial = self.serials.get(stroke)
+        if serial is None:
+            serial = self.serials[stroke] = self.next_serial
+            self.next_serial += 1
+        for key in cell_range(*self.padded(x0, y0, x1, y1, stroke.width), self.cell):
+            self.cells.setdefault(key, {})[stroke] = serial
+
+    def remove(self, stroke):
+        if self.serials.pop(stroke, None) is None or len(stroke) == 0:
+            return
+        for key in cell_range(*self.padded(*stroke.bounds(), stroke.width), self.cell):
+            cell = self.cells.get(key)
+            if cell is not None:
+                cell.pop(stroke, None)
+                if not cell:
+                    del self.cells[key]
+
+    def clear(self):
+        self.cells.clear()
+        self.serials.clear()
+
+    def has_ink(self, x0, y0, x1, y1):
+        cells = self.cells
+        return any(key in cells for key in cell_range(x0, y0, x1, y1, self.cell))
+
+    def query(self, x0, y0, x1, y1):
+        # Strokes that may touch the box, oldest first
+        found = {}
+        cells = self.cells
+        for key in cell_range(x0, y0, x1, y1, self.cell):
+            cell = cells.get(key)
+            if cell:
+                found.update(cell)
+        return sorted(found, key=found.__getitem__)
+
+
+class TileCache:
+    # Rasterised tiles by (scale, tx, ty), least recently used first
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.tiles = OrderedDict()
+        self.used_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def get(self, key):
+        image = self.tiles.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.tiles.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        self.discard(key)
+        self.tiles[key] = image
+        self.used_bytes += image.sizeInBytes()
+        while self.used_bytes > self.max_bytes and len(self.tiles) > 1:
+            _, old = self.tiles.popitem(last=False)
+            self.used_bytes -= old.sizeInBytes()
+            self.evictions += 1
+
+    def discard(self, key):
+        image = self.tiles.pop(key, None)
+        if image is not None:
+            self.used_bytes -= image.sizeInBytes()
+
+    def overlapping(self, x0, y0, x1, y1):
+        # Cached tiles, at any scale, that cover part of a world box
+        for key in self.tiles:
+            scale, tx, ty = key
+            left, top, right, bottom = tile_rect(scale, tx, ty)
+            if left < x1 and x0 < right and top < y1 and y0 < bottom:
+                yield key, self.tiles[key]
+
+    def invalidate(self, x0, y0, x1, y1):
+        for key, _ in list(self.overlapping(x0, y0, x1, y1)):
+            self.discard(key)
+
+    def clear(self):
+        self.tiles.clear()
+        self.used_bytes = 0
+
+
+def begin_tile_paint(image, scale, tx, ty):
+    # A painter on a tile that takes world coordinates
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.translate(-tx * TILE, -ty * TILE)
+    painter.scale(scale, scale)
+    return painter
+
+
+def render_tile(strokes, scale, tx, ty, draw_stroke):
+    image = QImage(TILE, TILE, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(QColor("#FFFFFF"))
+    painter = begin_tile_paint(image, scale, tx, ty)
+    for stroke in strokes:
+        draw_stroke(painter, stroke)
+    painter.end()
+    return image
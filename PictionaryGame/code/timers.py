@@ -0,0 +1,88 @@
+import heapq
+import itertools
+import math
+
+
+class DeadlineScheduler:
+    # One heap of deadlines driven by a single underlying timer. `arm(when)` is
+    # called whenever the earliest deadline changes (None when idle) and must
+    # make sure run_due() is called at `when`; a Qt single-shot timer or
+    # loop.call_at both work. Everything scheduled shares that one wakeup.
+    def __init__(self, clock, arm):
+        self.clock = clock
+        self.arm = arm
+        self.heap = []
+        self.counter = itertools.count()
+        self.armed_for = None
+
+    def call_at(self, when, callback):
+        entry = [when, next(self.counter), callback]
+        heapq.heappush(self.heap, entry)
+        self._rearm()
+        return entry
+
+    def cancel(self, entry):
+        # Cancelled entries stay in the heap and are skipped when they come due
+        if entry is not None:
+            entry[2] = None
+
+    def run_due(self):
+        self.armed_for = None
+        now = self.clock()
+        while self.heap and self.heap[0][0] <= now:
+            _, _, callback = heapq.heappop(self.heap)
+            if callback is not None:
+                callback()
+        self._rearm()
+
+    def _rearm(self):
+        while self.heap and self.heap[0][2] is None:
+            heapq.heappop(self.heap)
+        when = self.heap[0][0] if self.heap else None
+        if when != self.armed_for:
+            self.armed_for = when
+            self.arm(when)
+
+
+class Countdown:
+    # Whole-second countdown to a fixed deadline. Listeners are called with the
+    # seconds remaining exactly when that number changes, and the expiry
+    # callback runs once at the deadline. Nothing is decremented, so every
+    # view of the same countdown always shows the same value.
+    def __init__(self, scheduler, deadline, on_expire=None):
+        self.scheduler = scheduler
+        self.deadline = deadline
+        self.on_expire = on_expire
+        self.listeners = []
+        self.entry = None
+        self.active = True
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        listener(self.remaining())
+
+    def remaining(self):
+        return max(0, math.ceil(self.deadline - self.scheduler.clock()))
+
+    def start(self):
+        self._tick()
+        return self
+
+    def cancel(self):
+        self.active = False
+        self.scheduler.cancel(self.entry)
+        self.entry = None
+
+    def _tick(self):
+        if not self.active:
+            return
+        remaining = self.remaining()
+        for listener in self.listeners:
+            listener(remaining)
+        if remaining <= 0:
+            self.active = False
+            if self.on_expire is not None:
+                self.on_expire()
+            return
+        # The displayed value next changes when one more whole second has passed
+        self.entry = self.scheduler.call_at(self.deadline - (remaining - 1), self._tick)
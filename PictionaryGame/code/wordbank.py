@@ -0,0 +1,68 @@
+import os
+import random
+
+# Word lists loaded so far, by absolute path. Each difficulty is read and
+# deduplicated once per process; every game and room shares the same tuple.
+_banks = {}
+
+
+def read_words(file_path):
+    # Word files are a single comma separated line
+    with open(file_path, 'r') as file:
+        return [word.strip() for word in file.read().split(',') if word.strip()]
+
+
+def dedupe(words):
+    # Guesses are matched case-insensitively, so "Door" and "door" are the same
+    # word. The first spelling is kept and the original order is preserved.
+    seen = set()
+    unique = []
+    for word in words:
+        key = word.casefold()
+        if key not in seen:
+            seen.add(key)
+            unique.append(word)
+    return tuple(unique)
+
+
+def load_words(file_path):
+    path = os.path.abspath(file_path)
+    bank = _banks.get(path)
+    if bank is None:
+        bank = _banks[path] = dedupe(read_words(path))
+    return bank
+
+
+class WordSampler:
+    # Hands out words without repeats until every word has been used, then
+    # starts over. This is a Fisher-Yates shuffle done one step per draw, so
+    # each draw is O(1) however big the bank is. The swaps are kept in a dict
+    # instead of a shuffled copy, so many samplers can share one word tuple
+    # and each only costs memory for the words it has drawn.
+    __slots__ = ("words", "rng", "remaining", "swaps")
+
+    def __init__(self, words, rng=None):
+        self.words = words
+        self.rng = rng or random.Random()
+        self.reset()
+
+    def reset(self):
+        self.remaining = len(self.words)
+        self.swaps = {}
+
+    def __len__(self):
+        return self.remaining
+
+    def draw(self):
+        if not self.words:
+            raise IndexError("cannot draw from an empty word bank")
+        if self.remaining == 0:
+            self.reset()
+        # Pick one of the positions not drawn yet, then move the last undrawn
+        # position into its place
+        index = self.rng.randrange(self.remaining)
+        self.remaining -= 1
+        last = self.remaining
+        picked = self.swaps.get(index, index)
+        self.swaps[index] = self.swaps.pop(last, last)
+        return self.words[picked]
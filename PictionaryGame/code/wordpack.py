@@ -0,0 +1,182 @@
+import argparse
+import csv
+import mmap
+import os
+import struct
+
+from wordbank import dedupe, read_words
+
+# Compiled word packs. Opening one maps the file and reads only the header;
+# a word is decoded when it is asked for, so startup time and memory stay
+# flat however many entries a pack holds. All integers are little-endian.
+#
+#   header        magic, version, entry count, size of the category names
+#   names         category names, UTF-8, separated by newlines
+#   offsets       count + 1 uint32, where each word starts in the blob
+#   categories    count uint16, index into the category names
+#   difficulties  count uint8
+#   blob          every word, UTF-8, back to back
+
+MAGIC = b'PWPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHxxII')
+OFFSET = struct.Struct('<I')
+SPAN = struct.Struct('<II')
+CATEGORY = struct.Struct('<H')
+
+# Packs opened so far, by absolute path
+_packs = {}
+
+
+def compile_pack(entries, out_path):
+    # entries are (word, category, difficulty) tuples; words that differ only
+    # in case are dropped the same way the text word lists are deduplicated
+    entries = list(entries)
+    unique = set(dedupe(word for word, _, _ in entries))
+    categories = {}
+    offsets = [0]
+    category_column = bytearray()
+    difficulty_column = bytearray()
+    blob = bytearray()
+    for word, category, difficulty in entries:
+        if word not in unique:
+            continue
+        unique.discard(word)
+        index = categories.setdefault(category, len(categories))
+        blob += word.encode('utf-8')
+        offsets.append(len(blob))
+        category_column += CATEGORY.pack(index)
+        difficulty_column.append(max(0, min(255, int(difficulty))))
+    names = '\n'.join(categories).encode('utf-8')
+    with open(out_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(offsets) - 1, len(names)))
+        file.write(names)
+        file.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        file.write(category_column)
+        file.write(difficulty_column)
+        file.write(blob)
+    return len(offsets) - 1
+
+
+def read_source(file_path, difficulty=0):
+    # A .csv source has word,category,difficulty rows; any other file is a
+    # comma separated word list whose category is the file name
+    if file_path.endswith('.csv'):
+        with open(file_path, newline='') as file:
+            reader = csv.reader(file)
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue
+                try:
+                    word, category, level = row[:3]
+                    level = int(level)
+                except ValueError:
+                    raise ValueError(f"{file_path}, line {reader.line_num}: expected word,category,difficulty "
+                                     f"but got {','.join(row)!r}") from None
+                yield word.strip(), category.strip(), level
+        return
+    category = os.path.splitext(os.path.basename(file_path))[0]
+    for word in read_words(file_path):
+        yield word, category, difficulty
+
+
+class WordPack:
+    # Read-only view of a compiled pack. It is a sequence of words, so it can
+    # be handed to GameEngine and WordSampler in place of a word tuple.
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Words are sampled at random, so reading ahead only wastes memory
+        if hasattr(mmap, 'MADV_RANDOM'):
+            self.map.madvise(mmap.MADV_RANDOM)
+        magic, version, self.count, names_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{file_path} is not a version {VERSION} word pack")
+        names_at = HEADER.size
+        self.categories = self.map[names_at:names_at + names_size].decode('utf-8').split('\n')
+        self.offsets_at = names_at + names_size
+        self.categories_at = self.offsets_at + (self.count + 1) * OFFSET.size
+        self.difficulties_at = self.categories_at + self.count * CATEGORY.size
+        self.blob_at = self.difficulties_at + self.count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.word(index)
+
+    def _check(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("word pack index out of range")
+
+    def search(self, pattern):
+        # Words the compiled bytes regex `pattern` matches in, each once, in
+        # pack order. The regex runs over the mapped words as one block, so
+        # nothing is decoded but the hits; a match is credited to the word
+        # it starts in.
+        last = None
+        for match in pattern.finditer(self.map, self.blob_at):
+            index = self._index_at(match.start() - self.blob_at)
+            if index != last and index < self.count:
+                last = index
+                yield self.word(index)
+
+    def _index_at(self, position):
+        # The word whose bytes include blob position `position`
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if OFFSET.unpack_from(self.map, self.offsets_at + (middle + 1) * OFFSET.size)[0] <= position:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def word(self, index):
+        self._check(index)
+        start, end = SPAN.unpack_from(self.map, self.offsets_at + index * OFFSET.size)
+        return self.map[self.blob_at + start:self.blob_at + end].decode('utf-8')
+
+    def category(self, index):
+        self._check(index)
+        return self.categories[CATEGORY.unpack_from(self.map, self.categories_at + index * CATEGORY.size)[0]]
+
+    def difficulty(self, index):
+        self._check(index)
+        return self.map[self.difficulties_at + index]
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_pack(file_path):
+    path = os.path.abspath(file_path)
+    pack = _packs.get(path)
+    if pack is None:
+        pack = _packs[path] = WordPack(path)
+    return pack
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile word lists into a binary word pack")
+    parser.add_argument('output', help="pack file to write, e.g. easymode.wpk")
+    parser.add_argument('sources', nargs='+',
+                        help="comma separated word lists, or .csv files of word,category,difficulty")
+    parser.add_argument('--difficulty', type=int, default=0,
+                        help="difficulty given to words from plain word lists")
+    args = parser.parse_args()
+    entries = []
+    for source in args.sources:
+        try:
+            entries.extend(read_source(source, args.difficulty))
+        except ValueError as error:
+            parser.error(str(error))
+    count = compile_pack(entries, args.output)
+    print(f"wrote {count} words to {args.output}")